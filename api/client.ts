@@ -21,4 +21,30 @@ client.interceptors.request.use(
     }
 );
 
+// List endpoints are cursor-paginated: {next, previous, results}. A page is
+// fetched with fetchPage and the following one by passing its `next` URL.
+export interface Page<T> {
+    results: T[];
+    next: string | null;
+}
+
+export const fetchPage = async <T = any>(url: string, params?: Record<string, any>): Promise<Page<T>> => {
+    const response = await client.get(url, { params });
+    return { results: response.data.results, next: response.data.next };
+};
+
+// Every page of a list the screen needs whole (a family's students, a
+// subject's evaluations, the pickers of the management screens). The
+// payment tables, which grow every month, are paged in the UI with fetchPage.
+export const fetchAll = async <T = any>(url: string, params?: Record<string, any>): Promise<T[]> => {
+    const rows: T[] = [];
+    let page = await fetchPage<T>(url, { page_size: 500, ...params });
+    rows.push(...page.results);
+    while (page.next) {
+        page = await fetchPage<T>(page.next);
+        rows.push(...page.results);
+    }
+    return rows;
+};
+
 export default client;
@@ -0,0 +1,47 @@
+import client from './client';
+
+const MAX_RETRIES = 5;
+
+const sha256Hex = async (file: Blob): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
+const wait = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+/**
+ * Uploads a payment proof in chunks (see ProofUploadViewSet) and returns the
+ * committed upload id, to send as "upload" when creating the payment.
+ * A dropped chunk is retried from the offset the server reports, so a slow
+ * or flaky connection does not restart the whole file.
+ */
+export const uploadProof = async (file: File, onProgress?: (fraction: number) => void): Promise<string> => {
+  const checksum = await sha256Hex(file);
+  const { data: upload } = await client.post('uploads/', { filename: file.name, size: file.size, checksum });
+
+  let offset: number = upload.offset;
+  let failures = 0;
+  while (offset < file.size) {
+    const end = Math.min(offset + upload.chunk_size, file.size);
+    try {
+      const res = await client.put(`uploads/${upload.id}/`, file.slice(offset, end), {
+        headers: {
+          'Content-Type': 'application/octet-stream',
+          'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+        },
+      });
+      offset = res.data.offset;
+      failures = 0;
+      onProgress?.(offset / file.size);
+    } catch (error: any) {
+      if (++failures > MAX_RETRIES) throw error;
+      await wait(1000 * failures);
+      // Ask where to resume; the server keeps whatever part of the chunk arrived
+      const res = await client.get(`uploads/${upload.id}/`);
+      offset = res.data.offset;
+    }
+  }
+
+  await client.post(`uploads/${upload.id}/commit/`);
+  return upload.id;
+};
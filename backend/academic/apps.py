@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AcademicConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'academic'
+
+    def ready(self):
+        from core import checks  # noqa: F401
+        from . import signals  # noqa: F401
@@ -0,0 +1,510 @@
+"""
+Synthetic school dataset and HTTP load generator, used by the
+``generate_dataset`` and ``loadtest`` management commands.
+"""
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from administrative.models import ExchangeRate, Payment, PaymentConcept, ProofUpload
+from core.versions import bump_version
+
+from .models import Evaluation, Grade, Schedule, Student, StudentSubjectScore, Subject, Teacher
+
+User = get_user_model()
+
+GRADE_LEVELS = ['1er Grado', '2do Grado', '3er Grado', '4to Grado', '5to Grado', '6to Grado',
+                '1er Año', '2do Año', '3er Año', '4to Año', '5to Año']
+SECTIONS = ['A', 'B', 'C']
+SUBJECT_NAMES = ['Matemáticas', 'Lenguaje', 'Historia', 'Ciencias', 'Inglés', 'Educación Física',
+                 'Arte', 'Geografía', 'Física', 'Química', 'Biología', 'Informática']
+FIRST_NAMES = ['Juan', 'María', 'José', 'Ana', 'Luis', 'Carmen', 'Carlos', 'Rosa', 'Pedro', 'Laura']
+LAST_NAMES = ['Pérez', 'González', 'Rodríguez', 'Hernández', 'García', 'Martínez', 'López', 'Díaz']
+STATUSES = ['PENDING', 'VERIFIED', 'VERIFIED', 'VERIFIED', 'REJECTED']
+
+
+# Dataset
+
+class DatasetGenerator:
+    """
+    Builds a school of the requested size with bulk inserts. Every generated
+    row hangs off users named ``<prefix>_...`` or subjects and concepts named
+    ``<prefix>:...``, which is what ``flush()`` deletes. All users share one
+    password hash; hashing per user would dominate the run.
+    """
+
+    def __init__(self, prefix='bench', students=5000, subjects=300, grades=1_000_000,
+                 payments=200_000, password='bench1234', batch_size=5000, seed=0, log=print):
+        self.prefix = prefix
+        self.students = students
+        self.subjects = subjects
+        self.grades = grades
+        self.payments = payments
+        self.password = password
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.log = log
+
+    def exists(self):
+        return User.objects.filter(username__startswith=f'{self.prefix}_').exists()
+
+    def flush(self):
+        """
+        Deletes the dataset. The big tables go first with plain DELETEs: their
+        post_delete receivers (scores, stats) keep the ORM from fast-deleting,
+        so a cascade would fetch and signal a million grades one by one. The
+        few users, subjects and concepts left then cascade normally.
+        """
+        from administrative.stats import invalidate_stats
+        from .timetable import invalidate_timetables
+
+        users = User.objects.filter(username__startswith=f'{self.prefix}_')
+        subjects = Subject.objects.filter(name__startswith=f'{self.prefix}:')
+        students = Student.objects.filter(representative__in=users)
+        deleted = 0
+        with transaction.atomic():
+            ProofUpload.objects.filter(payment__student__in=students).update(payment=None)
+            for queryset in (
+                Grade.objects.filter(Q(student__in=students) | Q(evaluation__subject__in=subjects)),
+                StudentSubjectScore.objects.filter(Q(student__in=students) | Q(subject__in=subjects)),
+                Payment.objects.filter(student__in=students),
+                Evaluation.objects.filter(subject__in=subjects),
+                Schedule.objects.filter(subject__in=subjects),
+                students,
+            ):
+                deleted += queryset._raw_delete(queryset.db)
+            deleted += users.delete()[0]
+            deleted += subjects.delete()[0]
+            deleted += PaymentConcept.objects.filter(name__startswith=f'{self.prefix}:').delete()[0]
+        # Nothing above told the caches
+        invalidate_stats()
+        invalidate_timetables()
+        bump_version(User, Teacher, Subject, PaymentConcept)
+        return deleted
+
+    def generate(self):
+        started = time.monotonic()
+        groups = [(level, section) for level in GRADE_LEVELS for section in SECTIONS]
+        groups = groups[:max(1, min(len(groups), self.students // 20 or 1))]
+        password = make_password(self.password)
+
+        admin = User.objects.create(username=f'{self.prefix}_admin', password=password,
+                                    role='ADMINISTRADOR', first_name='Admin', last_name='Bench')
+        teachers = self.create_teachers(password, max(1, self.subjects // 6))
+        students = self.create_students(password, groups)
+        subjects = self.create_subjects(groups, teachers)
+        evaluations = self.create_evaluations(subjects, students)
+        grade_count = self.create_grades(evaluations, students)
+        payment_count = self.create_payments(students)
+
+        from administrative.stats import invalidate_stats
+        from .scores import rebuild_scores
+        self.log('Rebuilding subject scores...')
+        rebuild_scores()
+        invalidate_stats()
+        bump_version(User, Teacher, Subject, PaymentConcept)
+
+        summary = {
+            'admin': admin.username,
+            'teachers': len(teachers),
+            'students': sum(len(ids) for ids in students.values()),
+            'subjects': len(subjects),
+            'evaluations': len(evaluations),
+            'grades': grade_count,
+            'payments': payment_count,
+            'seconds': round(time.monotonic() - started, 1),
+        }
+        return summary
+
+    def name(self):
+        return self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+
+    def create_teachers(self, password, count):
+        User.objects.bulk_create([
+            User(username=f'{self.prefix}_prof{i}', password=password, role='DOCENTE',
+                 first_name=first, last_name=last)
+            for i, (first, last) in enumerate(self.name() for _ in range(count))
+        ], batch_size=self.batch_size)
+        users = User.objects.filter(username__startswith=f'{self.prefix}_prof')
+        Teacher.objects.bulk_create(
+            [Teacher(user=user, specialty=self.random.choice(SUBJECT_NAMES)) for user in users],
+            batch_size=self.batch_size,
+        )
+        self.log(f'{count} teachers')
+        return list(Teacher.objects.filter(user__username__startswith=f'{self.prefix}_prof'))
+
+    def create_students(self, password, groups):
+        # About two children per representative
+        User.objects.bulk_create([
+            User(username=f'{self.prefix}_rep{i}', password=password, role='REPRESENTANTE',
+                 first_name=first, last_name=last)
+            for i, (first, last) in enumerate(self.name() for _ in range(math.ceil(self.students / 2)))
+        ], batch_size=self.batch_size)
+        reps = list(User.objects.filter(username__startswith=f'{self.prefix}_rep').values_list('id', flat=True))
+
+        rows = []
+        for i in range(self.students):
+            first, last = self.name()
+            level, section = groups[i % len(groups)]
+            rows.append(Student(
+                representative_id=reps[i // 2], first_name=first, last_name=last,
+                id_number=f'{self.prefix}-{i}', current_grade=level, section=section,
+                birth_date=date(2010, 1, 1) + timedelta(days=self.random.randrange(3650)),
+            ))
+        Student.objects.bulk_create(rows, batch_size=self.batch_size)
+
+        students = defaultdict(list)
+        for pk, level, section in Student.objects.filter(id_number__startswith=f'{self.prefix}-').values_list(
+                'id', 'current_grade', 'section'):
+            students[(level, section)].append(pk)
+        self.log(f'{self.students} students in {len(groups)} sections')
+        return students
+
+    def create_subjects(self, groups, teachers):
+        Subject.objects.bulk_create([
+            Subject(name=f'{self.prefix}:{SUBJECT_NAMES[(i // len(groups)) % len(SUBJECT_NAMES)]} {i}',
+                    grade_level=groups[i % len(groups)][0], section=groups[i % len(groups)][1],
+                    teacher=teachers[i % len(teachers)])
+            for i in range(self.subjects)
+        ], batch_size=self.batch_size)
+        self.log(f'{self.subjects} subjects')
+        return list(Subject.objects.filter(name__startswith=f'{self.prefix}:'))
+
+    def create_evaluations(self, subjects, students):
+        # Enough evaluations per subject to reach the requested grade count
+        enrolled = sum(len(students[(s.grade_level, s.section)]) for s in subjects) or 1
+        per_subject = max(3, math.ceil(self.grades / enrolled))
+        per_lapso = math.ceil(per_subject / 3)
+        percentage = (Decimal(100) / per_lapso).quantize(Decimal('0.01'))
+        rows = [
+            Evaluation(subject=subject, name=f'Evaluación {n + 1}', lapso=n // per_lapso + 1,
+                       percentage=percentage, date=date.today() - timedelta(days=self.random.randrange(200)))
+            for subject in subjects for n in range(min(per_subject, per_lapso * 3))
+        ]
+        Evaluation.objects.bulk_create(rows, batch_size=self.batch_size)
+        evaluations = list(Evaluation.objects.filter(subject__in=subjects).select_related('subject'))
+        self.log(f'{len(evaluations)} evaluations')
+        return evaluations
+
+    def create_grades(self, evaluations, students):
+        def rows():
+            count = 0
+            for evaluation in evaluations:
+                for student_id in students[(evaluation.subject.grade_level, evaluation.subject.section)]:
+                    if count >= self.grades:
+                        return
+                    count += 1
+                    yield Grade(student_id=student_id, evaluation_id=evaluation.id,
+                                score=Decimal(self.random.randrange(500, 2000)) / 100)
+
+        return self.insert(Grade, rows(), 'grades')
+
+    def create_payments(self, students):
+        concepts = PaymentConcept.objects.bulk_create([
+            PaymentConcept(name=f'{self.prefix}:Mensualidad {month}', amount_usd=Decimal(50))
+            for month in range(1, 13)
+        ])
+        rate = ExchangeRate.objects.order_by('-date', '-id').first()
+        rate = rate.rate if rate else Decimal('36.50')
+        student_ids = [pk for ids in students.values() for pk in ids]
+
+        def rows():
+            for i in range(self.payments):
+                concept = concepts[i % len(concepts)]
+                yield Payment(
+                    student_id=self.random.choice(student_ids), payment_concept=concept,
+                    concept=concept.name, amount_usd=concept.amount_usd,
+                    amount_bs=concept.amount_usd * rate, rate_applied=rate,
+                    reference_number=f'{self.random.randrange(10 ** 8):08d}',
+                    proof_image='payments/benchmark.png', status=self.random.choice(STATUSES),
+                    billing_name='Bench', billing_id='V-00000000',
+                )
+
+        count = self.insert(Payment, rows(), 'payments')
+        # date_reported is auto_now_add; spread it over the last year afterwards
+        payments = Payment.objects.filter(payment_concept__in=concepts)
+        now = timezone.now()
+        for month, concept in enumerate(concepts):
+            payments.filter(payment_concept=concept).update(date_reported=now - timedelta(days=30 * (11 - month)))
+        return count
+
+    def insert(self, model, rows, label):
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                count += self.flush_batch(model, batch, label, count)
+                batch = []
+        if batch:
+            count += self.flush_batch(model, batch, label, count)
+        return count
+
+    def flush_batch(self, model, batch, label, done):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        if (done // self.batch_size) % 20 == 0:
+            self.log(f'{done + len(batch)} {label}')
+        return len(batch)
+
+
+# Load test
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][str(status)] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[endpoint] += 1
+
+    def summary(self, wall_seconds):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'errors': self.errors[endpoint],
+                'statuses': dict(self.statuses[endpoint]),
+                'throughput_rps': round(len(values) / wall_seconds, 2) if wall_seconds else None,
+                'mean_ms': round(sum(values) / len(values) * 1000, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        return endpoints
+
+
+class Client:
+    """One simulated user: its own HTTP session, token and test fixtures."""
+
+    def __init__(self, base_url, username, password, results, timeout=30):
+        self.base_url = base_url.rstrip('/') + '/api/'
+        self.username = username
+        self.password = password
+        self.results = results
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def call(self, endpoint, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            status = response.status_code
+        except requests.RequestException as exc:
+            response, status = None, type(exc).__name__
+        self.results.add(endpoint, time.perf_counter() - start, status)
+        return response
+
+    def login(self):
+        # Token auth only, like the frontend; a leftover session cookie would
+        # make the next login POST fail the CSRF check.
+        self.session.headers.pop('Authorization', None)
+        self.session.cookies.clear()
+        response = self.call('login', 'POST', 'auth/login/',
+                             json={'username': self.username, 'password': self.password})
+        if response is None or response.status_code != 200:
+            return False
+        self.session.headers['Authorization'] = f"Token {response.json()['token']}"
+        return True
+
+
+class Scenario:
+    """
+    What each role does, weighted. The fixtures (which evaluation a teacher
+    grades, which child a parent opens) are read from the database up front,
+    so the server under test must use the same database as this command.
+    """
+
+    def __init__(self, prefix, reads_only=False):
+        self.prefix = prefix
+        self.reads_only = reads_only
+        self.teachers = list(
+            Evaluation.objects.filter(subject__teacher__user__username__startswith=f'{prefix}_prof')
+            .values_list('subject__teacher__user__username', 'id', 'subject__grade_level', 'subject__section')
+        )
+        self.sections = defaultdict(list)
+        for pk, level, section in Student.objects.filter(id_number__startswith=f'{prefix}-').values_list(
+                'id', 'current_grade', 'section'):
+            self.sections[(level, section)].append(pk)
+        self.parents = list(
+            Student.objects.filter(id_number__startswith=f'{prefix}-')
+            .values_list('representative__username', 'id')
+        )
+        if not self.teachers or not self.parents:
+            raise ValueError(f'No dataset with prefix "{prefix}"; run generate_dataset first.')
+
+    def users(self, count, rng):
+        """(username, role fixture) for ``count`` clients: half parents, a quarter each teachers and admins."""
+        users = []
+        for i in range(count):
+            kind = ('parent', 'teacher', 'parent', 'admin')[i % 4]
+            if kind == 'admin':
+                users.append((f'{self.prefix}_admin', kind, None))
+            elif kind == 'teacher':
+                username, evaluation_id, level, section = rng.choice(self.teachers)
+                users.append((username, kind, (evaluation_id, self.sections[(level, section)])))
+            else:
+                username, student_id = rng.choice(self.parents)
+                users.append((username, kind, student_id))
+        return users
+
+    def step(self, client, kind, fixture, rng):
+        if self.reads_only:
+            return self.read_step(client, kind, fixture, rng)
+        if kind == 'admin':
+            if rng.random() < 0.8:
+                client.call('payments_list', 'GET', 'payments/')
+            else:
+                client.call('rates_current', 'GET', 'rates/current/')
+        elif kind == 'teacher':
+            evaluation_id, student_ids = fixture
+            grades = [{'student': pk, 'score': f'{rng.randrange(500, 2000) / 100:.2f}'}
+                      for pk in student_ids]
+            client.call('grade_entry', 'POST', f'evaluations/{evaluation_id}/grades/bulk/', json={'grades': grades})
+        else:
+            if rng.random() < 0.7:
+                client.call('report_card', 'GET', f'students/{fixture}/report_card/')
+            else:
+                client.call('rates_current', 'GET', 'rates/current/')
+
+    def read_step(self, client, kind, fixture, rng):
+        # GET only, over the endpoints core.async_views serves under ASGI, so
+        # the same run can be compared between a WSGI and an ASGI server.
+        choice = rng.random()
+        if choice < 0.1:
+            client.call('rates_current', 'GET', 'rates/current/')
+        elif kind == 'admin':
+            if choice < 0.6:
+                client.call('payments_list', 'GET', 'payments/')
+            else:
+                client.call('students_list', 'GET', 'students/')
+        elif kind == 'teacher':
+            evaluation_id, student_ids = fixture
+            if choice < 0.7:
+                client.call('grades_list', 'GET', f'grades/?evaluation_id={evaluation_id}')
+            else:
+                client.call('timetable', 'GET', f'students/{student_ids[0]}/timetable/')
+        else:
+            if choice < 0.3:
+                client.call('students_list', 'GET', 'students/')
+            elif choice < 0.55:
+                client.call('grades_list', 'GET', f'grades/?student_id={fixture}')
+            elif choice < 0.8:
+                client.call('payments_list', 'GET', f'payments/?student_id={fixture}')
+            else:
+                client.call('timetable', 'GET', f'students/{fixture}/timetable/')
+
+
+def run_load(base_url, clients=20, duration=60, prefix='bench', password='bench1234',
+             relogin_every=50, seed=0, scenario='mixed', log=print):
+    """
+    Drives ``clients`` concurrent sessions for ``duration`` seconds and
+    returns the per-endpoint summary. Every client logs in first and again
+    every ``relogin_every`` requests, so login shows up in the numbers too.
+    ``scenario='reads'`` only issues GETs to the async-capable endpoints.
+    """
+    scenario_name = scenario
+    scenario = Scenario(prefix, reads_only=scenario_name == 'reads')
+    results = Results()
+    deadline = time.monotonic() + duration
+
+    def worker(username, kind, fixture, worker_seed):
+        client = Client(base_url, username, password, results)
+        rng = random.Random(worker_seed)
+        done = 0
+        while time.monotonic() < deadline:
+            if done % relogin_every == 0 and not client.login():
+                time.sleep(1)
+                continue
+            scenario.step(client, kind, fixture, rng)
+            done += 1
+
+    threads = [
+        threading.Thread(target=worker, args=(*user, seed + i), daemon=True)
+        for i, user in enumerate(scenario.users(clients, random.Random(seed)))
+    ]
+    log(f'{clients} clients against {base_url} for {duration}s ({scenario_name})...')
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+
+    return {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'base_url': base_url,
+        'scenario': scenario_name,
+        'database': database_mode(),
+        'clients': clients,
+        'duration_s': round(wall, 2),
+        'endpoints': results.summary(wall),
+    }
+
+
+def database_mode():
+    """
+    How this process's settings connect to the database; run the server
+    with the same environment so the results are labelled correctly.
+    """
+    db = settings.DATABASES['default']
+    pool = db.get('OPTIONS', {}).get('pool')
+    if pool:
+        prepared = ', prepared statements' if db['OPTIONS'].get('server_side_binding') else ''
+        return f"pool {pool.get('min_size', 4)}-{pool.get('max_size')}{prepared}"
+    max_age = db.get('CONN_MAX_AGE', 0)
+    if max_age is None:
+        return 'persistent'
+    if max_age:
+        return f'persistent {max_age}s'
+    return 'new connection per request'
+
+
+def compare(current, baseline):
+    """Latency and throughput change per endpoint against a previous results file."""
+    rows = {}
+    for endpoint, stats in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if not before:
+            continue
+        rows[endpoint] = {
+            'mean_ms': (before['mean_ms'], stats['mean_ms']),
+            'p50_ms': (before['p50_ms'], stats['p50_ms']),
+            'p95_ms': (before['p95_ms'], stats['p95_ms']),
+            'throughput_rps': (before['throughput_rps'], stats['throughput_rps']),
+        }
+    return rows
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,323 @@
+"""
+Bulk enrollment: one spreadsheet row per student, with the representative's
+data repeated for each child. Rows are validated in memory and against the
+database with a couple of set-based queries, then users and students are
+created with bulk inserts.
+"""
+import codecs
+import csv
+import os
+import re
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from users.models import CustomUser
+from .models import Student
+
+# Accepted headers (lower-cased) for each field
+COLUMNS = {
+    'rep_cedula': ('cedula_representante', 'cédula representante', 'cedula representante', 'rep_cedula'),
+    'rep_first_name': ('nombres_representante', 'nombres representante', 'rep_first_name'),
+    'rep_last_name': ('apellidos_representante', 'apellidos representante', 'rep_last_name'),
+    'rep_email': ('email', 'email_representante', 'correo', 'rep_email'),
+    'rep_phone': ('telefono', 'teléfono', 'rep_phone'),
+    'rep_address': ('direccion', 'dirección', 'rep_address'),
+    'rep_password': ('clave', 'contraseña', 'password', 'rep_password'),
+    'cedula': ('cedula_estudiante', 'cédula estudiante', 'cedula estudiante', 'cedula', 'id_number'),
+    'first_name': ('nombres', 'nombres_estudiante', 'first_name'),
+    'last_name': ('apellidos', 'apellidos_estudiante', 'last_name'),
+    'birth_date': ('fecha_nacimiento', 'fecha de nacimiento', 'birth_date'),
+    'grade': ('grado', 'año', 'grade', 'current_grade'),
+    'section': ('seccion', 'sección', 'section'),
+}
+REQUIRED = ('rep_cedula', 'rep_first_name', 'rep_last_name', 'cedula', 'first_name', 'last_name',
+            'birth_date', 'grade', 'section')
+# Same shape the CedulaInput component produces: V-12.345.678
+CEDULA_RE = re.compile(r'^(V|E|CE|P)?-?\s*([\d.]+)$', re.IGNORECASE)
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+MAX_LENGTHS = {'first_name': 100, 'last_name': 100, 'grade': 20, 'section': 5,
+               'rep_first_name': 150, 'rep_last_name': 150, 'rep_phone': 20}
+
+
+class EnrollmentFileError(ValueError):
+    pass
+
+
+def normalize_cedula(value):
+    """'v12345678', 'V-12.345.678' and '12345678' all become 'V-12.345.678'."""
+    match = CEDULA_RE.match(str(value or '').strip())
+    if not match:
+        return None
+    digits = match.group(2).replace('.', '')
+    if not digits or len(digits) > 10:
+        return None
+    kind = (match.group(1) or 'V').upper()
+    return f'{kind}-{int(digits):,}'.replace(',', '.')
+
+
+def cedula_variants(cedula):
+    # Older records were typed without the prefix, with or without dots
+    number = cedula.split('-', 1)[1]
+    return {cedula: cedula, number: cedula, number.replace('.', ''): cedula}
+
+
+def lookup(cedulas):
+    variants = {}
+    for cedula in cedulas:
+        variants.update(cedula_variants(cedula))
+    return variants
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+# Reading
+
+def header_map(header):
+    aliases = {alias: field for field, names in COLUMNS.items() for alias in names}
+    mapping = {}
+    for index, name in enumerate(header):
+        field = aliases.get(str(name or '').strip().lower())
+        if field and field not in mapping.values():
+            mapping[index] = field
+    missing = [field for field in REQUIRED if field not in mapping.values()]
+    if missing:
+        raise EnrollmentFileError(f'Faltan columnas: {", ".join(missing)}')
+    return mapping
+
+
+def csv_encoding(file):
+    """
+    UTF-8 (with or without BOM) if the whole file decodes as such, else
+    Windows-1252, which is what Excel's "CSV" saves on Spanish Windows.
+    Checked in chunks so the file is never held in memory.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp1252'
+    finally:
+        file.seek(0)
+
+
+def iter_csv(file):
+    lines = codecs.iterdecode(file, csv_encoding(file))
+    try:
+        first = next(lines, '')
+        try:
+            # Spreadsheets exported with a Spanish locale use ';'
+            dialect = csv.Sniffer().sniff(first, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(_chain(first, lines), dialect)
+    except UnicodeDecodeError:
+        # Nothing is written before the whole file is validated
+        raise EnrollmentFileError('No se pudo leer el archivo; guárdelo como CSV en UTF-8')
+
+
+def _chain(first, lines):
+    yield first
+    yield from lines
+
+
+def iter_xlsx(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise EnrollmentFileError('Instale openpyxl para importar archivos .xlsx, o use CSV')
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename):
+    """Yields (row number, {field: value}) from a CSV or XLSX file, streaming."""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.xlsx':
+        rows = iter_xlsx(file)
+    elif extension in ('.csv', '.txt', ''):
+        rows = iter_csv(file)
+    else:
+        raise EnrollmentFileError('Formato no soportado; use CSV o XLSX')
+
+    header = next(rows, None)
+    if header is None:
+        raise EnrollmentFileError('El archivo está vacío')
+    mapping = header_map(header)
+    for number, values in enumerate(rows, start=2):
+        if not any(str(value).strip() for value in values):
+            continue
+        yield number, {
+            field: values[index] if isinstance(values[index], (date, datetime)) else str(values[index]).strip()
+            for index, field in mapping.items() if index < len(values)
+        }
+
+
+# Validation
+
+def check_row(data):
+    errors = []
+    for field in REQUIRED:
+        if not data.get(field):
+            errors.append((field, 'Campo requerido'))
+    for field, limit in MAX_LENGTHS.items():
+        if len(str(data.get(field) or '')) > limit:
+            errors.append((field, f'Máximo {limit} caracteres'))
+    for field in ('rep_cedula', 'cedula'):
+        if data.get(field):
+            normalized = normalize_cedula(data[field])
+            if normalized is None:
+                errors.append((field, 'Cédula inválida'))
+            data[field] = normalized
+    if data.get('birth_date'):
+        data['birth_date'] = parse_date(data['birth_date'])
+        if data['birth_date'] is None:
+            errors.append(('birth_date', 'Fecha inválida (use AAAA-MM-DD o DD/MM/AAAA)'))
+    return errors
+
+
+def validate(rows):
+    """
+    Returns (families, errors): families maps the representative's cédula to
+    its data and accepted student rows. Uniqueness is checked within the file
+    and against the database with one query per table.
+    """
+    errors = []
+    families = {}
+    students_seen = {}
+
+    for number, data in rows:
+        row_errors = check_row(data)
+        if row_errors:
+            errors.extend({'row': number, 'field': field, 'message': message} for field, message in row_errors)
+            continue
+        if data['cedula'] in students_seen:
+            errors.append({'row': number, 'field': 'cedula',
+                           'message': f'Estudiante repetido (fila {students_seen[data["cedula"]]})'})
+            continue
+
+        family = families.setdefault(data['rep_cedula'], {'row': number, 'data': data, 'students': []})
+        rep = family['data']
+        if (rep['rep_first_name'], rep['rep_last_name']) != (data['rep_first_name'], data['rep_last_name']):
+            errors.append({'row': number, 'field': 'rep_cedula',
+                           'message': f'Datos del representante distintos a la fila {family["row"]}'})
+            continue
+        students_seen[data['cedula']] = number
+        family['students'].append((number, data))
+
+    student_variants = lookup(students_seen)
+    existing_students = {
+        student_variants[id_number] for id_number in
+        Student.objects.filter(id_number__in=list(student_variants)).values_list('id_number', flat=True)
+    }
+    user_variants = lookup(families)
+    existing_users = {
+        user_variants[username]: (pk, role) for username, pk, role in
+        CustomUser.objects.filter(username__in=list(user_variants)).values_list('username', 'id', 'role')
+    }
+
+    for cedula, family in list(families.items()):
+        user = existing_users.get(cedula)
+        if user and user[1] != 'REPRESENTANTE':
+            errors.extend({'row': number, 'field': 'rep_cedula',
+                           'message': 'La cédula pertenece a un usuario que no es representante'}
+                          for number, _data in family['students'])
+            del families[cedula]
+            continue
+        # Returning families just get their new children attached
+        family['user_id'] = user[0] if user else None
+        kept = []
+        for number, data in family['students']:
+            if data['cedula'] in existing_students:
+                errors.append({'row': number, 'field': 'cedula', 'message': 'El estudiante ya está registrado'})
+            else:
+                kept.append((number, data))
+        family['students'] = kept
+        if not kept:
+            del families[cedula]
+
+    errors.sort(key=lambda error: error['row'])
+    return families, errors
+
+
+# Import
+
+def hash_passwords(passwords, workers=None):
+    # PBKDF2 runs in C without the GIL, so threads hash in parallel
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords))
+
+
+def import_enrollments(file, filename, dry_run=False, workers=None):
+    families, errors = validate(read_rows(file, filename))
+    new_families = [family for family in families.values() if family['user_id'] is None]
+    report = {
+        'representatives_created': len(new_families),
+        'students_created': sum(len(family['students']) for family in families.values()),
+        'errors': errors,
+        'credentials': [],
+        'dry_run': dry_run,
+    }
+    if dry_run or not families:
+        return report
+
+    passwords = [family['data'].get('rep_password') or f'{secrets.randbelow(10 ** 8):08d}'
+                 for family in new_families]
+    hashes = hash_passwords(passwords, workers=workers)
+
+    users = [
+        CustomUser(
+            username=family['data']['rep_cedula'], password=hashed, visible_password=password,
+            role='REPRESENTANTE', first_name=family['data']['rep_first_name'],
+            last_name=family['data']['rep_last_name'], email=family['data'].get('rep_email', ''),
+            phone_number=family['data'].get('rep_phone') or None,
+            address=family['data'].get('rep_address') or None,
+        )
+        for family, password, hashed in zip(new_families, passwords, hashes)
+    ]
+    try:
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=1000)
+            user_ids = {username: pk for username, pk in
+                        CustomUser.objects.filter(username__in=[family['data']['rep_cedula'] for family in new_families])
+                        .values_list('username', 'id')}
+            user_ids.update((cedula, family['user_id']) for cedula, family in families.items() if family['user_id'])
+            Student.objects.bulk_create([
+                Student(representative_id=user_ids[cedula], id_number=data['cedula'],
+                        first_name=data['first_name'], last_name=data['last_name'],
+                        birth_date=data['birth_date'], current_grade=data['grade'], section=data['section'])
+                for cedula, family in families.items() for _number, data in family['students']
+            ], batch_size=1000)
+    except IntegrityError:
+        # Someone registered one of these cédulas while we were validating
+        raise EnrollmentFileError('Otro usuario registró alguna de estas cédulas durante la importación; '
+                                  'intente de nuevo')
+    # Generated passwords are only known here; the office hands them to the families
+    report['credentials'] = [
+        {'row': family['row'], 'username': family['data']['rep_cedula'],
+         'name': f"{family['data']['rep_first_name']} {family['data']['rep_last_name']}", 'password': password}
+        for family, password in zip(new_families, passwords) if not family['data'].get('rep_password')
+    ]
+    return report
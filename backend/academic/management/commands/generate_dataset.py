@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from academic.benchmark import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic school with bulk inserts for load testing (see the loadtest command)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--subjects', type=int, default=300)
+        parser.add_argument('--grades', type=int, default=1_000_000)
+        parser.add_argument('--payments', type=int, default=200_000)
+        parser.add_argument('--prefix', default='bench', help='Prefix of every generated username/record')
+        parser.add_argument('--password', default='bench1234', help='Password of every generated user')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--flush', action='store_true', help='Delete an existing dataset with this prefix first')
+
+    def handle(self, *args, **options):
+        generator = DatasetGenerator(
+            prefix=options['prefix'], students=options['students'], subjects=options['subjects'],
+            grades=options['grades'], payments=options['payments'], password=options['password'],
+            batch_size=options['batch_size'], seed=options['seed'], log=self.stdout.write,
+        )
+        if generator.exists():
+            if not options['flush']:
+                raise CommandError(f'A dataset with prefix "{options["prefix"]}" exists; use --flush to replace it')
+            self.stdout.write(f'Deleted {generator.flush()} rows')
+
+        summary = generator.generate()
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{key}: {value}' for key, value in summary.items())
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from academic.models import Student
+from academic.report_cards import RunStats, stream_zip
+
+
+class Command(BaseCommand):
+    help = 'Generates the report cards (boletines) of a grade/section, or the whole school, into a ZIP file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the ZIP file to write')
+        parser.add_argument('--grade', help='Only students of this grade, e.g. "5to Grado"')
+        parser.add_argument('--section', help='Only students of this section, e.g. "A"')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+
+    def handle(self, *args, **options):
+        if options['section'] and not options['grade']:
+            raise CommandError('--section requires --grade')
+
+        students = Student.objects.all()
+        if options['grade']:
+            students = students.filter(current_grade=options['grade'])
+        if options['section']:
+            students = students.filter(section=options['section'])
+
+        stats = RunStats()
+        with open(options['output'], 'wb') as output:
+            for chunk in stream_zip(students, workers=options['workers'], stats=stats):
+                output.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats.count} boletines en {stats.elapsed:.1f}s ({stats.per_second:.1f} boletines/s) -> {options["output"]}'
+        ))
@@ -0,0 +1,50 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from academic.enrollment import EnrollmentFileError, import_enrollments
+
+
+class Command(BaseCommand):
+    help = 'Imports students and their representatives from a CSV/XLSX file (one row per student)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV or XLSX file')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate, create nothing')
+        parser.add_argument('--errors', help='Write the row errors to this CSV file')
+        parser.add_argument('--credentials', help='Write the generated passwords to this CSV file')
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing threads (default: CPU count)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options['file'], 'rb') as f:
+                report = import_enrollments(f, options['file'], dry_run=options['dry_run'],
+                                            workers=options['workers'])
+        except EnrollmentFileError as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors'][:20]:
+            self.stderr.write(f"Fila {error['row']} ({error['field']}): {error['message']}")
+        if len(report['errors']) > 20:
+            self.stderr.write(f"... y {len(report['errors']) - 20} errores más")
+        if options['errors'] and report['errors']:
+            with open(options['errors'], 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['row', 'field', 'message'])
+                writer.writeheader()
+                writer.writerows(report['errors'])
+        if report['credentials']:
+            if options['credentials']:
+                with open(options['credentials'], 'w', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=['row', 'username', 'name', 'password'])
+                    writer.writeheader()
+                    writer.writerows(report['credentials'])
+            else:
+                for credential in report['credentials']:
+                    self.stdout.write(f"{credential['username']}\t{credential['name']}\t{credential['password']}")
+
+        verb = 'Se crearían' if options['dry_run'] else 'Creados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['representatives_created']} representantes y {report['students_created']} "
+            f"estudiantes; {len(report['errors'])} errores ({time.monotonic() - started:.1f}s)"
+        ))
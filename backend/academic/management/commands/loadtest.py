@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from academic.benchmark import compare, load_results, run_load
+
+
+class Command(BaseCommand):
+    help = ('Drives a running server with concurrent authenticated clients (login, payments list, '
+            'grade entry, report_card, rates/current) and reports latency percentiles per endpoint. '
+            'To compare WSGI and ASGI serving, run --scenario reads against each with the same '
+            '--clients and pass the first run\'s --output as --baseline of the second. Likewise for '
+            'connection pooling: a run with DB_POOL_MAX_SIZE=0 DB_CONN_MAX_AGE=0 (server and command) '
+            'as the baseline of one with the defaults.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000',
+                            help='Server to test; it must use the same database as this command')
+        parser.add_argument('--clients', type=int, default=20)
+        parser.add_argument('--duration', type=int, default=60, help='Seconds')
+        parser.add_argument('--prefix', default='bench', help='Prefix used by generate_dataset')
+        parser.add_argument('--password', default='bench1234')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--scenario', choices=('mixed', 'reads'), default='mixed',
+                            help='"reads": GET only, over the endpoints with an async path')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Previous JSON results to compare against')
+
+    def handle(self, *args, **options):
+        try:
+            results = run_load(
+                options['base_url'], clients=options['clients'], duration=options['duration'],
+                prefix=options['prefix'], password=options['password'], seed=options['seed'],
+                scenario=options['scenario'],
+                log=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"database: {results['database']}")
+        self.stdout.write(f"{'endpoint':<16}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+        for endpoint, stats in results['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<16}{stats['requests']:>8}{stats['errors']:>6}{stats['throughput_rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+            )
+
+        if options['baseline']:
+            baseline = load_results(options['baseline'])
+            self.stdout.write(f"\nvs baseline ({baseline.get('database', '?')} -> {results['database']}):")
+            for endpoint, change in compare(results, baseline).items():
+                self.stdout.write(
+                    f"{endpoint:<16}mean {change['mean_ms'][0]} -> {change['mean_ms'][1]} ms, "
+                    f"p50 {change['p50_ms'][0]} -> {change['p50_ms'][1]} ms, "
+                    f"p95 {change['p95_ms'][0]} -> {change['p95_ms'][1]} ms, "
+                    f"rps {change['throughput_rps'][0]} -> {change['throughput_rps'][1]}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from academic.scores import rebuild_scores, verify_scores
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the StudentSubjectScore aggregates from Grade/Evaluation, or verifies them with --verify'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare the stored rows with a full recomputation')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = verify_scores()
+            if mismatches:
+                for student_id, subject_id in mismatches[:50]:
+                    self.stdout.write(f'  student={student_id} subject={subject_id}')
+                raise CommandError(f'{len(mismatches)} filas no coinciden; ejecute rebuild_scores sin --verify')
+            self.stdout.write(self.style.SUCCESS('Los promedios coinciden con el recálculo completo'))
+            return
+
+        count = rebuild_scores()
+        self.stdout.write(self.style.SUCCESS(f'{count} filas recalculadas'))
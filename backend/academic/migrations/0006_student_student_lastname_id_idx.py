@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0005_evaluation_lapso'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_name', 'id'], name='student_lastname_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0007_student_student_grade_section_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSubjectScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lapso_1', models.DecimalField(decimal_places=6, default=0, max_digits=10)),
+                ('lapso_2', models.DecimalField(decimal_places=6, default=0, max_digits=10)),
+                ('lapso_3', models.DecimalField(decimal_places=6, default=0, max_digits=10)),
+                ('covered_1', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('covered_2', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('covered_3', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('definitiva', models.DecimalField(decimal_places=6, default=0, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_scores', to='academic.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_scores', to='academic.subject')),
+            ],
+            options={
+                'unique_together': {('student', 'subject')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import F, Sum
+
+
+def populate(apps, schema_editor):
+    Grade = apps.get_model('academic', 'Grade')
+    StudentSubjectScore = apps.get_model('academic', 'StudentSubjectScore')
+    places = Decimal('0.000001')
+
+    rows = (
+        Grade.objects.values('student_id', 'evaluation__subject_id', 'evaluation__lapso')
+        .annotate(points=Sum(F('score') * F('evaluation__percentage') / 100),
+                  covered=Sum('evaluation__percentage'))
+        .order_by()
+    )
+    scores = defaultdict(dict)
+    for row in rows:
+        values = scores[(row['student_id'], row['evaluation__subject_id'])]
+        values[f"lapso_{row['evaluation__lapso']}"] = Decimal(row['points']).quantize(places)
+        values[f"covered_{row['evaluation__lapso']}"] = row['covered']
+
+    objs = []
+    for (student_id, subject_id), values in scores.items():
+        total = sum(values.get(f'lapso_{lapso}', Decimal(0)) for lapso in (1, 2, 3))
+        objs.append(StudentSubjectScore(
+            student_id=student_id, subject_id=subject_id,
+            definitiva=(total / 3).quantize(places), **values
+        ))
+    StudentSubjectScore.objects.bulk_create(objs, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0008_studentsubjectscore'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -16,6 +16,14 @@ class Student(models.Model):
     birth_date = models.DateField()
     current_grade = models.CharField(max_length=20) # e.g., "1er Año", "5to Grado"
     section = models.CharField(max_length=5) # e.g., "A", "B"
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order for students/
+            models.Index(fields=['last_name', 'id'], name='student_lastname_id_idx'),
+            # students/?grade=&section= (and teacher rosters), already in keyset order
+            models.Index(fields=['current_grade', 'section', 'last_name', 'id'], name='student_grade_section_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -64,3 +72,24 @@ class Schedule(models.Model):
 
     def __str__(self):
         return f"{self.subject} - {self.day} {self.start_time}"
+
+class StudentSubjectScore(models.Model):
+    # Precomputed from Grade/Evaluation by academic.scores; never edit by hand.
+    # Lapso points are Sum(score * percentage / 100); covered is the Sum of
+    # the percentages graded so far; definitiva is the average of the 3 lapsos.
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='subject_scores')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='student_scores')
+    lapso_1 = models.DecimalField(max_digits=10, decimal_places=6, default=0)
+    lapso_2 = models.DecimalField(max_digits=10, decimal_places=6, default=0)
+    lapso_3 = models.DecimalField(max_digits=10, decimal_places=6, default=0)
+    covered_1 = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    covered_2 = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    covered_3 = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    definitiva = models.DecimalField(max_digits=10, decimal_places=6, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'subject')
+
+    def __str__(self):
+        return f"{self.student} - {self.subject}: {self.definitiva:.2f}"
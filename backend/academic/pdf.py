@@ -0,0 +1,90 @@
+"""
+Boletín rendering. Deliberately free of Django imports so it can run in
+process-pool workers, including spawned ones (Windows/macOS).
+"""
+import io
+from collections import namedtuple
+from datetime import datetime
+
+# Plain, picklable stand-in for a Student when rendering in a worker
+StudentInfo = namedtuple('StudentInfo', 'first_name last_name id_number current_grade section')
+
+
+def render_report_card(student, report_data):
+    """
+    ``report_data`` maps subject name -> {lapso: weighted points}, where each
+    evaluation contributes score * percentage / 100 (20 pts at 20% = 4 pts).
+    Returns the PDF as bytes.
+    """
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Header
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(50, height - 50, "Boletín Informativo")
+
+    p.setFont("Helvetica", 12)
+    p.drawString(50, height - 80, f"Estudiante: {student.first_name} {student.last_name}")
+    p.drawString(50, height - 100, f"Cédula: {student.id_number}")
+    p.drawString(50, height - 120, f"Grado: {student.current_grade} - Sección: {student.section}")
+
+    # Emission Date
+    now = datetime.now().strftime("%d/%m/%Y %I:%M %p")
+    p.setFont("Helvetica-Oblique", 10)
+    p.drawString(50, height - 140, f"Fecha de emisión: {now}")
+
+    # Table Header
+    y = height - 180
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(50, y, "Asignatura")
+    p.drawString(250, y, "1er Lapso")
+    p.drawString(330, y, "2do Lapso")
+    p.drawString(410, y, "3er Lapso")
+    p.drawString(490, y, "Definitiva")
+
+    p.line(50, y - 5, 550, y - 5)
+    y -= 25
+
+    # Table Content
+    p.setFont("Helvetica", 10)
+    for subject in sorted(report_data):
+        p.drawString(50, y, subject[:35])
+
+        # 1er Lapso
+        l1 = report_data[subject].get(1, 0)
+        p.drawString(250, y, f"{l1:.2f}")
+
+        # 2do Lapso
+        l2 = report_data[subject].get(2, 0)
+        p.drawString(330, y, f"{l2:.2f}")
+
+        # 3er Lapso
+        l3 = report_data[subject].get(3, 0)
+        p.drawString(410, y, f"{l3:.2f}")
+
+        # Definitiva (Average)
+        definitiva = (l1 + l2 + l3) / 3
+        p.setFont("Helvetica-Bold", 10)
+        p.drawString(490, y, f"{definitiva:.2f}")
+        p.setFont("Helvetica", 10)
+
+        y -= 20
+
+        if y < 50:
+            p.showPage()
+            y = height - 50
+
+    p.showPage()
+    p.save()
+
+    return buffer.getvalue()
+
+
+def render_job(job):
+    """Process-pool entry point: (filename, StudentInfo, report_data) -> (filename, pdf)."""
+    filename, student, report_data = job
+    return filename, render_report_card(student, report_data)
@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.streaming import Pipe
+
+from .models import StudentSubjectScore
+from .pdf import StudentInfo, render_job, render_report_card
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'report_card:version:{}'
+PDF_KEY = 'report_card:pdf:{}'
+
+
+def get_version(student_id):
+    """
+    Opaque token that changes whenever the student's Grade/Evaluation data
+    changes (see academic.signals). A missing token is simply re-created, so
+    a cache flush only costs one re-render.
+    """
+    key = VERSION_KEY.format(student_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(student_ids):
+    cache.set_many({VERSION_KEY.format(pk): uuid.uuid4().hex for pk in set(student_ids)}, None)
+
+
+def get_digest(student_id):
+    # Content address of the rendered boletín; also used as its ETag.
+    return hashlib.sha256(f'{student_id}:{get_version(student_id)}'.encode()).hexdigest()
+
+
+def get_cached_pdf(student, digest):
+    key = PDF_KEY.format(digest)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = render_report_card(student, get_report_data(student.id))
+        cache.set(key, pdf, 60 * 60 * 24 * 7)
+    return pdf
+
+
+# Report data
+
+def score_rows(students):
+    # One precomputed row per subject (see academic.scores)
+    return (
+        StudentSubjectScore.objects.filter(student__in=students)
+        .values('student_id', 'subject__name', 'lapso_1', 'lapso_2', 'lapso_3')
+        .order_by('student_id')
+    )
+
+
+def add_row(report_data, row):
+    # Subjects are keyed by name; two with the same name (e.g. split
+    # sections of one course) add up on the boletín
+    lapsos = report_data.setdefault(row['subject__name'], {1: 0, 2: 0, 3: 0})
+    for lapso in lapsos:
+        lapsos[lapso] += row[f'lapso_{lapso}']
+
+
+def get_report_data(student_id):
+    report_data = {}
+    for row in score_rows([student_id]):
+        add_row(report_data, row)
+    return report_data
+
+
+def iter_report_data(students):
+    """
+    Yields (student, report_data) for every student in ``students``, using a
+    single query for all their score rows. Both sides are streamed in
+    student id order and merged, so memory stays flat for the whole school.
+    """
+    students = students.order_by('id')
+    rows = score_rows(students.values('id')).iterator(chunk_size=2000)
+    row = next(rows, None)
+    for student in students.iterator(chunk_size=500):
+        report_data = {}
+        while row is not None and row['student_id'] < student.id:
+            row = next(rows, None)
+        while row is not None and row['student_id'] == student.id:
+            add_row(report_data, row)
+            row = next(rows, None)
+        yield student, report_data
+
+
+# Batch generation
+
+class RunStats:
+    def __init__(self):
+        self.count = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def per_second(self):
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+
+def archive_name(student):
+    folder = re.sub(r'[^\w-]+', '_', f'{student.current_grade}_{student.section}').strip('_')
+    id_number = re.sub(r'[^\w.-]+', '_', student.id_number)
+    return f'{folder}/boletin_{id_number}.pdf'
+
+
+def iter_jobs(students):
+    for student, report_data in iter_report_data(students):
+        info = StudentInfo(student.first_name, student.last_name, student.id_number,
+                           student.current_grade, student.section)
+        yield archive_name(student), info, report_data
+
+
+def pool_size(workers=None):
+    return workers or getattr(settings, 'REPORT_CARD_WORKERS', None) or os.cpu_count() or 1
+
+
+# Spawned, not forked: the workers only import academic.pdf instead of
+# inheriting the server's threads, locks and database connections
+_spawn = multiprocessing.get_context('spawn')
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process's render pool, started on first use and then reused by every request."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=pool_size(), mp_context=_spawn)
+        return _pool
+
+
+def discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_all(students, workers=None, stats=None):
+    """
+    Renders the report cards of ``students`` and yields (filename, pdf) in
+    order, on the shared pool or, with ``workers``, on a pool of that size
+    for this run only. At most a few jobs per worker are in flight, so
+    finished PDFs never pile up in memory while the caller writes them out.
+    """
+    stats = stats or RunStats()
+    if workers is None:
+        pool = get_pool()
+        try:
+            yield from render_on(pool, pool_size(), students, stats)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); the next request starts a new pool
+            discard_pool(pool)
+            raise
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_spawn) as pool:
+            yield from render_on(pool, workers, students, stats)
+    stats.elapsed = time.monotonic() - stats.started
+
+
+def render_on(pool, workers, students, stats):
+    window = workers * 2
+    pending = []
+    try:
+        for job in iter_jobs(students):
+            pending.append(pool.submit(render_job, job))
+            if len(pending) >= window:
+                yield pending.pop(0).result()
+                stats.count += 1
+        while pending:
+            yield pending.pop(0).result()
+            stats.count += 1
+    finally:
+        # Download abandoned: don't leave its jobs queued on the shared pool
+        for future in pending:
+            future.cancel()
+
+
+def stream_zip(students, workers=None, stats=None):
+    """Yields a ZIP of all report cards chunk by chunk, one PDF at a time."""
+    stats = stats or RunStats()
+    sink = Pipe()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, pdf in render_all(students, workers=workers, stats=stats):
+            archive.writestr(filename, pdf)
+            yield sink.drain()
+    yield sink.drain()
+    logger.info('Generated %d report cards in %.1fs (%.1f cards/s)',
+                stats.count, stats.elapsed, stats.per_second)
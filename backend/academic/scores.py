@@ -0,0 +1,111 @@
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from .models import Grade, StudentSubjectScore
+from .report_cards import bump_versions
+
+LAPSOS = (1, 2, 3)
+FIELDS = [f'{prefix}_{lapso}' for prefix in ('lapso', 'covered') for lapso in LAPSOS] + ['definitiva']
+PLACES = Decimal('0.000001')
+
+
+def compute_scores(grades):
+    """
+    Aggregates ``grades`` into {(student_id, subject_id): field values} with
+    one grouped query, using the same formula as the boletín.
+    """
+    rows = (
+        grades.values('student_id', 'evaluation__subject_id', 'evaluation__lapso')
+        .annotate(points=Sum(F('score') * F('evaluation__percentage') / 100),
+                  covered=Sum('evaluation__percentage'))
+        .order_by()
+    )
+    scores = defaultdict(lambda: {field: Decimal(0) for field in FIELDS})
+    for row in rows:
+        values = scores[(row['student_id'], row['evaluation__subject_id'])]
+        values[f"lapso_{row['evaluation__lapso']}"] = Decimal(row['points']).quantize(PLACES)
+        values[f"covered_{row['evaluation__lapso']}"] = row['covered']
+    for values in scores.values():
+        values['definitiva'] = (sum(values[f'lapso_{lapso}'] for lapso in LAPSOS) / 3).quantize(PLACES)
+    return scores
+
+
+def pairs_q(pairs, student='student_id', subject='subject_id'):
+    by_subject = defaultdict(set)
+    for student_id, subject_id in pairs:
+        by_subject[subject_id].add(student_id)
+    return reduce(or_, (Q(**{subject: subject_id, f'{student}__in': student_ids})
+                        for subject_id, student_ids in by_subject.items()))
+
+
+def refresh_scores(pairs):
+    """
+    Recomputes the StudentSubjectScore rows of the given (student_id,
+    subject_id) pairs from their grades only, so a changed grade costs a
+    handful of rows rather than a full rebuild.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    with transaction.atomic():
+        scores = compute_scores(Grade.objects.filter(pairs_q(pairs, subject='evaluation__subject_id')))
+        if scores:
+            StudentSubjectScore.objects.bulk_create(
+                [StudentSubjectScore(student_id=student_id, subject_id=subject_id, **values)
+                 for (student_id, subject_id), values in scores.items()],
+                update_conflicts=True,
+                unique_fields=['student', 'subject'],
+                update_fields=FIELDS + ['updated_at'],
+            )
+        gone = pairs - set(scores)
+        if gone:
+            StudentSubjectScore.objects.filter(pairs_q(gone)).delete()
+
+
+def schedule_refresh(pairs):
+    """
+    Refreshes the aggregates, then invalidates the affected report cards,
+    once the current transaction commits. Bumping after the refresh means a
+    new report card version never sees stale scores.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+
+    def run():
+        refresh_scores(pairs)
+        bump_versions(student_id for student_id, _subject_id in pairs)
+
+    transaction.on_commit(run)
+
+
+def rebuild_scores():
+    """Full recomputation; replaces the whole table in one transaction."""
+    scores = compute_scores(Grade.objects.all())
+    with transaction.atomic():
+        StudentSubjectScore.objects.all().delete()
+        StudentSubjectScore.objects.bulk_create(
+            [StudentSubjectScore(student_id=student_id, subject_id=subject_id, **values)
+             for (student_id, subject_id), values in scores.items()],
+            batch_size=2000,
+        )
+    return len(scores)
+
+
+def verify_scores():
+    """Returns the (student_id, subject_id) pairs whose stored row differs from a full recomputation."""
+    expected = compute_scores(Grade.objects.all())
+    stored = {
+        (row['student_id'], row['subject_id']): row
+        for row in StudentSubjectScore.objects.values('student_id', 'subject_id', *FIELDS).iterator()
+    }
+    mismatches = set(expected) ^ set(stored)
+    for pair in set(expected) & set(stored):
+        if any(expected[pair][field] != stored[pair][field] for field in FIELDS):
+            mismatches.add(pair)
+    return sorted(mismatches)
@@ -0,0 +1,123 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.versions import bump_on_commit
+from users.models import CustomUser
+
+from .models import Evaluation, Grade, Schedule, Student, Subject, Teacher
+from .report_cards import bump_versions
+from .scores import schedule_refresh
+from .timetable import invalidate_timetables
+
+
+def invalidate_report_cards(student_ids):
+    # Bump after commit so a concurrent download cannot cache the old data
+    # under the new version.
+    student_ids = list(student_ids)
+    if student_ids:
+        transaction.on_commit(lambda: bump_versions(student_ids))
+
+
+def started_by(origin, model):
+    # True when the delete was issued on this model (instance or queryset),
+    # not cascaded from a parent row.
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+def graded_students(**filters):
+    return Grade.objects.filter(**filters).values_list('student_id', flat=True).distinct()
+
+
+# Grade/Evaluation changes refresh the StudentSubjectScore aggregates and
+# then invalidate the report cards (see academic.scores.schedule_refresh).
+
+@receiver(pre_save, sender=Grade)
+def grade_moving(sender, instance, **kwargs):
+    # Remember the previous pair so moving a grade to another student or
+    # evaluation refreshes both.
+    instance._previous_pair = None
+    if instance.pk:
+        instance._previous_pair = (
+            Grade.objects.filter(pk=instance.pk).values_list('student_id', 'evaluation__subject_id').first()
+        )
+
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, **kwargs):
+    subject_id = Evaluation.objects.values_list('subject_id', flat=True).get(pk=instance.evaluation_id)
+    pairs = {(instance.student_id, subject_id), getattr(instance, '_previous_pair', None)} - {None}
+    schedule_refresh(list(pairs))
+
+
+@receiver(pre_delete, sender=Grade)
+def grade_deleted(sender, instance, origin=None, **kwargs):
+    # Cascades from Evaluation are refreshed in one go by evaluation_deleted;
+    # cascades from Student/Subject/users take the aggregate rows with them.
+    if not started_by(origin, Grade):
+        return
+    subject_id = Evaluation.objects.values_list('subject_id', flat=True).get(pk=instance.evaluation_id)
+    schedule_refresh([(instance.student_id, subject_id)])
+
+
+@receiver(pre_save, sender=Evaluation)
+def evaluation_moving(sender, instance, **kwargs):
+    # Remember the previous subject so moving an evaluation refreshes both.
+    instance._previous_subject_id = None
+    if instance.pk:
+        instance._previous_subject_id = (
+            Evaluation.objects.filter(pk=instance.pk).values_list('subject_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Evaluation)
+def evaluation_saved(sender, instance, created, **kwargs):
+    # Percentage or lapso edits change the score of everyone graded in it.
+    if created:
+        return
+    students = list(graded_students(evaluation=instance))
+    subjects = {instance.subject_id, getattr(instance, '_previous_subject_id', None)} - {None}
+    schedule_refresh([(student_id, subject_id) for student_id in students for subject_id in subjects])
+
+
+@receiver(pre_delete, sender=Evaluation)
+def evaluation_deleted(sender, instance, origin=None, **kwargs):
+    if not started_by(origin, Evaluation):
+        return
+    schedule_refresh([(student_id, instance.subject_id) for student_id in graded_students(evaluation=instance)])
+
+
+@receiver(post_save, sender=Subject)
+def subject_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    invalidate_report_cards(graded_students(evaluation__subject=instance))
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, **kwargs):
+    invalidate_report_cards([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Schedule)
+@receiver([post_save, post_delete], sender=Subject)
+@receiver([post_save, post_delete], sender=Teacher)
+def timetable_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_timetables)
+
+
+@receiver(post_save, sender=CustomUser)
+def teacher_renamed(sender, instance, created, update_fields=None, **kwargs):
+    # The grids show the teacher's name; login only touches last_login
+    if created or (update_fields is not None and set(update_fields) == {'last_login'}):
+        return
+    if Teacher.objects.filter(user=instance).exists():
+        transaction.on_commit(invalidate_timetables)
+
+
+@receiver([post_save, post_delete], sender=Schedule)
+@receiver([post_save, post_delete], sender=Subject)
+@receiver([post_save, post_delete], sender=Teacher)
+def reference_data_changed(sender, **kwargs):
+    # ETags/cached bodies of the subject and teacher lists (core.versions)
+    bump_on_commit(sender)
@@ -1,3 +1,539 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import zipfile
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from core.pagination import KeysetPagination
+from users.models import CustomUser
+from .models import Evaluation, Grade, Schedule, Student, StudentSubjectScore, Subject, Teacher
+from .report_cards import get_report_data
+from .scores import verify_scores
+
+
+def make_school(students=3):
+    """One section with a teacher, a subject, its schedule, an evaluation and graded students."""
+    admin = CustomUser.objects.create(username='admin', role='ADMINISTRADOR')
+    teacher_user = CustomUser.objects.create(username='V-1.000.000', role='DOCENTE', first_name='Ana')
+    teacher = Teacher.objects.create(user=teacher_user, specialty='Matemáticas')
+    subject = Subject.objects.create(name='Matemáticas', grade_level='1er Año', section='A', teacher=teacher)
+    Schedule.objects.create(subject=subject, day='Lunes', start_time=time(7), end_time=time(8), room='A-1')
+    Schedule.objects.create(subject=subject, day='Martes', start_time=time(7), end_time=time(8), room='A-1')
+    evaluation = Evaluation.objects.create(subject=subject, name='Parcial 1', percentage=Decimal('20'),
+                                           lapso=1, date=date(2026, 10, 1))
+    representative = CustomUser.objects.create(username='V-2.000.000', role='REPRESENTANTE')
+    for number in range(students):
+        student = Student.objects.create(
+            representative=representative, first_name=f'Estudiante {number}', last_name=f'Apellido {number}',
+            id_number=f'V-3.000.00{number}', birth_date=date(2012, 1, 1), current_grade='1er Año', section='A',
+        )
+        Grade.objects.create(student=student, evaluation=evaluation, score=Decimal('15'))
+    return admin, subject, evaluation
+
+
+@override_settings(STRICT_RELATED_LOADING=True)
+class ListQueryTests(APITestCase):
+    """
+    List endpoints render from what the view selects/prefetches: strict
+    loading turns any lazy relation load into an error, and the query count
+    doesn't grow with the number of rows.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin, self.subject, self.evaluation = make_school()
+        self.client.force_authenticate(self.admin)
+
+    def assertListQueries(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['results'])
+
+    def test_students(self):
+        self.assertListQueries('/api/students/', 1)
+
+    def test_teachers(self):
+        self.assertListQueries('/api/teachers/', 1)
+
+    def test_subjects(self):
+        self.assertListQueries('/api/subjects/', 2)
+
+    def test_evaluations(self):
+        self.assertListQueries('/api/evaluations/', 1)
+
+    def test_grades(self):
+        self.assertListQueries('/api/grades/', 1)
+
+    def test_schedules(self):
+        self.assertListQueries('/api/schedules/', 1)
+
+
+class CursorPaginationTests(APITestCase):
+    """students/ pages on (last_name, id) with opaque cursors (core.pagination.KeysetPagination)."""
+
+    def setUp(self):
+        admin, _subject, _evaluation = make_school(students=7)
+        self.client.force_authenticate(admin)
+
+    def walk(self, url, params=None):
+        pages = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            pages.append([student['id_number'] for student in body['results']])
+            url, params = body['next'], None
+        return pages
+
+    def test_next_links_cover_every_row_once(self):
+        pages = self.walk('/api/students/', {'page_size': 3})
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        expected = list(Student.objects.order_by('last_name', 'id').values_list('id_number', flat=True))
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get('/api/students/', {'page_size': 3}).json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def cursor(self, position):
+        payload = json.dumps({'p': position, 'r': 0}).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    def test_malformed_cursor_is_404(self):
+        for cursor in ('not-a-cursor', self.cursor(['Apellido 1']), self.cursor(['Apellido 1', 'abc'])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/students/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_unpaginated_opt_in_is_a_capped_plain_array(self):
+        expected = list(Student.objects.order_by('last_name', 'id').values_list('id_number', flat=True))
+        response = self.client.get('/api/students/', {'unpaginated': 1, 'page_size': 3})
+        self.assertEqual([student['id_number'] for student in response.json()], expected)
+        with mock.patch.object(KeysetPagination, 'max_unpaginated_rows', 5):
+            response = self.client.get('/api/students/', {'unpaginated': 'true'})
+        self.assertEqual([student['id_number'] for student in response.json()], expected[:5])
+
+
+class FilterTests(APITestCase):
+    def setUp(self):
+        admin, self.subject, self.evaluation = make_school(students=2)
+        self.other = Student.objects.create(representative=admin, first_name='Otro', last_name='Estudiante',
+                                            id_number='V-4.000.000', birth_date=date(2011, 1, 1),
+                                            current_grade='2do Año', section='B')
+        self.client.force_authenticate(admin)
+
+    def results(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_students_by_section(self):
+        self.assertEqual([s['id'] for s in self.results('/api/students/', grade='2do Año', section='B')],
+                         [self.other.pk])
+        self.assertEqual(len(self.results('/api/students/', grade='1er Año')), 2)
+
+    def test_grades_by_subject_and_lapso(self):
+        self.assertEqual(len(self.results('/api/grades/', subject_id=self.subject.pk, lapso='1')), 2)
+        self.assertEqual(self.results('/api/grades/', lapso='2'), [])
+
+    def test_invalid_values_are_400(self):
+        self.assertEqual(self.client.get('/api/grades/', {'lapso': '4'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/students/', {'representative': 'x'}).status_code, 400)
+
+
+class BulkGradeTests(APITestCase):
+    """evaluations/{id}/grades/bulk/: one upsert for the whole class."""
+
+    def setUp(self):
+        self.admin, self.subject, self.evaluation = make_school(students=2)
+        self.graded = list(Student.objects.order_by('id'))
+        self.new = Student.objects.create(representative=self.graded[0].representative, first_name='Nuevo',
+                                          last_name='Ingreso', id_number='V-3.100.000', birth_date=date(2012, 1, 1),
+                                          current_grade='1er Año', section='A')
+        self.url = f'/api/evaluations/{self.evaluation.pk}/grades/bulk/'
+        self.client.force_authenticate(self.admin)
+
+    def post(self, grades):
+        return self.client.post(self.url, {'grades': grades}, format='json')
+
+    def test_reports_created_updated_unchanged(self):
+        unchanged, updated = self.graded
+        response = self.post([
+            {'student': unchanged.pk, 'score': '15.00'},
+            {'student': updated.pk, 'score': '18.50'},
+            {'student': self.new.pk, 'score': '12'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        statuses = {row['student']: row['status'] for row in response.json()['results']}
+        self.assertEqual(statuses, {unchanged.pk: 'unchanged', updated.pk: 'updated', self.new.pk: 'created'})
+        scores = dict(Grade.objects.filter(evaluation=self.evaluation).values_list('student_id', 'score'))
+        self.assertEqual(scores, {unchanged.pk: Decimal('15'), updated.pk: Decimal('18.5'), self.new.pk: Decimal('12')})
+
+    def test_rejects_students_outside_the_section_and_repeats(self):
+        outsider = Student.objects.create(representative=self.new.representative, first_name='Otro',
+                                          last_name='Salón', id_number='V-3.200.000', birth_date=date(2012, 1, 1),
+                                          current_grade='1er Año', section='B')
+        response = self.post([
+            {'student': self.new.pk, 'score': '10'},
+            {'student': self.new.pk, 'score': '11'},
+            {'student': outsider.pk, 'score': '12'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['grades']
+        self.assertEqual(errors[0], {})
+        self.assertIn('student', errors[1])
+        self.assertIn('student', errors[2])
+        self.assertFalse(Grade.objects.filter(student=self.new).exists())
+
+    def test_only_the_subjects_teacher_or_an_admin(self):
+        other = CustomUser.objects.create(username='V-1.100.000', role='DOCENTE')
+        Teacher.objects.create(user=other, specialty='Historia')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.post([{'student': self.new.pk, 'score': '10'}]).status_code, 403)
+        self.client.force_authenticate(self.subject.teacher.user)
+        self.assertEqual(self.post([{'student': self.new.pk, 'score': '10'}]).status_code, 200)
+
+
+class ScoreMaintenanceTests(TestCase):
+    """StudentSubjectScore follows Grade/Evaluation writes pair by pair (academic.scores)."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            _admin, self.subject, self.evaluation = make_school(students=1)
+        self.student = Student.objects.get()
+
+    def score(self, subject=None):
+        return StudentSubjectScore.objects.filter(student=self.student, subject=subject or self.subject).first()
+
+    def test_grade_save_creates_the_row(self):
+        # 15 points at 20%
+        score = self.score()
+        self.assertEqual((score.lapso_1, score.covered_1), (Decimal('3'), Decimal('20')))
+        self.assertEqual(score.definitiva, Decimal('1'))
+
+    def test_grade_and_evaluation_edits_refresh_it(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            grade = Grade.objects.get(student=self.student)
+            grade.score = Decimal('20')
+            grade.save()
+        self.assertEqual(self.score().lapso_1, Decimal('4'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evaluation.percentage = Decimal('50')
+            self.evaluation.lapso = 2
+            self.evaluation.save()
+        score = self.score()
+        self.assertEqual((score.lapso_1, score.lapso_2, score.covered_2), (0, Decimal('10'), Decimal('50')))
+        self.assertEqual(verify_scores(), [])
+
+    def test_moving_an_evaluation_refreshes_both_subjects(self):
+        other = Subject.objects.create(name='Historia', grade_level='1er Año', section='A')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evaluation.subject = other
+            self.evaluation.save()
+        self.assertIsNone(self.score())
+        self.assertEqual(self.score(other).lapso_1, Decimal('3'))
+        self.assertEqual(verify_scores(), [])
+
+    def test_moving_a_grade_refreshes_both_pairs(self):
+        other = Subject.objects.create(name='Historia', grade_level='1er Año', section='A')
+        evaluation = Evaluation.objects.create(subject=other, name='Exposición', percentage=Decimal('20'),
+                                               lapso=1, date=date(2026, 10, 2))
+        student = Student.objects.create(representative=self.student.representative, first_name='Otro',
+                                         last_name='Estudiante', id_number='V-3.100.000',
+                                         birth_date=date(2012, 1, 1), current_grade='1er Año', section='A')
+        with self.captureOnCommitCallbacks(execute=True):
+            grade = Grade.objects.get(student=self.student)
+            grade.student, grade.evaluation = student, evaluation
+            grade.save()
+        self.assertIsNone(self.score())
+        self.assertEqual(StudentSubjectScore.objects.get(student=student, subject=other).lapso_1, Decimal('3'))
+        self.assertEqual(verify_scores(), [])
+
+    def test_deletes_remove_the_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.get(student=self.student).delete()
+        self.assertIsNone(self.score())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(student=self.student, evaluation=self.evaluation, score=Decimal('10'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evaluation.delete()
+        self.assertIsNone(self.score())
+        self.assertEqual(verify_scores(), [])
+
+
+class ScheduleClashTests(APITestCase):
+    """schedules/bulk/: section, teacher and room clashes, against stored rows and within the batch."""
+
+    def setUp(self):
+        # Stored: Matemáticas (1er Año A, teacher Ana) on Monday 07:00-08:00 in A-1
+        self.admin, self.subject, _evaluation = make_school(students=0)
+        teacher = self.subject.teacher
+        self.same_section = Subject.objects.create(name='Historia', grade_level='1er Año', section='A')
+        self.same_teacher = Subject.objects.create(name='Física', grade_level='2do Año', section='B', teacher=teacher)
+        self.elsewhere = Subject.objects.create(name='Arte', grade_level='3er Año', section='C')
+        self.client.force_authenticate(self.admin)
+
+    def row(self, subject, start, end, room='', day='Lunes'):
+        return {'subject': subject.pk, 'day': day, 'start_time': start, 'end_time': end, 'room': room}
+
+    def post(self, rows, dry_run=False):
+        return self.client.post('/api/schedules/bulk/', {'schedules': rows, 'dry_run': dry_run}, format='json')
+
+    def test_clashes(self):
+        rows = [
+            self.row(self.same_section, '07:30', '08:30'),
+            self.row(self.same_teacher, '07:00', '07:45'),
+            self.row(self.elsewhere, '07:15', '07:30', room='A-1'),
+            self.row(self.elsewhere, '08:00', '09:00', room='A-1'),  # starts as the stored one ends
+            self.row(self.elsewhere, '08:30', '09:30'),  # overlaps row 3
+            self.row(self.same_section, '07:00', '08:00', day='Miércoles'),
+        ]
+        report = self.post(rows).json()
+        self.assertEqual(report['accepted'], [3, 5])
+        self.assertEqual([(c['row'], c['type']) for c in report['conflicts']],
+                         [(0, 'section'), (1, 'teacher'), (2, 'room'), (4, 'section')])
+        self.assertEqual(report['conflicts'][-1]['with'], {'row': 3, 'subject': self.elsewhere.pk})
+        self.assertEqual(Schedule.objects.filter(pk__in=report['created']).count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        response = self.post([self.row(self.elsewhere, '10:00', '11:00')], dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['accepted'], [0])
+        self.assertFalse(Schedule.objects.filter(subject=self.elsewhere).exists())
+
+    def test_rejects_unknown_days_and_non_staff(self):
+        self.assertEqual(self.post([self.row(self.elsewhere, '10:00', '11:00', day='Domingo')]).status_code, 400)
+        self.client.force_authenticate(self.subject.teacher.user)
+        self.assertEqual(self.post([self.row(self.elsewhere, '10:00', '11:00')]).status_code, 403)
+
+
+class SubjectSummaryTests(APITestCase):
+    """subjects/{id}/summary/: the section's lapso scores, for staff and the subject's teacher."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin, self.subject, _evaluation = make_school(students=2)
+        self.url = f'/api/subjects/{self.subject.pk}/summary/'
+
+    def test_teacher_reads_the_section(self):
+        self.client.force_authenticate(self.subject.teacher.user)
+        response = self.client.get(self.url, {'lapso': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['score'] for row in response.json()['students']], ['3.00', '3.00'])
+        self.assertEqual(self.client.get(self.url, {'lapso': 4}).status_code, 400)
+
+    def test_representatives_and_anonymous_are_refused(self):
+        self.client.force_authenticate(Student.objects.first().representative)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class TimetableTests(APITestCase):
+    """students/{id}/timetable/: the section's grid, cached until a schedule, subject or teacher changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin, self.subject, _evaluation = make_school(students=1)
+        self.url = f'/api/students/{Student.objects.get().pk}/timetable/'
+        self.client.force_authenticate(self.admin)
+
+    def teachers(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [cell['teacher'] for row in response.json()['grid'] for cell in row if cell]
+
+    def test_grid(self):
+        body = self.client.get(self.url).json()
+        self.assertEqual(body['days'], ['Lunes', 'Martes'])
+        self.assertEqual(body['slots'], [{'start': '07:00', 'end': '08:00'}])
+        self.assertEqual(body['grid'][0][0]['subject'], 'Matemáticas')
+        with self.assertNumQueries(1):  # the student; the grid comes from the cache
+            self.client.get(self.url)
+
+    def test_schedule_changes_and_teacher_renames_invalidate_it(self):
+        self.assertEqual(self.teachers(), ['Ana', 'Ana'])
+        user = self.subject.teacher.user
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name, user.last_name = 'Ana María', 'Rojas'
+            user.save()
+        self.assertEqual(self.teachers(), ['Ana María Rojas', 'Ana María Rojas'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.filter(day='Martes').delete()
+        self.assertEqual(self.teachers(), ['Ana María Rojas'])
+
+
+class ReportCardTests(APITestCase):
+    """students/{id}/report_card/: cached per grade version, revalidated with its ETag."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin, self.subject, self.evaluation = make_school(students=1)
+        self.student = Student.objects.get()
+        self.url = f'/api/students/{self.student.pk}/report_card/'
+        self.client.force_authenticate(self.admin)
+
+    def test_repeat_downloads_are_cached_and_revalidated(self):
+        with mock.patch('academic.report_cards.render_report_card', return_value=b'%PDF-1.4') as render:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+        self.assertEqual((first.status_code, first['Content-Type']), (200, 'application/pdf'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        render.assert_called_once()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual((response.status_code, response['ETag']), (304, first['ETag']))
+
+    def test_grade_changes_give_a_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            grade = Grade.objects.get(student=self.student)
+            grade.score = Decimal('20')
+            grade.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+
+class ReportCardBatchTests(APITestCase):
+    """students/report_cards/: every listed boletín in one streamed ZIP, rendered in a process pool."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin, self.subject, _evaluation = make_school(students=3)
+        self.client.force_authenticate(self.admin)
+
+    def test_zip_has_one_pdf_per_student(self):
+        response = self.client.get('/api/students/report_cards/')
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'application/zip'))
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            names = archive.namelist()
+            self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in names))
+        self.assertEqual(names, [f'1er_Año_A/boletin_V-3.000.00{number}.pdf' for number in range(3)])
+
+    def test_administrators_only(self):
+        self.client.force_authenticate(self.subject.teacher.user)
+        self.assertEqual(self.client.get('/api/students/report_cards/').status_code, 403)
+
+    def test_same_name_subjects_add_up(self):
+        other = Subject.objects.create(name='Matemáticas', grade_level='1er Año', section='A')
+        evaluation = Evaluation.objects.create(subject=other, name='Taller', percentage=Decimal('20'),
+                                               lapso=1, date=date(2026, 10, 2))
+        student = Student.objects.order_by('id').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(student=student, evaluation=evaluation, score=Decimal('10'))
+        self.assertEqual(get_report_data(student.pk), {'Matemáticas': {1: Decimal('5'), 2: 0, 3: 0}})
+
+
+class EnrollmentImportTests(APITestCase):
+    """students/import/: families and students from a spreadsheet, row errors reported, bulk inserts."""
+
+    HEADER = 'cedula_representante;nombres_representante;apellidos_representante;clave;' \
+             'cedula_estudiante;nombres;apellidos;fecha_nacimiento;grado;seccion'
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create(username='admin', role='ADMINISTRADOR')
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, *rows, dry_run=False, encoding='utf-8'):
+        content = '\r\n'.join((self.HEADER,) + rows).encode(encoding)
+        return self.client.post('/api/students/import/', {
+            'file': SimpleUploadedFile('inscripciones.csv', content, content_type='text/csv'), 'dry_run': dry_run,
+        }, format='multipart')
+
+    def test_creates_families_and_reports_row_errors(self):
+        response = self.upload(
+            'v12345678;María;Peña;;V-30.000.001;José;Peña;2012-05-01;1er Año;A',
+            'V-12.345.678;María;Peña;;30000002;Ana;Peña;01/09/2013;1er Año;A',
+            '20111222;Luis;Díaz;secreta1;V-30.000.003;Pedro;Díaz;2012-01-01;2do Año;B',
+            '20111222;Luis;Díaz;secreta1;V-30.000.001;Otro;Díaz;2012-01-01;2do Año;B',
+            'abc;Rosa;Gil;;V-30.000.004;Eva;Gil;2012-13-40;1er Año;A',
+            encoding='cp1252',
+        )
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['representatives_created'], report['students_created']), (2, 3))
+        self.assertEqual([(error['row'], error['field']) for error in report['errors']],
+                         [(5, 'cedula'), (6, 'rep_cedula'), (6, 'birth_date')])
+
+        maria = CustomUser.objects.get(username='V-12.345.678')
+        self.assertEqual(sorted(maria.students.values_list('first_name', flat=True)), ['Ana', 'José'])
+        # Only generated passwords are handed back
+        [credentials] = report['credentials']
+        self.assertEqual((credentials['row'], credentials['username']), (2, 'V-12.345.678'))
+        self.assertTrue(maria.check_password(credentials['password']))
+        self.assertTrue(CustomUser.objects.get(username='V-20.111.222').check_password('secreta1'))
+
+    def test_existing_representatives_get_the_new_children(self):
+        representative = CustomUser.objects.create(username='V-12.345.678', role='REPRESENTANTE')
+        report = self.upload('12345678;María;Peña;;V-30.000.001;José;Peña;2012-05-01;1er Año;A').json()
+        self.assertEqual((report['representatives_created'], report['credentials']), (0, []))
+        self.assertEqual(Student.objects.get().representative, representative)
+
+    def test_dry_run_writes_nothing(self):
+        response = self.upload('12345678;María;Peña;;V-30.000.001;José;Peña;2012-05-01;1er Año;A', dry_run=True)
+        self.assertEqual((response.status_code, response.json()['students_created']), (200, 1))
+        self.assertFalse(Student.objects.exists())
+
+    def test_office_staff_only(self):
+        self.client.force_authenticate(CustomUser.objects.create(username='docente', role='DOCENTE'))
+        self.assertEqual(self.upload().status_code, 403)
+
+
+class VersionedListTests(APITestCase):
+    """subjects/ and teachers/: ETag from the models' version tokens, cached bodies, 304 without queries."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin, self.subject, _evaluation = make_school(students=0)
+        self.client.force_authenticate(self.admin)
+
+    def test_unchanged_lists_are_304_or_served_from_the_cache(self):
+        first = self.client.get('/api/subjects/')
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+            self.assertEqual(self.client.get('/api/subjects/').content, first.content)
+        self.assertNotEqual(self.client.get('/api/subjects/', {'page_size': 1})['ETag'], first['ETag'])
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get('/api/subjects/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.filter(day='Martes').update(room='B-2')  # update() sends no signals
+        self.assertEqual(self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.get(day='Martes').delete()
+        response = self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results'][0]['schedules']), 1)
+
+        etag = self.client.get('/api/teachers/')['ETag']
+        user = self.subject.teacher.user
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = 'Ana María'
+            user.save()
+        self.assertEqual(self.client.get('/api/teachers/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_teachers_get_their_own_cached_subject_list(self):
+        Subject.objects.create(name='Historia', grade_level='1er Año', section='A')
+        self.assertEqual(len(self.client.get('/api/subjects/').json()['results']), 2)
+        self.client.force_authenticate(self.subject.teacher.user)
+        self.assertEqual([row['name'] for row in self.client.get('/api/subjects/').json()['results']],
+                         ['Matemáticas'])
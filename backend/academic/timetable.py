@@ -0,0 +1,187 @@
+import hashlib
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Schedule
+
+
+def minutes(value):
+    return value.hour * 60 + value.minute
+
+
+class IntervalIndex:
+    """
+    Half-open [start, end) intervals grouped by key (e.g. section + day),
+    kept sorted by start. Overlap queries only look at intervals starting in
+    (start - longest interval, end), so they stay cheap however many rows a
+    key holds.
+    """
+
+    def __init__(self):
+        self._items = defaultdict(list)
+        self._longest = defaultdict(int)
+        self._seq = 0
+
+    def add(self, key, start, end, ref):
+        # seq breaks ties so refs themselves are never compared
+        self._seq += 1
+        insort(self._items[key], (start, end, self._seq, ref))
+        self._longest[key] = max(self._longest[key], end - start)
+
+    def overlapping(self, key, start, end):
+        items = self._items.get(key)
+        if not items:
+            return []
+        lo = bisect_right(items, (start - self._longest[key], float('inf')))
+        hi = bisect_left(items, (end,))
+        return [ref for _start, item_end, _seq, ref in items[lo:hi] if item_end > start]
+
+
+def conflict_keys(day, subject, room):
+    # A slot clashes with any other slot of the same section, teacher or room
+    keys = [('section', subject.grade_level, subject.section, day)]
+    if subject.teacher_id:
+        keys.append(('teacher', subject.teacher_id, day))
+    if room:
+        keys.append(('room', room, day))
+    return keys
+
+
+def load_existing(rows, subjects):
+    """Every stored schedule that could clash with ``rows``, in one query."""
+    days = {row['day'] for row in rows}
+    sections = {(subject.grade_level, subject.section) for subject in subjects.values()}
+    teachers = {subject.teacher_id for subject in subjects.values() if subject.teacher_id}
+    rooms = {row['room'] for row in rows if row.get('room')}
+
+    scope = [Q(subject__grade_level=grade, subject__section=section) for grade, section in sections]
+    if teachers:
+        scope.append(Q(subject__teacher_id__in=teachers))
+    if rooms:
+        scope.append(Q(room__in=rooms))
+    return Schedule.objects.filter(reduce(or_, scope), day__in=days).select_related('subject')
+
+
+def check_schedules(rows, subjects):
+    """
+    Checks the new ``rows`` (validated dicts with subject id, day, times,
+    room) against the stored timetable and against each other, in order.
+    Returns (accepted row indexes, conflicts); a row that clashes is not
+    added to the index, so later rows are only checked against accepted ones.
+    """
+    index = IntervalIndex()
+    for schedule in load_existing(rows, subjects):
+        for key in conflict_keys(schedule.day, schedule.subject, schedule.room):
+            index.add(key, minutes(schedule.start_time), minutes(schedule.end_time),
+                      {'schedule': schedule.id, 'subject': schedule.subject_id})
+
+    accepted, conflicts = [], []
+    for i, row in enumerate(rows):
+        subject = subjects[row['subject']]
+        start, end = minutes(row['start_time']), minutes(row['end_time'])
+        keys = conflict_keys(row['day'], subject, row.get('room'))
+
+        clashes = [
+            {'row': i, 'type': key[0], 'with': ref}
+            for key in keys for ref in index.overlapping(key, start, end)
+        ]
+        if clashes:
+            conflicts.extend(clashes)
+            continue
+        accepted.append(i)
+        for key in keys:
+            index.add(key, start, end, {'row': i, 'subject': subject.id})
+    return accepted, conflicts
+
+
+# Per-section weekly grid, cached
+
+DAYS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+GENERATION_KEY = 'timetable:generation'
+GRID_KEY = 'timetable:{}:{}'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_timetables():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, None)
+
+
+def section_schedules(grade_level, section):
+    return (
+        Schedule.objects.filter(subject__grade_level=grade_level, subject__section=section)
+        .select_related('subject__teacher__user')
+    )
+
+
+def build_grid(grade_level, section, schedules=None):
+    """
+    Day x time-slot grid for one section, from a single query:
+    ``grid[slot][day]`` is None or {subject, subject_id, teacher, room}.
+    """
+    if schedules is None:
+        schedules = section_schedules(grade_level, section)
+    cells = {}
+    for schedule in schedules:
+        teacher = schedule.subject.teacher
+        cells[(schedule.start_time, schedule.end_time, schedule.day)] = {
+            'subject': schedule.subject.name,
+            'subject_id': schedule.subject_id,
+            'teacher': teacher.user.get_full_name() if teacher else None,
+            'room': schedule.room,
+        }
+
+    used_days = {day for _start, _end, day in cells}
+    days = [day for day in DAYS if day in used_days] + sorted(used_days - set(DAYS))
+    slots = sorted({(start, end) for start, end, _day in cells})
+    return {
+        'grade_level': grade_level,
+        'section': section,
+        'days': days,
+        'slots': [{'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M')} for start, end in slots],
+        'grid': [[cells.get((start, end, day)) for day in days] for start, end in slots],
+    }
+
+
+def grid_key(generation, grade_level, section):
+    # grade names contain spaces; hash them to keep the key backend-safe
+    section_id = hashlib.sha1(f'{grade_level}\x00{section}'.encode()).hexdigest()
+    return GRID_KEY.format(generation, section_id)
+
+
+def get_section_timetable(grade_level, section):
+    key = grid_key(get_generation(), grade_level, section)
+    grid = cache.get(key)
+    if grid is None:
+        grid = build_grid(grade_level, section)
+        cache.set(key, grid, 60 * 60 * 24)
+    return grid
+
+
+async def aget_section_timetable(grade_level, section):
+    # get_section_timetable() for async views: async cache and ORM calls
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, 1, None)
+        generation = await cache.aget(GENERATION_KEY)
+    key = grid_key(generation, grade_level, section)
+    grid = await cache.aget(key)
+    if grid is None:
+        schedules = [schedule async for schedule in section_schedules(grade_level, section)]
+        grid = build_grid(grade_level, section, schedules)
+        await cache.aset(key, grid, 60 * 60 * 24)
+    return grid
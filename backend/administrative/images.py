@@ -0,0 +1,117 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from PIL import Image, ImageOps
+
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+# kind: (model field, bounding box, WebP quality)
+DERIVATIVES = {
+    'thumbnail': ('proof_thumbnail', (240, 240), 70),
+    'preview': ('proof_preview', (1280, 1280), 80),
+}
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='proof-derivatives')
+_pending = set()
+_lock = threading.Lock()
+
+
+def derivative_name(source_name, kind):
+    # Derived from the original's name, so a replaced proof gets new files
+    stem = os.path.basename(source_name).replace('.', '_')
+    return f'payments/derivatives/{stem}_{kind}.webp'
+
+
+def is_current(payment, kind):
+    field = getattr(payment, DERIVATIVES[kind][0])
+    return bool(payment.proof_image) and field.name == derivative_name(payment.proof_image.name, kind)
+
+
+def needs_derivatives(payment):
+    return (bool(payment.proof_image) and payment.derivatives_failed != payment.proof_image.name
+            and not all(is_current(payment, kind) for kind in DERIVATIVES))
+
+
+def render(image, box, quality):
+    copy = image.copy()
+    copy.thumbnail(box, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    copy.save(output, 'WEBP', quality=quality, method=4)
+    return output.getvalue()
+
+
+def generate_derivatives(payment):
+    """
+    Writes the thumbnail and preview of ``payment.proof_image`` and stores
+    their names. The original is decoded once; for JPEGs, at a reduced scale
+    close to the preview size.
+    """
+    with payment.proof_image.open('rb') as source:
+        image = Image.open(source)
+        largest = max((box for _field, box, _quality in DERIVATIVES.values()), key=lambda box: box[0] * box[1])
+        image.draft('RGB', largest)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        names = {}
+        for kind, (field_name, box, quality) in DERIVATIVES.items():
+            field = getattr(payment, field_name)
+            name = derivative_name(payment.proof_image.name, kind)
+            if field.storage.exists(name):
+                field.storage.delete(name)
+            field.save(os.path.basename(name), ContentFile(render(image, box, quality)), save=False)
+            names[field_name] = field.name
+
+    # Only if the proof wasn't replaced meanwhile; update() also skips signals
+    Payment.objects.filter(pk=payment.pk, proof_image=payment.proof_image.name).update(derivatives_failed='', **names)
+
+
+def mark_failed(payment):
+    Payment.objects.filter(pk=payment.pk, proof_image=payment.proof_image.name).update(
+        derivatives_failed=payment.proof_image.name)
+
+
+def schedule_derivatives(payment_id, background=False):
+    """
+    Generates the derivatives in the background; repeated calls for the same
+    payment are merged. Inline when PAYMENT_PROOF_DERIVATIVES_ASYNC is off,
+    unless ``background`` (callers on a read path never render).
+    """
+    if not background and not getattr(settings, 'PAYMENT_PROOF_DERIVATIVES_ASYNC', True):
+        _generate(payment_id)
+        return
+    with _lock:
+        if payment_id in _pending:
+            return
+        _pending.add(payment_id)
+    _executor.submit(_generate_in_thread, payment_id)
+
+
+def _generate(payment_id):
+    payment = Payment.objects.filter(pk=payment_id).first()
+    if payment is None or not needs_derivatives(payment):
+        return
+    try:
+        generate_derivatives(payment)
+    except Exception:
+        mark_failed(payment)
+        raise
+
+
+def _generate_in_thread(payment_id):
+    try:
+        _generate(payment_id)
+    except Exception:
+        logger.exception('Could not generate proof derivatives for payment %s', payment_id)
+    finally:
+        with _lock:
+            _pending.discard(payment_id)
+        connections.close_all()
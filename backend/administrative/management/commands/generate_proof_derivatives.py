@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from administrative.images import generate_derivatives, mark_failed, needs_derivatives
+from administrative.models import Payment
+
+
+class Command(BaseCommand):
+    help = 'Generates the thumbnail and preview of every payment proof that lacks them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Also retry the proofs whose derivatives failed before')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for payment in Payment.objects.exclude(proof_image='').iterator(chunk_size=500):
+            if options['retry_failed']:
+                payment.derivatives_failed = ''
+            if not needs_derivatives(payment):
+                continue
+            try:
+                generate_derivatives(payment)
+                done += 1
+            except Exception as exc:
+                mark_failed(payment)
+                failed += 1
+                self.stderr.write(f'Pago {payment.pk}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'{done} comprobantes procesados, {failed} con error'))
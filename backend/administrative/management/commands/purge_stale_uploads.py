@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from administrative.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes chunked proof uploads that were never finished or used (run it daily, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'{purge_stale_uploads()} cargas eliminadas'))
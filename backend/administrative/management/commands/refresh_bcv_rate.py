@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from administrative.rates import RateService
+from core.checks import process_local_caches
+
+
+class Command(BaseCommand):
+    help = 'Fetches the BCV exchange rate into the cache and the ExchangeRate history (for cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Fetch from this URL instead of settings.BCV_URL (e.g. a local stub)')
+
+    def handle(self, *args, **options):
+        service = RateService(url=options['url'])
+        rate = service.refresh(wait=True)
+        if rate is None:
+            raise CommandError('No se pudo obtener la tasa del BCV')
+        self.stdout.write(self.style.SUCCESS(f'Tasa BCV: {rate} Bs/USD'))
+        if 'default' in process_local_caches():
+            # The rate only reached this process's cache; the web workers
+            # pick it up from the ExchangeRate history until they refresh
+            self.stderr.write(self.style.WARNING(
+                'CACHES["default"] es local a este proceso; configure REDIS_URL para que '
+                'el servidor use la tasa recién obtenida'
+            ))
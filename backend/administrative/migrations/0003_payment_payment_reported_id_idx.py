@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0006_student_student_lastname_id_idx'),
+        ('administrative', '0002_paymentconcept_payment_payment_concept'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['date_reported', 'id'], name='payment_reported_id_idx'),
+        ),
+    ]
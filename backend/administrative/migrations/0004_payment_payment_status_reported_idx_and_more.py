@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0007_student_student_grade_section_idx'),
+        ('administrative', '0003_payment_payment_reported_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'date_reported', 'id'], name='payment_status_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['student', 'status'], name='payment_student_status_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrative', '0004_payment_payment_status_reported_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='proof_preview',
+            field=models.ImageField(blank=True, editable=False, upload_to='payments/derivatives/'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='payments/derivatives/'),
+        ),
+    ]
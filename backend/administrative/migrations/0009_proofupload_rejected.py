@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrative', '0008_payment_derivatives_failed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='proofupload',
+            name='status',
+            field=models.CharField(choices=[('UPLOADING', 'Subiendo'), ('COMPLETE', 'Completo'), ('USED', 'Usado'), ('REJECTED', 'Rechazado')], default='UPLOADING', max_length=20),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 
@@ -35,6 +37,12 @@ class Payment(models.Model):
     concept = models.CharField(max_length=200) 
     reference_number = models.CharField(max_length=50)
     proof_image = models.ImageField(upload_to='payments/')
+    # Downscaled WebP copies of proof_image (administrative.images)
+    proof_thumbnail = models.ImageField(upload_to='payments/derivatives/', blank=True, editable=False)
+    proof_preview = models.ImageField(upload_to='payments/derivatives/', blank=True, editable=False)
+    # proof_image name whose derivatives could not be made (missing or broken
+    # file); not retried until the proof is replaced
+    derivatives_failed = models.CharField(max_length=100, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     admin_note = models.TextField(blank=True, null=True)
     
@@ -43,5 +51,44 @@ class Payment(models.Model):
     billing_id = models.CharField(max_length=50, blank=True) # RIF
     billing_address = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order for payments/ (newest first, scanned backwards)
+            models.Index(fields=['date_reported', 'id'], name='payment_reported_id_idx'),
+            # payments/?status=PENDING: the verification queue is one range scan
+            models.Index(fields=['status', 'date_reported', 'id'], name='payment_status_reported_idx'),
+            # payments/?student_id=...&status=...
+            models.Index(fields=['student', 'status'], name='payment_student_status_idx'),
+            # Bank reconciliation: reused/duplicate reference lookups
+            models.Index(fields=['reference_number'], name='payment_reference_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student} - {self.amount_usd}$ ({self.status})"
+
+
+class ProofUpload(models.Model):
+    """
+    A payment proof uploaded in chunks (administrative.uploads). Once
+    committed, a Payment is created from it and it points to that payment.
+    """
+    STATUS_CHOICES = (
+        ('UPLOADING', 'Subiendo'),
+        ('COMPLETE', 'Completo'),
+        ('USED', 'Usado'),
+        ('REJECTED', 'Rechazado'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='proof_uploads')
+    filename = models.CharField(max_length=200)
+    size = models.PositiveIntegerField()
+    offset = models.PositiveIntegerField(default=0)
+    checksum = models.CharField(max_length=64)  # sha256, hex
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='UPLOADING')
+    payment = models.OneToOneField(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
@@ -0,0 +1,244 @@
+import logging
+import threading
+import time
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .models import ExchangeRate
+from .utils import BCV_URL, aget_bcv_rate, get_bcv_rate
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'bcv:rate'
+LOCK_KEY = 'bcv:refresh-lock'
+# Minimum spacing between background refresh attempts of a stale rate
+RETRY_SECONDS = 30
+
+
+class CircuitBreaker:
+    """
+    Stops calling BCV after ``threshold`` consecutive failures. Once
+    ``cooldown`` seconds have passed a single trial call is let through; its
+    result closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold=3, cooldown=300):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return 'open'
+        return 'half-open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class RateService:
+    """
+    Serves the BCV rate from the cache and refreshes it off the request path.
+
+    - Fresh cached rate: returned as is.
+    - Stale cached rate: returned immediately, refresh started in background.
+    - Nothing cached: callers wait for one shared fetch (single-flight),
+      bounded by the HTTP timeout, then fall back to the last stored rate.
+
+    Only one process fetches at a time (cache lock), and a circuit breaker
+    keeps an unreachable BCV from costing a timeout per refresh.
+    """
+
+    def __init__(self, url=None, refresh_interval=None, timeout=None, breaker=None):
+        self.url = url or getattr(settings, 'BCV_URL', BCV_URL)
+        self.refresh_interval = refresh_interval or getattr(settings, 'BCV_REFRESH_SECONDS', 1800)
+        self.timeout = timeout or getattr(settings, 'BCV_TIMEOUT', 10)
+        self.breaker = breaker or CircuitBreaker(
+            threshold=getattr(settings, 'BCV_BREAKER_THRESHOLD', 3),
+            cooldown=getattr(settings, 'BCV_BREAKER_COOLDOWN', 300),
+        )
+        self._lock = threading.Lock()
+        self._inflight = None
+        self._scheduler = None
+        self._last_attempt = 0.0
+
+    def current(self):
+        """Returns the rate as a string, or None if none was ever known."""
+        self.ensure_scheduler()
+        entry = cache.get(CACHE_KEY)
+        if entry is not None:
+            if time.time() - entry['fetched_at'] > self.refresh_interval:
+                self.refresh_async()
+            return entry['rate']
+
+        rate = self.refresh(wait=True)
+        if rate is not None:
+            return rate
+        latest = ExchangeRate.objects.order_by('-date', '-id').first()
+        return str(latest.rate) if latest else None
+
+    def refresh(self, wait=False):
+        """
+        Fetches the rate unless a fetch is already running, in which case it
+        waits for that one (``wait=True``) or returns straight away.
+        """
+        inflight, leader = self._join()
+        if not leader:
+            if wait:
+                inflight.wait(self.timeout + 1)
+            entry = cache.get(CACHE_KEY)
+            return entry['rate'] if entry else None
+
+        self._last_attempt = time.monotonic()
+        try:
+            return self._fetch()
+        finally:
+            self._leave(inflight)
+
+    async def acurrent(self):
+        """current() for async views: no thread waits on BCV or the database."""
+        self.ensure_scheduler()
+        entry = await cache.aget(CACHE_KEY)
+        if entry is not None:
+            if time.time() - entry['fetched_at'] > self.refresh_interval:
+                self.refresh_async()
+            return entry['rate']
+
+        rate = await self.arefresh()
+        if rate is not None:
+            return rate
+        latest = await ExchangeRate.objects.order_by('-date', '-id').afirst()
+        return str(latest.rate) if latest else None
+
+    async def arefresh(self):
+        # Shares the single-flight with refresh(): threads and coroutines
+        # wait for whichever fetch started first.
+        inflight, leader = self._join()
+        if not leader:
+            await sync_to_async(inflight.wait, thread_sensitive=False)(self.timeout + 1)
+            entry = await cache.aget(CACHE_KEY)
+            return entry['rate'] if entry else None
+
+        self._last_attempt = time.monotonic()
+        try:
+            return await self._afetch()
+        finally:
+            self._leave(inflight)
+
+    def _join(self):
+        with self._lock:
+            if self._inflight is None:
+                self._inflight = threading.Event()
+                return self._inflight, True
+            return self._inflight, False
+
+    def _leave(self, inflight):
+        with self._lock:
+            self._inflight = None
+        inflight.set()
+
+    def refresh_async(self):
+        if self._inflight is not None or self.breaker.state == 'open':
+            return
+        if time.monotonic() - self._last_attempt < RETRY_SECONDS:
+            return
+        self._last_attempt = time.monotonic()
+        threading.Thread(target=self._refresh_in_thread, daemon=True, name='bcv-refresh').start()
+
+    def ensure_scheduler(self):
+        if self._scheduler is not None or not getattr(settings, 'BCV_BACKGROUND_REFRESH', True):
+            return
+        with self._lock:
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(target=self._schedule, daemon=True, name='bcv-scheduler')
+                self._scheduler.start()
+
+    def _schedule(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            self._refresh_in_thread()
+
+    def _refresh_in_thread(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception('BCV rate refresh failed')
+        finally:
+            # Background threads get their own DB connections; don't leak them.
+            connections.close_all()
+
+    def _fetch(self):
+        # Cross-process single-flight: whoever adds the lock fetches. The lock
+        # comes before the breaker, so a half-open trial is only started by a
+        # caller that will actually fetch and record its result.
+        if not cache.add(LOCK_KEY, 1, self.timeout + 5):
+            return None
+        try:
+            if not self.breaker.allow():
+                logger.info('BCV circuit breaker %s, skipping fetch', self.breaker.state)
+                return None
+            rate_value = get_bcv_rate(self.url, timeout=self.timeout)
+        finally:
+            cache.delete(LOCK_KEY)
+        return self._store(rate_value)
+
+    async def _afetch(self):
+        if not await cache.aadd(LOCK_KEY, 1, self.timeout + 5):
+            return None
+        try:
+            if not self.breaker.allow():
+                logger.info('BCV circuit breaker %s, skipping fetch', self.breaker.state)
+                return None
+            rate_value = await aget_bcv_rate(self.url, timeout=self.timeout)
+        finally:
+            await cache.adelete(LOCK_KEY)
+        return await sync_to_async(self._store)(rate_value)
+
+    def _store(self, rate_value):
+        if rate_value is None:
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+
+        rate = str(rate_value)
+        cache.set(CACHE_KEY, {'rate': rate, 'fetched_at': time.time()}, None)
+
+        # Keep the history table: one row per distinct (rounded) rate.
+        stored = Decimal(rate).quantize(Decimal('0.01'))
+        latest = ExchangeRate.objects.order_by('-date', '-id').first()
+        if not latest or latest.rate != stored:
+            ExchangeRate.objects.create(rate=stored)
+        return rate
+
+
+rate_service = RateService()
@@ -0,0 +1,286 @@
+"""
+Bank statement reconciliation: matches the lines of a bank CSV export
+against PENDING payments by reference, amount in Bs and date.
+
+Pending payments are indexed once in a dict keyed by the last digits of the
+reference (banks often print truncated references), and each statement line
+is a single lookup in it, so the cost is O(lines + payments). References
+shorter than that are looked up by their full digit string.
+"""
+import csv
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Payment
+from .stats import invalidate_stats
+
+COLUMNS = {
+    'date': ('fecha', 'date', 'fecha valor', 'fecha operacion', 'fecha operación'),
+    'reference': ('referencia', 'reference', 'ref', 'nro referencia', 'número de referencia', 'numero de referencia'),
+    'amount': ('monto', 'amount', 'credito', 'crédito', 'abono', 'importe'),
+    'description': ('descripcion', 'descripción', 'concepto', 'description'),
+}
+DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%y')
+
+
+class StatementError(ValueError):
+    pass
+
+
+def normalize_reference(value):
+    digits = re.sub(r'\D', '', str(value or '')).lstrip('0')
+    return digits or None
+
+
+def references_agree(a, b):
+    # One side may be truncated; the shorter must be the tail of the longer
+    return a.endswith(b) or b.endswith(a)
+
+
+class ReferenceIndex:
+    """
+    Payments by the tail of their reference. A statement reference is looked
+    up by its last ``digits`` digits, or whole if it is shorter; payments
+    whose own reference is shorter than that are found by exact tail.
+    """
+
+    def __init__(self, payments, digits):
+        self.digits = digits
+        self.payments = payments
+        self.tails = {}  # length: {tail: [payment, ...]}, built on first use
+        self.short = defaultdict(list)
+        for payment in payments:
+            if len(payment['reference']) < digits:
+                self.short[payment['reference']].append(payment)
+        self.short_lengths = sorted({len(reference) for reference in self.short})
+
+    def by_tail(self, length):
+        if length not in self.tails:
+            index = defaultdict(list)
+            for payment in self.payments:
+                if len(payment['reference']) >= length:
+                    index[payment['reference'][-length:]].append(payment)
+            self.tails[length] = index
+        return self.tails[length]
+
+    def lookup(self, reference):
+        length = min(len(reference), self.digits)
+        found = list(self.by_tail(length).get(reference[-length:], ()))
+        for short in self.short_lengths:
+            if short >= length:
+                break
+            found.extend(self.short.get(reference[-short:], ()))
+        return found
+
+
+def parse_amount(value):
+    """'1.234,56', '1,234.56', '1234.56' and '1234,56' all give Decimal('1234.56')."""
+    text = re.sub(r'[^\d,.\-]', '', str(value or ''))
+    if ',' in text and '.' in text:
+        decimal_mark = ',' if text.rfind(',') > text.rfind('.') else '.'
+    else:
+        decimal_mark = ',' if ',' in text else '.'
+    thousands = '.' if decimal_mark == ',' else ','
+    try:
+        return Decimal(text.replace(thousands, '').replace(decimal_mark, '.'))
+    except InvalidOperation:
+        return None
+
+
+def parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def decode_lines(file):
+    """
+    The file's text lines: UTF-8 (with or without BOM), else Windows-1252,
+    which is what Venezuelan banks and Excel's "CSV" usually export.
+    """
+    content = file.read()
+    for encoding in ('utf-8-sig', 'cp1252'):
+        try:
+            return content.decode(encoding).splitlines()
+        except UnicodeDecodeError:
+            continue
+    raise StatementError('No se pudo leer el archivo; guárdelo como CSV en UTF-8')
+
+
+def read_statement(file):
+    """Yields (line number, {date, reference, amount, description}) of the credit lines."""
+    lines = iter(decode_lines(file))
+    first = next(lines, '')
+    try:
+        dialect = csv.Sniffer().sniff(first, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    rows = csv.reader([first], dialect)
+    header = next(rows, None)
+    if not header:
+        raise StatementError('El archivo está vacío')
+
+    aliases = {alias: field for field, names in COLUMNS.items() for alias in names}
+    mapping = {}
+    for index, name in enumerate(header):
+        field = aliases.get(name.strip().lower())
+        if field and field not in mapping.values():
+            mapping[index] = field
+    missing = [field for field in ('date', 'reference', 'amount') if field not in mapping.values()]
+    if missing:
+        raise StatementError(f'Faltan columnas: {", ".join(missing)}')
+
+    for number, values in enumerate(csv.reader(lines, dialect), start=2):
+        row = {field: values[index].strip() for index, field in mapping.items() if index < len(values)}
+        amount = parse_amount(row.get('amount'))
+        if amount is None or amount <= 0:
+            continue  # debits and non-movement lines
+        yield number, {
+            'date': parse_date(row.get('date', '')),
+            'reference': normalize_reference(row.get('reference')),
+            'amount': amount,
+            'description': row.get('description', ''),
+        }
+
+
+def reconcile(file, amount_tolerance=None, days=None):
+    """
+    Proposes matches without changing anything. A line matches a payment
+    when the references agree, the amounts differ by at most
+    ``amount_tolerance`` Bs and the dates by at most ``days`` days. Only
+    one-to-one pairs are proposed; the rest is reported as ambiguous.
+    """
+    amount_tolerance = Decimal(str(settings.RECONCILIATION_AMOUNT_TOLERANCE if amount_tolerance is None
+                                   else amount_tolerance))
+    days = timedelta(days=settings.RECONCILIATION_DAYS if days is None else days)
+
+    # Build side: every pending payment, one query
+    pending = list(
+        Payment.objects.filter(status='PENDING')
+        .values('id', 'reference_number', 'amount_bs', 'date_reported',
+                'student__first_name', 'student__last_name')
+    )
+    by_reference = defaultdict(list)
+    for payment in pending:
+        payment['reference'] = normalize_reference(payment['reference_number'])
+        if payment['reference']:
+            by_reference[payment['reference']].append(payment['id'])
+    index = ReferenceIndex([payment for payment in pending if payment['reference']],
+                           settings.RECONCILIATION_REFERENCE_DIGITS)
+
+    # Probe side: stream the statement
+    candidates = {}
+    lines = {}
+    line_references = defaultdict(list)
+    unmatched = []
+    for number, line in read_statement(file):
+        lines[number] = line
+        if not line['reference']:
+            unmatched.append(number)
+            continue
+        line_references[line['reference']].append(number)
+        found = [
+            payment for payment in index.lookup(line['reference'])
+            if references_agree(payment['reference'], line['reference'])
+            and abs(payment['amount_bs'] - line['amount']) <= amount_tolerance
+            and (line['date'] is None or abs(timezone.localdate(payment['date_reported']) - line['date']) <= days)
+        ]
+        if found:
+            candidates[number] = found
+        else:
+            unmatched.append(number)
+
+    claimed = defaultdict(list)
+    for number, found in candidates.items():
+        for payment in found:
+            claimed[payment['id']].append(number)
+
+    duplicates, reused = duplicate_references(pending, by_reference, line_references)
+
+    matches, ambiguous = [], []
+    for number, found in sorted(candidates.items()):
+        line = lines[number]
+        if len(found) > 1:
+            ambiguous.append({'line': number, 'payments': [payment['id'] for payment in found],
+                              'reason': 'La línea coincide con varios pagos'})
+        elif len(claimed[found[0]['id']]) > 1:
+            continue  # reported once per payment below
+        elif found[0]['reference'] in reused:
+            ambiguous.append({'line': number, 'payments': [found[0]['id']],
+                              'reason': 'La referencia ya fue usada en un pago verificado'})
+        else:
+            payment = found[0]
+            matches.append({
+                'line': number, 'payment': payment['id'], 'reference': payment['reference_number'],
+                'amount_bs': str(payment['amount_bs']), 'statement_amount': str(line['amount']),
+                'statement_date': line['date'].isoformat() if line['date'] else None,
+                'student': f"{payment['student__first_name']} {payment['student__last_name']}",
+            })
+    for payment_id, numbers in claimed.items():
+        if len(numbers) > 1:
+            ambiguous.append({'lines': numbers, 'payments': [payment_id],
+                              'reason': 'Varias líneas coinciden con el mismo pago'})
+
+    return {
+        'lines': len(lines),
+        'pending': len(pending),
+        'matches': matches,
+        'ambiguous': ambiguous,
+        'duplicates': duplicates,
+        'unmatched_lines': unmatched,
+    }
+
+
+def duplicate_references(pending, by_reference, line_references):
+    """
+    References reported in more than one pending payment, already used by a
+    verified payment (a reused receipt), or repeated in the statement.
+    Also returns the set of reused references.
+    """
+    duplicates = []
+    # Compared normalised, so a receipt stored as '0012 3456' still counts as
+    # '123456'; one pass over the verified references, no join on the raw text.
+    verified = defaultdict(list)
+    for pk, reference_number in (Payment.objects.filter(status='VERIFIED')
+                                 .values_list('id', 'reference_number').iterator(chunk_size=2000)):
+        reference = normalize_reference(reference_number)
+        if reference in by_reference:
+            verified[reference].append(pk)
+
+    for reference, payment_ids in sorted(by_reference.items()):
+        if len(payment_ids) > 1 or verified.get(reference):
+            duplicates.append({'reference': reference, 'payments': payment_ids,
+                               'verified_payments': verified.get(reference, [])})
+    for reference, numbers in sorted(line_references.items()):
+        if len(numbers) > 1:
+            duplicates.append({'reference': reference, 'lines': numbers})
+    return duplicates, {reference for reference, pks in verified.items() if pks}
+
+
+def approve(payment_ids, note='Conciliado con el estado de cuenta'):
+    """
+    Verifies the given payments in one transaction. If any of them is no
+    longer pending nothing is changed, and those ids are returned.
+    """
+    payment_ids = set(payment_ids)
+    with transaction.atomic():
+        still_pending = set(
+            Payment.objects.select_for_update().filter(pk__in=payment_ids, status='PENDING')
+            .values_list('id', flat=True)
+        )
+        missing = payment_ids - still_pending
+        if missing:
+            return 0, sorted(missing)
+        updated = Payment.objects.filter(pk__in=still_pending).update(status='VERIFIED', admin_note=note)
+        # update() sends no signals
+        transaction.on_commit(invalidate_stats)
+    return updated, []
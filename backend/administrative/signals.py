@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.versions import bump_on_commit
+
+from .images import needs_derivatives, schedule_derivatives
+from .models import Payment, PaymentConcept
+from .stats import invalidate_stats
+
+
+@receiver([post_save, post_delete], sender=Payment)
+def payment_changed(sender, instance, **kwargs):
+    # New reports, approvals/rejections and deletes all move the dashboard counts.
+    transaction.on_commit(invalidate_stats)
+
+
+@receiver(post_save, sender=Payment)
+def proof_uploaded(sender, instance, **kwargs):
+    # Thumbnail/preview are produced off the request, once the row is committed.
+    if needs_derivatives(instance):
+        transaction.on_commit(lambda: schedule_derivatives(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=PaymentConcept)
+def concept_changed(sender, **kwargs):
+    bump_on_commit(PaymentConcept)
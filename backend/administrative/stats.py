@@ -0,0 +1,79 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+GENERATION_KEY = 'payments:stats:generation'
+STATS_KEY = 'payments:stats:{}:{}'
+STATS_TTL = 60
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_stats():
+    # Old entries are simply never read again and expire with their TTL.
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, None)
+
+
+def totals(queryset):
+    return queryset.annotate(
+        count=Count('id'), amount_usd=Sum('amount_usd'), amount_bs=Sum('amount_bs')
+    )
+
+
+def row(values, *keys):
+    data = {key: values[key] for key in keys}
+    data.update(
+        count=values['count'],
+        amount_usd=str(values['amount_usd'] or 0),
+        amount_bs=str(values['amount_bs'] or 0),
+    )
+    return data
+
+
+def compute_stats(payments):
+    """Counts and USD/Bs totals by status, concept and month, all grouped in SQL."""
+    by_status = totals(payments.values('status').order_by('status'))
+    by_concept = totals(
+        payments.values('status', 'payment_concept', 'payment_concept__name')
+        .order_by('payment_concept__name', 'payment_concept', 'status')
+    )
+    by_month = totals(
+        payments.annotate(month=TruncMonth('date_reported'))
+        .values('month', 'status').order_by('month', 'status')
+    )
+    return {
+        'by_status': [row(values, 'status') for values in by_status],
+        'by_concept': [
+            {**row(values, 'status', 'payment_concept'), 'payment_concept_name': values['payment_concept__name']}
+            for values in by_concept
+        ],
+        'by_month': [
+            {**row(values, 'status'), 'month': values['month'].strftime('%Y-%m')}
+            for values in by_month
+        ],
+    }
+
+
+def get_stats(payments, scope):
+    """
+    Cached compute_stats. ``scope`` identifies the visible rows (role, user,
+    filters); any payment write moves every scope to a new generation.
+    """
+    digest = hashlib.sha256(scope.encode()).hexdigest()[:32]
+    key = STATS_KEY.format(get_generation(), digest)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(payments)
+        cache.set(key, stats, STATS_TTL)
+    return stats
@@ -1,3 +1,482 @@
-from django.test import TestCase
+import base64
+import csv
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from academic.models import Student
+from users.models import CustomUser
+from .models import ExchangeRate, Payment, PaymentConcept, ProofUpload
+from .images import needs_derivatives, schedule_derivatives
+from .rates import CACHE_KEY, CircuitBreaker, RateService
+
+
+def make_payments(count=3):
+    """A representative with one student and ``count`` payments (no proof files)."""
+    admin = CustomUser.objects.create(username='admin', role='ADMINISTRADOR')
+    representative = CustomUser.objects.create(username='V-2.000.000', role='REPRESENTANTE', first_name='María')
+    student = Student.objects.create(representative=representative, first_name='Juan', last_name='Pérez',
+                                     id_number='V-3.000.000', birth_date=date(2012, 1, 1),
+                                     current_grade='1er Año', section='A')
+    concept = PaymentConcept.objects.create(name='Mensualidad Octubre', amount_usd=Decimal('50'))
+    payments = [
+        Payment.objects.create(student=student, payment_concept=concept, concept=concept.name,
+                               amount_usd=Decimal('50'), amount_bs=Decimal('2275'), rate_applied=Decimal('45.50'),
+                               reference_number=f'12345{number}')
+        for number in range(count)
+    ]
+    return admin, student, payments
+
+
+@override_settings(STRICT_RELATED_LOADING=True)
+class ListQueryTests(APITestCase):
+    """
+    List endpoints render from what the view selects (core.serializers.
+    StrictLoadingMixin); the query count doesn't grow with the rows.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin, self.student, self.payments = make_payments()
+        ExchangeRate.objects.create(rate=Decimal('45.50'))
+        self.client.force_authenticate(self.admin)
+
+    def assertListQueries(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['results'])
+
+    def test_payments(self):
+        self.assertListQueries('/api/payments/', 1)
+
+    def test_payment_concepts(self):
+        self.assertListQueries('/api/payment-concepts/', 1)
+
+    def test_rates(self):
+        self.assertListQueries('/api/rates/', 1)
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        admin, _student, _payments = make_payments(count=5)
+        self.client.force_authenticate(admin)
+
+    def test_pages_newest_first(self):
+        ids, url, params = [], '/api/payments/', {'page_size': 2}
+        while url:
+            body = self.client.get(url, params).json()
+            ids += [payment['id'] for payment in body['results']]
+            url, params = body['next'], None
+        self.assertEqual(ids, list(Payment.objects.order_by('-date_reported', '-id').values_list('id', flat=True)))
+
+    def test_cursor_with_a_bad_date_is_404(self):
+        cursor = base64.urlsafe_b64encode(json.dumps({'p': ['ayer', 1], 'r': 0}).encode()).decode()
+        self.assertEqual(self.client.get('/api/payments/', {'cursor': cursor}).status_code, 404)
+
+
+class FilterTests(APITestCase):
+    """payments/ query parameters (core.filters), applied in the database."""
+
+    def setUp(self):
+        admin, self.student, self.payments = make_payments(count=3)
+        first, second, third = self.payments
+        Payment.objects.filter(pk=first.pk).update(status='VERIFIED', date_reported='2026-10-01T12:00:00Z')
+        Payment.objects.filter(pk=second.pk).update(status='REJECTED', date_reported='2026-10-02T12:00:00Z')
+        Payment.objects.filter(pk=third.pk).update(date_reported='2026-10-03T12:00:00Z')
+        self.client.force_authenticate(admin)
+
+    def ids(self, **params):
+        response = self.client.get('/api/payments/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(payment['id'] for payment in response.json()['results'])
+
+    def test_status_accepts_a_list(self):
+        first, second, third = (payment.pk for payment in self.payments)
+        self.assertEqual(self.ids(status='PENDING'), [third])
+        self.assertEqual(self.ids(status='VERIFIED,REJECTED'), [first, second])
+
+    def test_date_bounds_are_inclusive_days(self):
+        first, second, third = (payment.pk for payment in self.payments)
+        self.assertEqual(self.ids(date_from='2026-10-02'), [second, third])
+        self.assertEqual(self.ids(date_to='2026-10-02'), [first, second])
+        self.assertEqual(self.ids(date_from='2026-10-02', date_to='2026-10-02'), [second])
+
+    def test_student_and_section(self):
+        self.assertEqual(len(self.ids(student_id=self.student.pk, grade='1er Año', section='A')), 3)
+        self.assertEqual(self.ids(section='B'), [])
+
+    def test_invalid_values_are_400(self):
+        for params in ({'status': 'PAGADO'}, {'student_id': 'abc'}, {'date_from': '02/10/2026'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/payments/', params).status_code, 400)
+
+
+class ExportTests(APITestCase):
+    """payments/export/: streamed CSV/XLSX, with formula-like cells neutralised in the CSV only."""
+
+    def setUp(self):
+        self.admin, _student, payments = make_payments(count=2)
+        Payment.objects.filter(pk=payments[0].pk).update(reference_number='-123', admin_note='=HYPERLINK("x")')
+        self.client.force_authenticate(self.admin)
+
+    def export(self, fmt):
+        response = self.client.get('/api/payments/export/', {'type': fmt})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_quotes_formula_cells(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv').decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 3)
+        header = rows[0]
+        references = {row[header.index('Referencia')] for row in rows[1:]}
+        self.assertEqual(references, {"'-123", '123451'})
+        self.assertIn('\'=HYPERLINK("x")', [row[header.index('Nota')] for row in rows[1:]])
+
+    def test_xlsx_keeps_the_raw_strings(self):
+        with zipfile.ZipFile(io.BytesIO(self.export('xlsx'))) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 3)
+        self.assertIn('>-123</t>', sheet)
+        self.assertNotIn("'-123", sheet)
+
+    def test_unknown_type_is_400(self):
+        self.assertEqual(self.client.get('/api/payments/export/', {'type': 'pdf'}).status_code, 400)
+
+
+class ConceptListTests(APITestCase):
+    """payment-concepts/: versioned list (core.mixins.VersionedListMixin), new ETag on any concept write."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin, _student, _payments = make_payments(count=0)
+        self.client.force_authenticate(self.admin)
+
+    def test_304_until_a_concept_changes(self):
+        etag = self.client.get('/api/payment-concepts/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/payment-concepts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentConcept.objects.create(name='Inscripción', amount_usd=Decimal('80'))
+        response = self.client.get('/api/payment-concepts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, len(response.json()['results'])), (200, 2))
+
+
+class StatsTests(APITestCase):
+    """payments/stats/: grouped in SQL, cached per scope until a payment is written."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin, self.student, self.payments = make_payments(count=2)
+        self.client.force_authenticate(self.admin)
+
+    def by_status(self):
+        response = self.client.get('/api/payments/stats/')
+        self.assertEqual(response.status_code, 200)
+        return {row['status']: (row['count'], Decimal(row['amount_usd'])) for row in response.json()['by_status']}
+
+    def test_totals_are_cached_until_a_payment_changes(self):
+        self.assertEqual(self.by_status(), {'PENDING': (2, Decimal('100'))})
+        with self.assertNumQueries(0):
+            self.by_status()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payments[0].status = 'VERIFIED'
+            self.payments[0].save()
+        self.assertEqual(self.by_status(), {'PENDING': (1, Decimal('50')), 'VERIFIED': (1, Decimal('50'))})
+
+    def test_representatives_get_their_own_scope(self):
+        self.by_status()
+        other = CustomUser.objects.create(username='V-2.100.000', role='REPRESENTANTE')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.by_status(), {})
+
+
+def png_bytes():
+    output = io.BytesIO()
+    Image.new('RGB', (40, 30), 'white').save(output, 'PNG')
+    return output.getvalue()
+
+
+class ProofUploadTests(APITestCase):
+    """uploads/: UPLOADING -> COMPLETE -> USED, or back to offset 0 / REJECTED on a bad commit."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings = override_settings(PROOF_UPLOAD_DIR=self.directory, MEDIA_ROOT=self.directory,
+                                     PAYMENT_PROOF_DERIVATIVES_ASYNC=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.admin, self.student, _payments = make_payments(count=0)
+        self.client.force_authenticate(self.student.representative)
+
+    def start(self, data, checksum=None):
+        response = self.client.post('/api/uploads/', {
+            'filename': 'comprobante.png', 'size': len(data),
+            'checksum': checksum or hashlib.sha256(data).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def put(self, upload_id, data, start, total):
+        return self.client.put(f'/api/uploads/{upload_id}/', data, content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{total}')
+
+    def upload(self, data, checksum=None):
+        upload_id = self.start(data, checksum)
+        half = len(data) // 2
+        self.assertEqual(self.put(upload_id, data[:half], 0, len(data)).status_code, 200)
+        self.assertEqual(self.put(upload_id, data[half:], half, len(data)).json()['offset'], len(data))
+        return upload_id, self.client.post(f'/api/uploads/{upload_id}/commit/')
+
+    def test_upload_commit_and_attach(self):
+        upload_id, response = self.upload(png_bytes())
+        self.assertEqual((response.status_code, response.json()['status']), (200, 'COMPLETE'))
+        # Rendering the new payment only queues its thumbnails, off the request
+        with mock.patch('administrative.images.schedule_derivatives') as schedule:
+            response = self.client.post('/api/payments/', {
+                'student': self.student.pk, 'amount_usd': '50.00', 'amount_bs': '2275.00', 'rate_applied': '45.50',
+                'concept': 'Mensualidad', 'reference_number': '123456', 'upload': upload_id,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        schedule.assert_called_with(response.json()['id'], background=True)
+        upload = ProofUpload.objects.get(pk=upload_id)
+        self.assertEqual((upload.status, upload.payment_id), ('USED', response.json()['id']))
+        self.assertTrue(upload.payment.proof_image.name)
+
+    def test_wrong_offset_is_409_with_the_offset_to_resume_from(self):
+        data = png_bytes()
+        upload_id = self.start(data)
+        self.put(upload_id, data[:10], 0, len(data))
+        response = self.put(upload_id, data[20:30], 20, len(data))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '10')
+
+    def test_checksum_mismatch_restarts_the_upload(self):
+        upload_id, response = self.upload(png_bytes(), checksum='0' * 64)
+        self.assertEqual(response.status_code, 422)
+        upload = ProofUpload.objects.get(pk=upload_id)
+        self.assertEqual((upload.status, upload.offset), ('UPLOADING', 0))
+
+    def test_non_image_is_rejected_for_good(self):
+        data = b'%PDF-1.4 not an image'
+        upload_id, response = self.upload(data)
+        self.assertEqual((response.status_code, response.json()['status']), (422, 'REJECTED'))
+        self.assertEqual(self.put(upload_id, data, 0, len(data)).status_code, 409)
+        self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/commit/').status_code, 422)
+
+    def test_unknown_malformed_and_foreign_ids_are_404(self):
+        upload_id = self.start(png_bytes())
+        self.assertEqual(self.client.get('/api/uploads/abc/').status_code, 404)
+        self.assertEqual(self.client.get('/api/uploads/00000000-0000-0000-0000-000000000000/').status_code, 404)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').status_code, 404)
+
+
+class ProofDerivativeTests(APITestCase):
+    """WebP thumbnail and preview of each proof, made once the payment is committed (administrative.images)."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(MEDIA_ROOT=directory, PAYMENT_PROOF_DERIVATIVES_ASYNC=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.admin, self.student, [self.payment] = make_payments(count=1)
+        self.client.force_authenticate(self.admin)
+
+    def attach(self, content):
+        self.payment.proof_image.save('comprobante.png', ContentFile(content))
+        return self.payment
+
+    def test_thumbnail_and_preview_are_bounded_webps(self):
+        output = io.BytesIO()
+        Image.new('RGB', (2000, 1500), 'white').save(output, 'PNG')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.attach(output.getvalue())
+        self.payment.refresh_from_db()
+        self.assertFalse(needs_derivatives(self.payment))
+        for field, size in (('proof_thumbnail', (240, 180)), ('proof_preview', (1280, 960))):
+            with getattr(self.payment, field).open('rb') as file, Image.open(file) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', size))
+
+        body = self.client.get(f'/api/payments/{self.payment.pk}/').json()
+        self.assertTrue(body['proof_thumbnail_url'].endswith('_thumbnail.webp'))
+        self.assertTrue(body['proof_preview_url'].endswith('_preview.webp'))
+
+    def test_broken_proof_is_marked_and_not_retried(self):
+        self.attach(b'not an image')
+        with self.assertRaises(Exception):
+            schedule_derivatives(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.derivatives_failed, self.payment.proof_image.name)
+        self.assertFalse(needs_derivatives(self.payment))
+        with mock.patch('administrative.images.schedule_derivatives') as schedule:
+            body = self.client.get(f'/api/payments/{self.payment.pk}/').json()
+        schedule.assert_not_called()
+        self.assertTrue(body['proof_thumbnail_url'].endswith('.png'))
+
+
+class ReconciliationTests(APITestCase):
+    """payments/reconcile/: statement lines against PENDING payments, by reference tail, amount and date."""
+
+    def setUp(self):
+        self.admin, self.student, self.payments = make_payments(count=0)
+        self.client.force_authenticate(self.admin)
+        self.today = timezone.localdate().strftime('%d/%m/%Y')
+
+    def pay(self, reference):
+        return Payment.objects.create(student=self.student, concept='Mensualidad', amount_usd=Decimal('50'),
+                                      amount_bs=Decimal('2275'), rate_applied=Decimal('45.50'),
+                                      reference_number=reference)
+
+    def reconcile(self, content, **params):
+        statement = SimpleUploadedFile('estado.csv', content, content_type='text/csv')
+        return self.client.post('/api/payments/reconcile/', {'file': statement, **params}, format='multipart')
+
+    def statement(self, *references, encoding='utf-8'):
+        lines = ['Fecha;Referencia;Descripción;Monto']
+        lines += [f'{self.today};{reference};Transferencia Peña;2.275,00' for reference in references]
+        return '\r\n'.join(lines).encode(encoding)
+
+    def matched(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {match['payment']: match['line'] for match in response.json()['matches']}
+
+    def test_windows_1252_statement(self):
+        payment = self.pay('123456')
+        response = self.reconcile(self.statement('123456', encoding='cp1252'))
+        self.assertEqual(self.matched(response), {payment.pk: 2})
+
+    def test_undecodable_statement_is_400(self):
+        # 0x81 is undefined in Windows-1252 and not valid UTF-8 either
+        response = self.reconcile(b'Fecha;Referencia;Monto\r\n\x81\x81;1;1,00')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file', response.json())
+
+    def test_invalid_tolerance_or_days_is_400(self):
+        content = self.statement('123456')
+        self.assertEqual(self.reconcile(content, amount_tolerance='-1').status_code, 400)
+        self.assertEqual(self.reconcile(content, days='abc').status_code, 400)
+        self.assertEqual(self.reconcile(content, days='61').status_code, 400)
+
+    def test_truncated_statement_reference_matches_the_tail(self):
+        payment = self.pay('55512345678')
+        self.pay('55512349999')
+        self.assertEqual(self.matched(self.reconcile(self.statement('5678'))), {payment.pk: 2})
+
+    def test_leading_zeros_are_ignored(self):
+        payment = self.pay('1234')
+        self.assertEqual(self.matched(self.reconcile(self.statement('001234'))), {payment.pk: 2})
+
+    def test_reference_with_another_tail_is_unmatched(self):
+        self.pay('55512345678')
+        response = self.reconcile(self.statement('5679'))
+        self.assertEqual((self.matched(response), response.json()['unmatched_lines']), ({}, [2]))
+
+    def test_only_administrators(self):
+        self.client.force_authenticate(self.student.representative)
+        self.assertEqual(self.reconcile(self.statement('123456')).status_code, 403)
+
+    def test_reference_of_a_verified_payment_is_reused_whatever_its_format(self):
+        payment = self.pay('123456')
+        verified = self.pay('0012 3456')
+        Payment.objects.filter(pk=verified.pk).update(status='VERIFIED')
+        report = self.reconcile(self.statement('123456')).json()
+        self.assertEqual(report['matches'], [])
+        self.assertEqual([(item['line'], item['payments']) for item in report['ambiguous']], [(2, [payment.pk])])
+        self.assertEqual(report['duplicates'], [{'reference': '123456', 'payments': [payment.pk],
+                                                 'verified_payments': [verified.pk]}])
+
+
+class BCVStub(BaseHTTPRequestHandler):
+    """Serves BCV's rate markup; the server's ``status``/``delay`` set the answer."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+        time.sleep(server.delay)
+        self.send_response(server.status)
+        self.end_headers()
+        self.wfile.write(b'<div id="dolar"><strong> 36,50 </strong></div>')
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(BCV_BACKGROUND_REFRESH=False)
+class RateServiceTests(TransactionTestCase):
+    """administrative.rates against a local BCV stub: single-flight, circuit breaker, stale serving."""
+
+    def setUp(self):
+        cache.clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), BCVStub)
+        self.server.lock, self.server.hits, self.server.status, self.server.delay = threading.Lock(), 0, 200, 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.breaker = CircuitBreaker(threshold=2, cooldown=0.2)
+        self.service = RateService(url=f'http://127.0.0.1:{self.server.server_port}/', timeout=2,
+                                   breaker=self.breaker)
+
+    def test_concurrent_callers_share_one_fetch(self):
+        self.server.delay = 0.3
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.service.current())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['36.5'] * 5)
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(ExchangeRate.objects.get().rate, Decimal('36.50'))
+
+    def test_breaker_opens_and_recovers_after_the_trial_call(self):
+        self.server.status = 500
+        self.assertIsNone(self.service.refresh())
+        self.assertIsNone(self.service.refresh())
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertIsNone(self.service.refresh())
+        self.assertEqual(self.server.hits, 2)  # open: BCV isn't called
+
+        time.sleep(0.25)
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.server.status = 200
+        self.assertEqual(self.service.refresh(), '36.5')
+        self.assertEqual((self.breaker.state, self.server.hits), ('closed', 3))
+
+    def test_stale_rate_is_served_while_the_breaker_is_open(self):
+        cache.set(CACHE_KEY, {'rate': '35.1', 'fetched_at': time.time() - 3600}, None)
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.service.current(), '35.1')
+        self.assertEqual(self.server.hits, 0)
+
+    def test_stale_rate_is_refreshed_in_the_background(self):
+        cache.set(CACHE_KEY, {'rate': '35.1', 'fetched_at': time.time() - 3600}, None)
+        self.server.delay = 0.2
+        self.assertEqual(self.service.current(), '35.1')
+        deadline = time.monotonic() + 3
+        while cache.get(CACHE_KEY)['rate'] == '35.1' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual((cache.get(CACHE_KEY)['rate'], self.server.hits), ('36.5', 1))
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import ProofUpload
+
+READ_BYTES = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+# Why a finished upload takes no more chunks
+STATUS_ERRORS = {
+    'COMPLETE': 'La carga ya fue completada',
+    'USED': 'La carga ya fue completada',
+    'REJECTED': 'El archivo no es una imagen válida',
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, upload=None):
+        super().__init__(message)
+        self.status = status
+        self.upload = upload
+
+
+def partial_path(upload):
+    return os.path.join(settings.PROOF_UPLOAD_DIR, f'{upload.pk}.part')
+
+
+def start_upload(owner, filename, size, checksum):
+    if size > settings.PROOF_UPLOAD_MAX_BYTES:
+        raise UploadError(f'El archivo supera el máximo de {settings.PROOF_UPLOAD_MAX_BYTES // (1024 * 1024)} MB', 413)
+    upload = ProofUpload.objects.create(owner=owner, filename=os.path.basename(filename)[:200],
+                                        size=size, checksum=checksum.lower())
+    os.makedirs(settings.PROOF_UPLOAD_DIR, exist_ok=True)
+    open(partial_path(upload), 'wb').close()
+    return upload
+
+
+def parse_content_range(header):
+    """'bytes 0-262143/1048576' -> (start, end exclusive, total)."""
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range inválido; use "bytes inicio-fin/total"')
+    start, last, total = (int(value) for value in match.groups())
+    if last < start:
+        raise UploadError('Content-Range inválido')
+    return start, last + 1, total
+
+
+def check_chunk(upload, start, end, total):
+    if upload.status != 'UPLOADING':
+        raise UploadError(STATUS_ERRORS[upload.status], 409, upload)
+    if total != upload.size or end > upload.size:
+        raise UploadError('El rango no coincide con el tamaño declarado', 400, upload)
+    if start != upload.offset:
+        raise UploadError('Desplazamiento incorrecto', 409, upload)
+
+
+def append_chunk(upload_id, owner, stream, content_range):
+    """
+    Appends the request body at the upload's current offset. A chunk that
+    doesn't start at the stored offset is refused with 409 and the offset, so
+    the client knows where to resume; a chunk cut short by a dropped
+    connection still counts up to what arrived.
+
+    The body is read into a temporary file first, at the client's pace; the
+    row is only locked to re-check the offset and copy the chunk from local
+    disk, so a slow client never holds the lock.
+    """
+    start, end, total = parse_content_range(content_range)
+    upload = ProofUpload.objects.filter(pk=upload_id, owner=owner).first()
+    if upload is None:
+        raise UploadError('Carga no encontrada', 404)
+    check_chunk(upload, start, end, total)
+
+    expected = end - start
+    written = 0
+    with tempfile.TemporaryFile(dir=settings.PROOF_UPLOAD_DIR) as chunk:
+        try:
+            while written < expected:
+                block = stream.read(min(READ_BYTES, expected - written))
+                if not block:
+                    break
+                chunk.write(block)
+                written += len(block)
+        except OSError:
+            # Client went away mid-chunk (UnreadablePostError); keep what arrived
+            pass
+        chunk.seek(0)
+
+        with transaction.atomic():
+            upload = ProofUpload.objects.select_for_update().filter(pk=upload_id, owner=owner).first()
+            if upload is None:
+                raise UploadError('Carga no encontrada', 404)
+            # Another request may have written this range meanwhile
+            check_chunk(upload, start, end, total)
+            with open(partial_path(upload), 'r+b') as partial:
+                partial.truncate(upload.offset)
+                partial.seek(upload.offset)
+                shutil.copyfileobj(chunk, partial, READ_BYTES)
+            upload.offset += written
+            upload.save(update_fields=['offset', 'updated_at'])
+
+    if written != expected:
+        raise UploadError('El fragmento llegó incompleto', 400, upload)
+    return upload
+
+
+def verify(upload):
+    """None if the bytes on disk are the declared image, else (error, new status)."""
+    digest = hashlib.sha256()
+    with open(partial_path(upload), 'rb') as partial:
+        for block in iter(lambda: partial.read(READ_BYTES), b''):
+            digest.update(block)
+    if digest.hexdigest() != upload.checksum:
+        # Start over: the bytes on disk are not the file the client has
+        return 'La suma de verificación no coincide; suba el archivo de nuevo', 'UPLOADING'
+    try:
+        with Image.open(partial_path(upload)) as image:
+            image.verify()
+    except Exception:
+        # The client's file itself is not an image; re-sending it can't help
+        return 'El archivo no es una imagen válida', 'REJECTED'
+    return None
+
+
+def commit_upload(upload_id, owner):
+    """
+    Checks size, sha256 and that the file is an image; then it can be
+    attached to a Payment. A checksum mismatch restarts the upload at 0, a
+    file that isn't an image rejects it for good.
+    """
+    with transaction.atomic():
+        upload = ProofUpload.objects.select_for_update().filter(pk=upload_id, owner=owner).first()
+        if upload is None:
+            raise UploadError('Carga no encontrada', 404)
+        if upload.status == 'REJECTED':
+            raise UploadError(STATUS_ERRORS['REJECTED'], 422, upload)
+        if upload.status != 'UPLOADING':
+            return upload
+        if upload.offset != upload.size:
+            raise UploadError('La carga está incompleta', 409, upload)
+
+        failure = verify(upload)
+        if failure is None:
+            upload.status = 'COMPLETE'
+        else:
+            upload.status = failure[1]
+            upload.offset = 0
+            open(partial_path(upload), 'wb').close()
+        upload.save(update_fields=['status', 'offset', 'updated_at'])
+    # Raised after the commit, so the reset above is kept
+    if failure is not None:
+        raise UploadError(failure[0], 422, upload)
+    return upload
+
+
+def attach_upload(upload, payment):
+    """
+    Saves ``payment`` with the committed file as its proof_image and marks
+    the upload as used. Call inside a transaction.
+    """
+    upload = ProofUpload.objects.select_for_update().get(pk=upload.pk)
+    if upload.status != 'COMPLETE':
+        raise UploadError('La carga no está disponible', 409, upload)
+    with open(partial_path(upload), 'rb') as partial:
+        payment.proof_image.save(upload.filename, File(partial), save=True)
+    upload.status = 'USED'
+    upload.payment = payment
+    upload.save(update_fields=['status', 'payment', 'updated_at'])
+    transaction.on_commit(lambda: discard_partial(upload))
+    return payment
+
+
+def discard_partial(upload):
+    try:
+        os.remove(partial_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads():
+    """Deletes unfinished or unused uploads older than PROOF_UPLOAD_EXPIRY_HOURS."""
+    cutoff = timezone.now() - timedelta(hours=settings.PROOF_UPLOAD_EXPIRY_HOURS)
+    stale = list(ProofUpload.objects.filter(updated_at__lt=cutoff).exclude(status='USED'))
+    for upload in stale:
+        discard_partial(upload)
+    ProofUpload.objects.filter(pk__in=[upload.pk for upload in stale]).delete()
+    return len(stale)
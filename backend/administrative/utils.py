@@ -5,32 +5,58 @@ import urllib3
 # Disable SSL warnings as BCV certs are often problematic
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def get_bcv_rate():
+BCV_URL = "https://www.bcv.org.ve"
+
+def get_bcv_rate(url=BCV_URL, timeout=10):
     """
-    Fetches the current USD exchange rate from the BCV website.
+    Fetches the current USD exchange rate from the BCV website (or a stub
+    serving the same markup at ``url``).
     Returns the rate as a float, or None if fetching fails.
     """
-    url = "https://www.bcv.org.ve"
     try:
         # Use verify=False because BCV often has SSL issues
-        response = requests.get(url, verify=False, timeout=10)
+        response = requests.get(url, verify=False, timeout=timeout)
         response.raise_for_status()
+        return parse_bcv_rate(response.content)
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # The structure usually involves a div with id="dolar"
-        # Inside it, there's usually a strong tag or similar with the rate
-        dolar_div = soup.find('div', id='dolar')
-        
-        if dolar_div:
-            # Look for the rate text
-            rate_text = dolar_div.find('strong').get_text().strip()
-            # Format: "36,1234" -> "36.1234"
-            rate_text = rate_text.replace(',', '.')
-            return float(rate_text)
-            
+    except Exception as e:
+        print(f"Error fetching BCV rate: {e}")
         return None
-        
+
+
+async def aget_bcv_rate(url=BCV_URL, timeout=10):
+    """
+    get_bcv_rate() without holding a thread while BCV answers, using httpx.
+    Without httpx installed it falls back to get_bcv_rate() in a thread.
+    """
+    try:
+        import httpx
+    except ImportError:
+        from asgiref.sync import sync_to_async
+        return await sync_to_async(get_bcv_rate, thread_sensitive=False)(url, timeout)
+
+    try:
+        async with httpx.AsyncClient(verify=False, timeout=timeout) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+        return parse_bcv_rate(response.content)
     except Exception as e:
         print(f"Error fetching BCV rate: {e}")
         return None
+
+
+def parse_bcv_rate(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # The structure usually involves a div with id="dolar"
+    # Inside it, there's usually a strong tag or similar with the rate
+    dolar_div = soup.find('div', id='dolar')
+    
+    if dolar_div:
+        # Look for the rate text
+        rate_text = dolar_div.find('strong').get_text().strip()
+        # Format: "36,1234" -> "36.1234"
+        rate_text = rate_text.replace(',', '.')
+        return float(rate_text)
+        
+    return None
@@ -0,0 +1,148 @@
+"""
+Async versions of the hot read endpoints, served under ASGI only.
+
+Under an ASGI server (``uvicorn core.asgi:application``) requests resolve
+against ``settings.ASYNC_ROOT_URLCONF``, which puts these views in front of
+the regular routes: GET/HEAD of students, grades, payments, rates/current
+and students/{id}/timetable are answered here, with the async ORM and
+cache, so a worker isn't tied up while the database or BCV answers. Other
+methods fall through to the DRF viewsets. Under WSGI nothing changes.
+
+Querysets, filters, pagination and serializers are the viewsets' own; only
+authentication and the database reads are done asynchronously.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from users.authentication import CachedTokenAuthentication
+from .views import ExchangeRateViewSet, GradeViewSet, PaymentViewSet, StudentViewSet
+
+
+class AsyncRoutesMiddleware:
+    """Switches ASGI requests to ``ASYNC_ROOT_URLCONF``; a no-op under WSGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.urlconf = settings.ASYNC_ROOT_URLCONF
+        return await self.get_response(request)
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+    response = api_response(detail, status=exc.status_code)
+    if isinstance(exc, NotAuthenticated):
+        response['WWW-Authenticate'] = CachedTokenAuthentication.keyword
+    return response
+
+
+async def authenticate(request):
+    """Token first, then session, like the viewsets' authentication_classes."""
+    result = await CachedTokenAuthentication().aauthenticate(request)
+    if result is not None:
+        return result[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+async def viewset_for(viewset_class, request, action, require_user=True, **kwargs):
+    # A viewset instance to borrow get_queryset/filters/pagination/serializer
+    # from; the user is set directly so DRF never authenticates synchronously.
+    user = await authenticate(request)
+    if user is None and require_user:
+        raise NotAuthenticated()
+    drf_request = Request(request)
+    drf_request.user = user
+    return viewset_class(request=drf_request, action=action, format_kwarg=None, args=(), kwargs=kwargs)
+
+
+def read_view(viewset_class, actions):
+    """
+    Async GET/HEAD handler for a route of ``viewset_class``; any other method
+    is handed to the viewset itself (``actions`` as in ``as_view()``).
+    """
+    fallback = sync_to_async(viewset_class.as_view(actions))
+
+    def decorator(handler):
+        @csrf_exempt  # DRF's SessionAuthentication checks CSRF on the fallback
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await fallback(request, *args, **kwargs)
+            try:
+                return await handler(request, *args, **kwargs)
+            except Http404:
+                return error_response(NotFound())
+            except APIException as exc:
+                return error_response(exc)
+        # Read by core.metrics.view_label: same labels as the sync routes
+        view.cls, view.actions = viewset_class, actions
+        return view
+    return decorator
+
+
+async def list_response(view):
+    queryset = view.filter_queryset(view.get_queryset())
+    paginator = view.paginator
+    page = await paginator.apaginate_queryset(queryset, view.request, view=view)
+    if page is None:
+        data = view.get_serializer([row async for row in queryset], many=True).data
+        return api_response(data)
+    data = view.get_serializer(page, many=True).data
+    return api_response(paginator.get_paginated_response(data).data)
+
+
+@read_view(StudentViewSet, {'get': 'list', 'post': 'create'})
+async def student_list(request):
+    return await list_response(await viewset_for(StudentViewSet, request, 'list'))
+
+
+@read_view(GradeViewSet, {'get': 'list', 'post': 'create'})
+async def grade_list(request):
+    return await list_response(await viewset_for(GradeViewSet, request, 'list'))
+
+
+@read_view(PaymentViewSet, {'get': 'list', 'post': 'create'})
+async def payment_list(request):
+    return await list_response(await viewset_for(PaymentViewSet, request, 'list'))
+
+
+@read_view(StudentViewSet, {'get': 'timetable'})
+async def student_timetable(request, pk):
+    from academic.timetable import aget_section_timetable
+
+    view = await viewset_for(StudentViewSet, request, 'timetable', pk=pk)
+    student = await view.filter_queryset(view.get_queryset()).filter(pk=pk).afirst()
+    if student is None:
+        raise NotFound()
+    grid = await aget_section_timetable(student.current_grade, student.section)
+    return api_response({'student': student.id, **grid})
+
+
+@read_view(ExchangeRateViewSet, {'get': 'current'})
+async def current_rate(request):
+    from administrative.rates import rate_service
+
+    rate = await rate_service.acurrent()
+    return api_response({'rate': rate or '36.50'})  # Same fallback as ExchangeRateViewSet.current
@@ -0,0 +1,50 @@
+"""
+System checks for settings the code relies on but Django can't validate.
+
+Report-card versions and PDFs, timetable and payment-stats generations, list
+versions (core.versions), the BCV rate and its refresh lock all live in the
+cache. With a per-process backend each worker keeps its own copy: a write
+handled by one worker never invalidates what the others serve, and what a
+management command stores (refresh_bcv_rate, generate_report_cards) is gone
+when it exits.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def process_local_caches():
+    aliases = {'default', settings.REPLICA_STICKY_CACHE}
+    if settings.AUTH_TOKEN_SHARED_CACHE:
+        aliases.add(settings.AUTH_TOKEN_SHARED_CACHE)
+    return sorted(alias for alias in aliases
+                  if settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_BACKENDS)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    aliases = process_local_caches()
+    if not aliases or settings.WEB_WORKERS <= 1:
+        return []
+    return [Error(
+        f'Per-process CACHES {aliases} with WEB_CONCURRENCY={settings.WEB_WORKERS}.',
+        hint='Set REDIS_URL (or point CACHES at Memcached) so the workers share versions and rendered data.',
+        id='core.E001',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_deploy(app_configs, **kwargs):
+    aliases = process_local_caches()
+    if not aliases or settings.WEB_WORKERS > 1:
+        return []
+    return [Warning(
+        f'Per-process CACHES {aliases}: management commands and cron jobs write to a '
+        'cache the web server never reads.',
+        hint='Set REDIS_URL (or point CACHES at Memcached).',
+        id='core.W001',
+    )]
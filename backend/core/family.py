@@ -0,0 +1,194 @@
+"""
+Everything a representative's first screen shows, for all of their children
+at once: outstanding payment concepts, recent payments, the current lapso's
+averages and the next classes.
+
+Built from a fixed number of queries however many children there are
+(students, concepts, paid/pending concepts, recent payments, current lapsos,
+scores, schedules), so the page is one round trip instead of one per child
+and per section.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import F, Max, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from academic.models import Evaluation, Schedule, Student, StudentSubjectScore
+from academic.timetable import DAYS
+from administrative.models import Payment, PaymentConcept
+
+RECENT_PAYMENTS = 5
+NEXT_CLASSES = 3
+# A concept counts as paid once a payment for it is approved or under review
+SETTLING_STATUSES = ('PENDING', 'VERIFIED')
+
+
+def family_dashboard(representative, now=None):
+    now = timezone.localtime(now)
+    children = list(
+        Student.objects.filter(representative=representative)
+        .values('id', 'first_name', 'last_name', 'id_number', 'current_grade', 'section')
+        .order_by('last_name', 'id')
+    )
+    if not children:
+        return {'generated_at': now, 'children': []}
+
+    ids = [child['id'] for child in children]
+    sections = {(child['current_grade'], child['section']) for child in children}
+    outstanding = outstanding_concepts(ids, school_year_start(now))
+    payments = recent_payments(ids)
+    lapsos = current_lapsos(sections, now.date())
+    scores = lapso_scores(ids)
+    classes = next_classes(sections, now)
+
+    for child in children:
+        section = (child['current_grade'], child['section'])
+        concepts = outstanding[child['id']]
+        child['outstanding_concepts'] = concepts
+        child['outstanding_usd'] = f"{sum(Decimal(concept['amount_usd']) for concept in concepts):.2f}"
+        child['recent_payments'] = payments[child['id']]
+        child['lapso'] = lapso_summary(lapsos.get(section, 1), scores[child['id']])
+        child['next_classes'] = classes[section]
+    return {'generated_at': now, 'children': children}
+
+
+def school_year_start(now):
+    month = settings.SCHOOL_YEAR_START_MONTH
+    year = now.year if now.month >= month else now.year - 1
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def outstanding_concepts(student_ids, since):
+    """
+    {student id: [concept, ...]} of this school year's concepts (created
+    since ``since``) with no pending/approved payment.
+    """
+    concepts = [
+        {**row, 'amount_usd': f"{row['amount_usd']:.2f}"}
+        for row in PaymentConcept.objects.filter(created_at__gte=since)
+        .values('id', 'name', 'amount_usd').order_by('id')
+    ]
+    settled = defaultdict(set)
+    rows = (
+        Payment.objects.filter(student_id__in=student_ids, status__in=SETTLING_STATUSES)
+        .values_list('student_id', 'payment_concept_id', 'concept')
+    )
+    for student_id, concept_id, text in rows:
+        # Older payments only carry the concept's name (see Payments.tsx)
+        settled[student_id].update((('id', concept_id), ('name', text)))
+    return {
+        student_id: [
+            concept for concept in concepts
+            if ('id', concept['id']) not in settled[student_id] and ('name', concept['name']) not in settled[student_id]
+        ]
+        for student_id in student_ids
+    }
+
+
+def recent_payments(student_ids):
+    """{student id: [payment, ...]}, newest first, RECENT_PAYMENTS per student in one query."""
+    rows = (
+        Payment.objects.filter(student_id__in=student_ids)
+        .annotate(position=Window(RowNumber(), partition_by=F('student_id'),
+                                  order_by=[F('date_reported').desc(), F('id').desc()]))
+        .filter(position__lte=RECENT_PAYMENTS)
+        .values('id', 'student_id', 'concept', 'payment_concept_id', 'payment_concept__name', 'amount_usd',
+                'amount_bs', 'status', 'date_reported', 'reference_number', 'admin_note')
+        .order_by('student_id', 'position')
+    )
+    payments = defaultdict(list)
+    for row in rows:
+        student_id = row.pop('student_id')
+        row['concept'] = row.pop('payment_concept__name') or row['concept']
+        row['amount_usd'], row['amount_bs'] = f"{row['amount_usd']:.2f}", f"{row['amount_bs']:.2f}"
+        payments[student_id].append(row)
+    return payments
+
+
+def section_filter(sections, prefix):
+    return reduce(or_, [Q(**{f'{prefix}grade_level': grade, f'{prefix}section': section})
+                        for grade, section in sections])
+
+
+def current_lapsos(sections, today):
+    """{(grade, section): lapso of the latest evaluation held so far}; sections without any are in lapso 1."""
+    rows = (
+        Evaluation.objects.filter(section_filter(sections, 'subject__'), date__lte=today)
+        .values('subject__grade_level', 'subject__section')
+        .annotate(lapso=Max('lapso'))
+        .order_by()
+    )
+    return {(row['subject__grade_level'], row['subject__section']): row['lapso'] for row in rows}
+
+
+def lapso_scores(student_ids):
+    rows = (
+        StudentSubjectScore.objects.filter(student_id__in=student_ids)
+        .values('student_id', 'subject_id', 'subject__name', 'lapso_1', 'lapso_2', 'lapso_3',
+                'covered_1', 'covered_2', 'covered_3')
+        .order_by('subject__name', 'subject_id')
+    )
+    scores = defaultdict(list)
+    for row in rows:
+        scores[row['student_id']].append(row)
+    return scores
+
+
+def lapso_summary(lapso, rows):
+    # score is the boletín's Sum(score * percentage / 100); average scales it
+    # to the part of the lapso graded so far, out of 20
+    subjects, averages = [], []
+    for row in rows:
+        score, covered = row[f'lapso_{lapso}'], row[f'covered_{lapso}']
+        average = score * 100 / covered if covered else None
+        if average is not None:
+            averages.append(average)
+        subjects.append({
+            'subject_id': row['subject_id'],
+            'subject': row['subject__name'],
+            'score': f'{score:.2f}' if covered else None,
+            'covered_percentage': f'{covered:.2f}',
+            'average': f'{average:.2f}' if average is not None else None,
+        })
+    overall = sum(averages) / len(averages) if averages else None
+    return {
+        'number': lapso,
+        'average': f'{overall:.2f}' if overall is not None else None,
+        'subjects': subjects,
+    }
+
+
+def next_classes(sections, now):
+    """{(grade, section): the NEXT_CLASSES classes starting after ``now``}, wrapping into next week."""
+    schedules = (
+        Schedule.objects.filter(section_filter(sections, 'subject__'), day__in=DAYS)
+        .select_related('subject__teacher__user')
+    )
+    upcoming = defaultdict(list)
+    today = now.weekday()
+    for schedule in schedules:
+        days_ahead = (DAYS.index(schedule.day) - today) % 7
+        if days_ahead == 0 and schedule.start_time <= now.time():
+            days_ahead = 7
+        subject = schedule.subject
+        teacher = subject.teacher
+        upcoming[(subject.grade_level, subject.section)].append((days_ahead, schedule.start_time, schedule.id, {
+            'day': schedule.day,
+            'date': now.date() + timedelta(days=days_ahead),
+            'start': schedule.start_time.strftime('%H:%M'),
+            'end': schedule.end_time.strftime('%H:%M'),
+            'subject': subject.name,
+            'subject_id': subject.id,
+            'teacher': teacher.user.get_full_name() if teacher else None,
+            'room': schedule.room,
+        }))
+    return defaultdict(list, {
+        section: [item for *_order, item in sorted(items, key=lambda entry: entry[:3])[:NEXT_CLASSES]]
+        for section, items in upcoming.items()
+    })
@@ -0,0 +1,94 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class Filter:
+    """Maps one query parameter onto one ORM lookup."""
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+
+    def clean(self, param, value):
+        return value
+
+    def apply(self, queryset, param, value):
+        return queryset.filter(**{self.lookup: self.clean(param, value)})
+
+
+class NumberFilter(Filter):
+    def clean(self, param, value):
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({param: 'Debe ser un número entero.'})
+
+
+class ChoiceFilter(Filter):
+    """Accepts one value or a comma separated list, e.g. ``?status=PENDING,REJECTED``."""
+
+    def __init__(self, lookup, choices):
+        super().__init__(lookup)
+        self.choices = [key for key, _label in choices]
+
+    def apply(self, queryset, param, value):
+        values = [v for v in value.split(',') if v]
+        invalid = [v for v in values if v not in self.choices]
+        if invalid:
+            raise ValidationError({param: f"Valor inválido: {', '.join(invalid)}."})
+        if len(values) == 1:
+            return queryset.filter(**{self.lookup: values[0]})
+        return queryset.filter(**{f'{self.lookup}__in': values})
+
+
+class DateFilter(Filter):
+    """
+    Inclusive date bound (``YYYY-MM-DD``). For DateTimeFields pass
+    ``datetime=True``: the bound becomes a plain comparison against the start
+    of the day so the column index is still usable (no ``__date`` cast).
+    """
+
+    def __init__(self, lookup, bound, datetime=False):
+        super().__init__(lookup)
+        assert bound in ('from', 'to')
+        self.bound = bound
+        self.datetime = datetime
+
+    def apply(self, queryset, param, value):
+        day = parse_date(value) if value else None
+        if day is None:
+            raise ValidationError({param: 'Fecha inválida, use el formato AAAA-MM-DD.'})
+        if not self.datetime:
+            op = 'gte' if self.bound == 'from' else 'lte'
+            return queryset.filter(**{f'{self.lookup}__{op}': day})
+        if self.bound == 'from':
+            return queryset.filter(**{f'{self.lookup}__gte': self.start_of(day)})
+        return queryset.filter(**{f'{self.lookup}__lt': self.start_of(day + timedelta(days=1))})
+
+    @staticmethod
+    def start_of(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """
+    Applies the view's declarative ``query_filters`` mapping::
+
+        query_filters = {
+            'status': ChoiceFilter('status', Payment.STATUS_CHOICES),
+            'student_id': NumberFilter('student_id'),
+        }
+
+    Parameters that are absent or empty are ignored.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for param, query_filter in getattr(view, 'query_filters', {}).items():
+            value = request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            queryset = query_filter.apply(queryset, param, value)
+        return queryset
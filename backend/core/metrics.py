@@ -0,0 +1,194 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    In-process metrics, keyed by (view, method). Each worker process keeps
+    its own; Prometheus sums them when every worker is scraped, and a single
+    worker's numbers are still enough to spot a slow endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.queries = {}
+        self.sql_seconds = {}
+        self.size = {}
+
+    def record(self, view, method, status, duration, queries, sql_seconds, size=None):
+        key = (view, method)
+        with self._lock:
+            status_key = (view, method, str(status))
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(duration)
+            self.queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(queries)
+            self.sql_seconds[key] = self.sql_seconds.get(key, 0.0) + sql_seconds
+            if size is not None:
+                self.size.setdefault(key, Histogram(SIZE_BUCKETS)).observe(size)
+
+    def reset(self):
+        with self._lock:
+            self.__init__()
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP http_requests_total Requests handled, by view, method and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (view, method, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {value}')
+
+            lines += _histogram('http_request_duration_seconds', 'Time spent producing the response.', self.latency)
+            lines += _histogram('http_request_db_queries', 'Database queries per request.', self.queries)
+
+            lines += [
+                '# HELP http_request_db_seconds_total Time spent in SQL.',
+                '# TYPE http_request_db_seconds_total counter',
+            ]
+            for (view, method), value in sorted(self.sql_seconds.items()):
+                lines.append(f'http_request_db_seconds_total{_labels(view=view, method=method)} {value:.6f}')
+
+            lines += _histogram('http_response_size_bytes', 'Response body size (non-streaming responses).', self.size)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram(name, help_text, histograms):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for (view, method), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(view=view, method=method, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(view=view, method=method)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(view=view, method=method)} {histogram.count}')
+    return lines
+
+
+registry = Registry()
+
+
+class QueryTimer:
+    """execute_wrapper that counts queries and the time spent running them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def view_label(request):
+    """
+    ``StudentViewSet.report_card`` for DRF routes, the URL name otherwise.
+    Unresolved paths share one label so 404 scans can't blow up cardinality.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    cls = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None)
+    if cls is not None:
+        action = (actions or {}).get(request.method.lower(), request.method.lower())
+        return f'{cls.__name__}.{action}'
+    return match.view_name or getattr(match.func, '__name__', 'unknown')
+
+
+class MetricsMiddleware:
+    """
+    Records count, latency, query count, SQL time and response size per view,
+    and reports the timings to the browser in a ``Server-Timing`` header.
+    Runs natively under both WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with timing_queries(timer):
+            response = self.get_response(request)
+        return self.finish(request, response, timer, start)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with timing_queries(timer):
+            response = await self.get_response(request)
+        return self.finish(request, response, timer, start)
+
+    def finish(self, request, response, timer, start):
+        duration = time.perf_counter() - start
+
+        # Streaming bodies are produced after this returns; only their time
+        # to first byte is measured.
+        size = None if response.streaming else len(response.content)
+        registry.record(view_label(request), request.method, response.status_code,
+                        duration, timer.count, timer.seconds, size)
+        response['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, '
+            f'db;dur={timer.seconds * 1000:.1f};desc="{timer.count} queries"'
+        )
+        return response
+
+
+@contextmanager
+def timing_queries(timer):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        yield
+
+
+def metrics_view(request):
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
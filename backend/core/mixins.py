@@ -0,0 +1,90 @@
+import hashlib
+
+from django.conf import settings
+
+
+class RelatedLoadingMixin:
+    """
+    Loads the relations a viewset's serializer reads in a fixed number of
+    queries, whatever the page size:
+
+        select_related_fields = ('student__representative', 'payment_concept')
+        prefetch_related_fields = ('schedules',)
+
+    Applied in filter_queryset so it covers the get_queryset overrides of
+    each viewset, but only for the actions that render the serializer;
+    custom actions load what they need themselves.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    related_actions = ('list', 'retrieve', 'update', 'partial_update')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.related_actions:
+            return queryset
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['forbid_lazy_loads'] = (
+            settings.STRICT_RELATED_LOADING and self.action in ('list', 'retrieve')
+        )
+        return context
+
+
+class VersionedListMixin:
+    """
+    Conditional, cached list responses for reference data:
+
+        versioned_models = (Subject, Schedule)
+
+    The ETag comes from those models' version tokens (core.versions), the
+    query string and list_cache_scope(). A matching If-None-Match or
+    If-Modified-Since gets a 304 before any queryset is built; otherwise the
+    rendered JSON is served from the cache until one of the models changes.
+    """
+    versioned_models = ()
+    list_cache_timeout = 60 * 60 * 24
+
+    def list_cache_scope(self):
+        # Override when the list depends on the user
+        return 'all'
+
+    def list(self, request, *args, **kwargs):
+        from django.core.cache import cache
+        from django.http import HttpResponse
+        from django.utils.cache import get_conditional_response
+        from django.utils.http import http_date
+        from .versions import get_versions
+
+        versions = get_versions(self.versioned_models)
+        digest = hashlib.sha256(repr((
+            type(self).__name__, request.get_full_path(), self.list_cache_scope(),
+            sorted((label, version['token']) for label, version in versions.items()),
+        )).encode()).hexdigest()
+        etag = f'"{digest}"'
+        last_modified = int(max(version['modified'] for version in versions.values()))
+        headers = {'ETag': etag, 'Last-Modified': http_date(last_modified), 'Cache-Control': 'private, no-cache'}
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if request.accepted_renderer.format != 'json':
+                # Browsable API: rendered as usual
+                response = super().list(request, *args, **kwargs)
+            else:
+                key = f'versioned-list:{digest}'
+                body = cache.get(key)
+                if body is None:
+                    data = super().list(request, *args, **kwargs).data
+                    body = request.accepted_renderer.render(data, request.accepted_media_type,
+                                                            self.get_renderer_context())
+                    cache.set(key, body, self.list_cache_timeout)
+                response = HttpResponse(body, content_type=request.accepted_renderer.media_type)
+        for header, value in headers.items():
+            response[header] = value
+        return response
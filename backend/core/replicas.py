@@ -0,0 +1,203 @@
+"""
+Read replicas: GET/HEAD requests read from one of ``DATABASE_REPLICAS``,
+everything else (and everything outside a request) uses ``default``.
+
+- A client that has just written (any POST/PUT/PATCH/DELETE) reads from the
+  primary for ``REPLICA_STICKY_SECONDS``, so it sees its own changes.
+- Replicas are probed at most every ``REPLICA_CHECK_INTERVAL`` seconds per
+  process; one that is down or more than ``REPLICA_MAX_LAG_SECONDS`` behind
+  is skipped until the next probe. If none is usable, reads go to the primary.
+- Reads inside a transaction on the primary stay on the primary.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Alias the current request reads from; None means the primary
+_read_alias = ContextVar('read_alias', default=None)
+
+# Seconds behind the primary; 0 on the primary itself or when fully replayed
+# (pg_last_xact_replay_timestamp() alone keeps growing on an idle primary)
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would write instances back where they were read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaHealth:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}  # alias: (usable, monotonic time of the probe)
+
+    def probe(self, alias):
+        try:
+            connection = connections[alias]
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(LAG_SQL)
+                    lag = float(cursor.fetchone()[0])
+                else:
+                    cursor.execute('SELECT 1')
+                    lag = 0.0
+        except DatabaseError:
+            logger.warning('Read replica %s is unreachable', alias, exc_info=True)
+            return False
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning('Read replica %s is %.1fs behind', alias, lag)
+            return False
+        return True
+
+    def usable(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(alias)
+        if checked is not None and now - checked[1] < settings.REPLICA_CHECK_INTERVAL:
+            return checked[0]
+        usable = self.probe(alias)
+        with self._lock:
+            self._checked[alias] = (usable, now)
+        return usable
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._checked[alias] = (False, time.monotonic())
+
+    def choose(self):
+        replicas = list(settings.DATABASE_REPLICAS)
+        random.shuffle(replicas)
+        return next((alias for alias in replicas if self.usable(alias)), None)
+
+
+health = ReplicaHealth()
+
+
+def client_key(request):
+    # Token or session cookie: the same credential the next request will send
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return 'replicas:primary:' + hashlib.sha1(credential.encode()).hexdigest()
+
+
+def choose_replica():
+    # Inside a transaction on the primary (e.g. TestCase) the router keeps
+    # reads there anyway, so don't probe the replicas for nothing. Sync, so
+    # under ASGI it runs where the ORM does and sees the same connection.
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return None
+    return health.choose()
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = client_key(request)
+        alias = None
+        if request.method in SAFE_METHODS and not (key and caches[settings.REPLICA_STICKY_CACHE].get(key)):
+            alias = choose_replica()
+        request.read_replica = alias
+
+        token = _read_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.finish(request, response, key)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = client_key(request)
+        alias = None
+        if request.method in SAFE_METHODS and not (key and await caches[settings.REPLICA_STICKY_CACHE].aget(key)):
+            alias = await sync_to_async(choose_replica)()
+        request.read_replica = alias
+
+        token = _read_alias.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.finish(request, response, key)
+
+    def finish(self, request, response, key):
+        if request.method not in SAFE_METHODS and key:
+            caches[settings.REPLICA_STICKY_CACHE].set(key, True, settings.REPLICA_STICKY_SECONDS)
+        if response.streaming and request.read_replica:
+            response.streaming_content = _reading_from(request.read_replica, response.streaming_content)
+        return response
+
+    def process_exception(self, request, exception):
+        # A replica that failed mid-request: the request is a read, so run
+        # the view again on the primary instead of answering with a 500.
+        alias = getattr(request, 'read_replica', None)
+        if alias is None or not isinstance(exception, DatabaseError) or health.probe(alias):
+            return None
+        health.mark_down(alias)
+        request.read_replica = None
+        _read_alias.set(None)
+        match = request.resolver_match
+        if iscoroutinefunction(match.func):
+            # Called from a worker thread under ASGI
+            return async_to_sync(match.func)(request, *match.args, **match.kwargs)
+        return match.func(request, *match.args, **match.kwargs)
+
+
+def _reading_from(alias, content):
+    # Streaming bodies are produced after the middleware returns
+    iterator = iter(content)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
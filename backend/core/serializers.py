@@ -1,9 +1,44 @@
+import re
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections, transaction
 from rest_framework import serializers
+from academic.scores import schedule_refresh
+from academic.timetable import DAYS
 from users.models import CustomUser
 from academic.models import Student, Teacher, Subject, Evaluation, Grade, Schedule
-from administrative.models import Payment, ExchangeRate, PaymentConcept
+from administrative.models import Payment, ExchangeRate, PaymentConcept, ProofUpload
+
+class LazyLoadError(RuntimeError):
+    pass
+
+@contextmanager
+def forbid_queries(label):
+    def blocker(execute, sql, params, many, context):
+        raise LazyLoadError(
+            f"{label} lazily loaded a relation while rendering: {sql}. "
+            "Add it to the view's select_related_fields/prefetch_related_fields."
+        )
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(blocker))
+        yield
+
+class StrictLoadingMixin:
+    """
+    When the view puts ``forbid_lazy_loads`` in the context (see
+    STRICT_RELATED_LOADING), rendering an instance must not touch the
+    database: every relation it reads has to be select/prefetched already.
+    """
+    def to_representation(self, instance):
+        if not self.context.get('forbid_lazy_loads'):
+            return super().to_representation(instance)
+        with forbid_queries(type(self).__name__):
+            return super().to_representation(instance)
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -27,12 +62,12 @@ class UserSerializer(serializers.ModelSerializer):
             instance.visible_password = password
         return super().update(instance, validated_data)
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Student
         fields = '__all__'
 
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_id = serializers.PrimaryKeyRelatedField(
         queryset=CustomUser.objects.all(), source='user', write_only=True
@@ -42,7 +77,7 @@ class TeacherSerializer(serializers.ModelSerializer):
         model = Teacher
         fields = '__all__'
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Schedule
         fields = '__all__'
@@ -76,19 +111,79 @@ class ScheduleSerializer(serializers.ModelSerializer):
             
         return data
 
-class SubjectSerializer(serializers.ModelSerializer):
+class ScheduleRowSerializer(serializers.Serializer):
+    # Plain subject id: subjects are resolved for the whole batch at once
+    subject = serializers.IntegerField()
+    day = serializers.ChoiceField(choices=DAYS)
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    room = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+
+    def validate_room(self, value):
+        return value.strip()
+
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("La hora de inicio debe ser anterior a la hora de fin.")
+        return data
+
+class BulkScheduleSerializer(serializers.Serializer):
+    """
+    Timetable import: validates every row, checks section/teacher/room
+    clashes in memory against one load of the relevant stored schedules
+    (academic.timetable) and writes the accepted rows in one transaction.
+    """
+    schedules = ScheduleRowSerializer(many=True, allow_empty=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate_schedules(self, rows):
+        ids = {row['subject'] for row in rows}
+        self.subjects = Subject.objects.in_bulk(ids)
+        missing = ids - set(self.subjects)
+        if missing:
+            raise serializers.ValidationError([
+                {'subject': ['La materia no existe.']} if row['subject'] in missing else {}
+                for row in rows
+            ])
+        return rows
+
+    def create(self, validated_data):
+        from academic.timetable import check_schedules, invalidate_timetables
+        from .versions import bump_on_commit
+
+        rows = validated_data['schedules']
+        accepted, conflicts = check_schedules(rows, self.subjects)
+        created = []
+        if not validated_data['dry_run'] and accepted:
+            with transaction.atomic():
+                created = Schedule.objects.bulk_create([
+                    Schedule(subject_id=rows[i]['subject'], day=rows[i]['day'], start_time=rows[i]['start_time'],
+                             end_time=rows[i]['end_time'], room=rows[i]['room'])
+                    for i in accepted
+                ])
+                # bulk_create sends no signals
+                transaction.on_commit(invalidate_timetables)
+                bump_on_commit(Schedule)
+        return {
+            'accepted': accepted,
+            'created': [schedule.pk for schedule in created],
+            'conflicts': conflicts,
+            'dry_run': validated_data['dry_run'],
+        }
+
+class SubjectSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     schedules = ScheduleSerializer(many=True, read_only=True)
     
     class Meta:
         model = Subject
         fields = '__all__'
 
-class EvaluationSerializer(serializers.ModelSerializer):
+class EvaluationSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Evaluation
         fields = '__all__'
 
-class GradeSerializer(serializers.ModelSerializer):
+class GradeSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     evaluation_name = serializers.CharField(source='evaluation.name', read_only=True)
     evaluation_date = serializers.DateField(source='evaluation.date', read_only=True)
     evaluation_lapso = serializers.IntegerField(source='evaluation.lapso', read_only=True)
@@ -99,12 +194,78 @@ class GradeSerializer(serializers.ModelSerializer):
         model = Grade
         fields = ['id', 'student', 'evaluation', 'score', 'evaluation_name', 'evaluation_date', 'evaluation_lapso', 'subject_name', 'subject_id']
 
-class PaymentConceptSerializer(serializers.ModelSerializer):
+class GradeScoreSerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    score = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=0, max_value=20)
+
+class BulkGradeSerializer(serializers.Serializer):
+    """
+    Full score vector for one evaluation (passed in context['evaluation']).
+    Validated in one pass and written with a single
+    INSERT ... ON CONFLICT (student_id, evaluation_id) DO UPDATE.
+    """
+    grades = GradeScoreSerializer(many=True, allow_empty=False)
+
+    def validate_grades(self, rows):
+        subject = self.context['evaluation'].subject
+        ids = [row['student'] for row in rows]
+        # Only students of the subject's grade/section can be graded
+        enrolled = set(Student.objects.filter(
+            id__in=ids, current_grade=subject.grade_level, section=subject.section
+        ).values_list('id', flat=True))
+
+        errors = []
+        seen = set()
+        for row in rows:
+            if row['student'] in seen:
+                errors.append({'student': ['Estudiante repetido en la carga.']})
+            elif row['student'] not in enrolled:
+                errors.append({'student': ['El estudiante no pertenece a la sección de esta materia.']})
+            else:
+                errors.append({})
+            seen.add(row['student'])
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        evaluation = self.context['evaluation']
+        rows = validated_data['grades']
+        with transaction.atomic():
+            previous = dict(Grade.objects.filter(
+                evaluation=evaluation, student_id__in=[row['student'] for row in rows]
+            ).values_list('student_id', 'score'))
+            grades = Grade.objects.bulk_create(
+                [Grade(student_id=row['student'], evaluation=evaluation, score=row['score']) for row in rows],
+                update_conflicts=True,
+                unique_fields=['student', 'evaluation'],
+                update_fields=['score'],
+            )
+            # bulk_create sends no signals: refresh aggregates/report cards here
+            schedule_refresh([(row['student'], evaluation.subject_id) for row in rows])
+
+        results = []
+        for grade in grades:
+            if grade.student_id not in previous:
+                row_status = 'created'
+            elif previous[grade.student_id] != grade.score:
+                row_status = 'updated'
+            else:
+                row_status = 'unchanged'
+            results.append({
+                'student': grade.student_id,
+                'grade': grade.pk,
+                'score': str(grade.score),
+                'status': row_status,
+            })
+        return results
+
+class PaymentConceptSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = PaymentConcept
         fields = '__all__'
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.first_name', read_only=True)
     student_lastname = serializers.CharField(source='student.last_name', read_only=True)
     student_grade = serializers.CharField(source='student.current_grade', read_only=True)
@@ -121,11 +282,100 @@ class PaymentSerializer(serializers.ModelSerializer):
     payment_concept_name = serializers.CharField(source='payment_concept.name', read_only=True)
     payment_concept_amount = serializers.DecimalField(source='payment_concept.amount_usd', max_digits=10, decimal_places=2, read_only=True)
 
+    # Small WebP copies for lists and modals; proof_image stays the original,
+    # only meant for zooming in. Until they exist the original is returned.
+    proof_thumbnail_url = serializers.SerializerMethodField()
+    proof_preview_url = serializers.SerializerMethodField()
+
+    # Id of a committed chunked upload (uploads/), instead of a multipart proof_image
+    upload = serializers.PrimaryKeyRelatedField(queryset=ProofUpload.objects.all(), write_only=True, required=False)
+
     class Meta:
         model = Payment
-        fields = '__all__'
+        exclude = ('proof_thumbnail', 'proof_preview', 'derivatives_failed')
+        extra_kwargs = {'proof_image': {'required': False}}
+
+    def validate_upload(self, upload):
+        request = self.context.get('request')
+        if request and upload.owner_id != request.user.id:
+            raise serializers.ValidationError('Carga no encontrada')
+        if upload.status != 'COMPLETE':
+            raise serializers.ValidationError('La carga no está completa o ya fue usada')
+        return upload
+
+    def validate(self, data):
+        if self.instance is None and not data.get('proof_image') and not data.get('upload'):
+            raise serializers.ValidationError({'proof_image': 'Adjunte el comprobante o indique una carga completada'})
+        return data
+
+    def create(self, validated_data):
+        from administrative.uploads import UploadError, attach_upload
+
+        upload = validated_data.pop('upload', None)
+        if upload is None:
+            return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                return attach_upload(upload, Payment(**validated_data))
+        except UploadError as exc:
+            raise serializers.ValidationError({'upload': str(exc)})
+
+    def update(self, instance, validated_data):
+        validated_data.pop('upload', None)
+        return super().update(instance, validated_data)
+
+    def get_proof_thumbnail_url(self, obj):
+        return self.derivative_url(obj, 'thumbnail')
+
+    def get_proof_preview_url(self, obj):
+        return self.derivative_url(obj, 'preview')
+
+    def derivative_url(self, obj, kind):
+        from administrative.images import DERIVATIVES, is_current, needs_derivatives, schedule_derivatives
+
+        if not obj.proof_image:
+            return None
+        if is_current(obj, kind):
+            url = getattr(obj, DERIVATIVES[kind][0]).url
+        else:
+            # Rows uploaded before the pipeline existed: queue them on first
+            # request (never rendered here); failed ones stay on the original
+            if needs_derivatives(obj):
+                schedule_derivatives(obj.pk, background=True)
+            url = obj.proof_image.url
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class ReconcileSerializer(serializers.Serializer):
+    # Tolerance/days default to settings.RECONCILIATION_* when left out
+    file = serializers.FileField(error_messages={'required': 'Adjunte el estado de cuenta en CSV'})
+    amount_tolerance = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0,
+                                                required=False, allow_null=True)
+    days = serializers.IntegerField(min_value=0, max_value=60, required=False, allow_null=True)
+
+class ProofUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProofUpload
+        fields = ['id', 'filename', 'size', 'offset', 'checksum', 'status', 'chunk_size']
+        read_only_fields = ['offset', 'status']
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('El archivo está vacío')
+        return value
+
+    def validate_checksum(self, value):
+        if not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError('Debe ser el SHA-256 del archivo en hexadecimal')
+        return value.lower()
+
+    def get_chunk_size(self, obj):
+        # Suggested PUT size; any size works
+        return settings.PROOF_UPLOAD_CHUNK_BYTES
 
-class ExchangeRateSerializer(serializers.ModelSerializer):
+class ExchangeRateSerializer(StrictLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = ExchangeRate
         fields = '__all__'
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import importlib.util
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +48,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack; see core/metrics.py.
+    'core.metrics.MetricsMiddleware',
+    # Picks the database GET requests read from; see core/replicas.py.
+    'core.replicas.ReplicaMiddleware',
+    # Under ASGI, resolves against ASYNC_ROOT_URLCONF; see core/async_views.py.
+    'core.async_views.AsyncRoutesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -57,6 +65,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'core.urls'
+# Used instead under ASGI: the async read endpoints, then ROOT_URLCONF's routes
+ASYNC_ROOT_URLCONF = 'core.urls_async'
 
 TEMPLATES = [
     {
@@ -80,16 +90,66 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# Connection settings come from the environment (DB_NAME, DB_USER,
+# DB_PASSWORD, DB_HOST, DB_PORT).
+#
+# With psycopg 3 and psycopg_pool installed, connections come from Django's
+# pool (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE per process, checked before each
+# use) and queries use server-side binding, so the ones a viewset repeats are
+# prepared once per connection after DB_PREPARE_THRESHOLD executions. Set
+# DB_PREPARED_STATEMENTS=0 behind PgBouncer in transaction mode (< 1.21).
+# With psycopg2, connections persist DB_CONN_MAX_AGE seconds per thread and
+# are health-checked on reuse instead. DB_POOL_MAX_SIZE=0 or
+# DB_CONN_MAX_AGE=0 restores one connection per request.
+DB_POOL_AVAILABLE = all(importlib.util.find_spec(name) for name in ('psycopg', 'psycopg_pool'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'ueagru_db',
-        'USER': 'postgres',
-        'PASSWORD': '1100', # Change this to your password
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'ueagru_db'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'OPTIONS': {},
     }
 }
+if DB_POOL_AVAILABLE and DB_POOL_MAX_SIZE:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': DB_POOL_MAX_SIZE,
+        # Seconds a request waits for a free connection before failing
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+    if os.environ.get('DB_PREPARED_STATEMENTS', '1') == '1':
+        DATABASES['default']['OPTIONS'].update({
+            'server_side_binding': True,
+            'prepare_threshold': int(os.environ.get('DB_PREPARE_THRESHOLD', 5)),
+        })
+else:
+    # DB_POOL_MAX_SIZE=0 turns connection reuse off here too
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60 if DB_POOL_MAX_SIZE else 0))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas (core.replicas): one alias per host in DATABASE_REPLICA_HOSTS
+# (comma separated), same credentials as default. To try the routing locally,
+# DATABASE_REPLICA_HOSTS=localhost adds a second alias on the same database.
+for number, host in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'connect_timeout': 2},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Reads stay on the primary this long after a client writes. Shared between
+# workers only if this CACHES alias is (Redis/Memcached).
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_CACHE = 'default'
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_CHECK_INTERVAL = 5
 
 
 # Password validation
@@ -146,6 +206,10 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+# Chunked proof uploads send Content-Range and read Upload-Offset back
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = [*default_headers, 'content-range']
+CORS_EXPOSE_HEADERS = ['Upload-Offset']
 
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:5173",
@@ -153,3 +217,75 @@ CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+
+REST_FRAMEWORK = {
+    # Keyset pagination on every list endpoint; see core/pagination.py.
+    # Old clients can opt out with ?unpaginated=1 (capped, see max_unpaginated_rows).
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    # Declarative ?param= filters per viewset; see core/filters.py.
+    'DEFAULT_FILTER_BACKENDS': ['core.filters.QueryParamFilterBackend'],
+}
+
+# Raise core.serializers.LazyLoadError when a list/retrieve serializer queries
+# the database for a relation the view did not select/prefetch. Enable it in
+# tests with override_settings(STRICT_RELATED_LOADING=True).
+STRICT_RELATED_LOADING = False
+
+# Rendered report cards, list/timetable/stats versions and the BCV rate.
+# Every worker and management command must see the same cache, so set
+# REDIS_URL in production; the per-process fallback is only valid for a
+# single worker (core.checks refuses it when WEB_CONCURRENCY > 1).
+WEB_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# BCV exchange rate (administrative.rates). The URL can point at a local stub
+# serving the same markup for testing.
+BCV_URL = os.environ.get('BCV_URL', 'https://www.bcv.org.ve')
+BCV_TIMEOUT = 10
+BCV_REFRESH_SECONDS = 30 * 60
+BCV_BACKGROUND_REFRESH = True
+BCV_BREAKER_THRESHOLD = 3
+BCV_BREAKER_COOLDOWN = 5 * 60
+
+# Cached API token lookups (users.authentication.CachedTokenAuthentication).
+# Set AUTH_TOKEN_SHARED_CACHE to a CACHES alias backed by Redis/Memcached to
+# share resolved tokens between workers. request.user then only has
+# users.authentication.CACHED_USER_FIELDS loaded; other fields cost a query.
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_SHARED_CACHE = None
+
+# Prometheus-text metrics at /metrics (core.metrics). Only these client
+# addresses may scrape it; None allows everyone.
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Resumable payment proof uploads (administrative.uploads). Partial files
+# live outside MEDIA_ROOT so they are never served.
+PROOF_UPLOAD_DIR = BASE_DIR / 'uploads'
+PROOF_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+PROOF_UPLOAD_CHUNK_BYTES = 256 * 1024
+PROOF_UPLOAD_EXPIRY_HOURS = 24
+
+# Bank statement reconciliation (administrative.reconciliation): references
+# are compared on their last digits, amounts in Bs and dates with tolerance.
+RECONCILIATION_REFERENCE_DIGITS = 6
+RECONCILIATION_AMOUNT_TOLERANCE = '0.01'
+RECONCILIATION_DAYS = 3
+
+# Representative dashboard (core.family): only payment concepts created since
+# the start of the current school year (this month, day 1) count as owed.
+SCHOOL_YEAR_START_MONTH = 9
@@ -0,0 +1,26 @@
+"""Helpers for responses built while they are streamed."""
+import io
+
+
+class Pipe(io.RawIOBase):
+    """
+    Write-only, non-seekable sink for file writers (zipfile) whose output is
+    streamed: write into it, then ``drain()`` what was written since the last
+    call. Being unseekable, zipfile writes data descriptors instead of seeking
+    back to fill in the headers.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
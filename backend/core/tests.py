@@ -0,0 +1,253 @@
+import importlib.util
+import os
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, router
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from academic.models import Evaluation, Grade, Schedule, Student, Subject
+from administrative.models import Payment, PaymentConcept
+from users.models import CustomUser
+from . import settings as settings_module
+from .metrics import registry
+from .replicas import ReplicaRouter, health
+from .views import StudentViewSet
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'needs a replica alias, e.g. DATABASE_REPLICA_HOSTS=localhost')
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    core.replicas with a replica alias mirroring default (TEST MIRROR), so
+    both aliases see the same rows. TransactionTestCase: inside TestCase's
+    transaction every read stays on the primary.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        health._checked.clear()
+        self.replica = settings.DATABASE_REPLICAS[0]
+        self.admin = CustomUser.objects.create(username='admin', role='ADMINISTRADOR')
+        Student.objects.create(representative=self.admin, first_name='Juan', last_name='Pérez',
+                               id_number='V-3.000.000', birth_date=date(2012, 1, 1),
+                               current_grade='1er Año', section='A')
+        self.client = self.client_for(self.admin)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def reads(self, client, method='get', url='/api/students/', data=None):
+        """The aliases the router picked while serving the request."""
+        aliases = []
+        original = ReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            aliases.append(original(router, model, **hints))
+            return aliases[-1]
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            response = getattr(client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300)
+        return set(aliases)
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.reads(self.client), {self.replica})
+
+    def test_a_write_keeps_the_clients_reads_on_the_primary(self):
+        self.reads(self.client, 'post', '/api/payment-concepts/', {'name': 'Inscripción', 'amount_usd': '80.00'})
+        self.assertEqual(self.reads(self.client), {DEFAULT_DB_ALIAS})
+        # Other clients are unaffected
+        other = CustomUser.objects.create(username='oficina', role='OFICINISTA')
+        self.assertEqual(self.reads(self.client_for(other)), {self.replica})
+
+    def test_unhealthy_replica_sends_reads_to_the_primary(self):
+        health.mark_down(self.replica)
+        self.assertEqual(self.reads(self.client), {DEFAULT_DB_ALIAS})
+
+    def test_replica_failing_mid_request_is_retried_on_the_primary(self):
+        original = StudentViewSet.get_queryset
+
+        def get_queryset(view):
+            if router.db_for_read(Student) != DEFAULT_DB_ALIAS:
+                raise OperationalError('replica went away')
+            return original(view)
+
+        with mock.patch.object(StudentViewSet, 'get_queryset', get_queryset), \
+                mock.patch.object(health, 'probe', return_value=False):
+            health._checked[self.replica] = (True, float('inf'))  # skip the first probe
+            response = self.client.get('/api/students/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertFalse(health._checked[self.replica][0])
+
+
+class MetricsTests(APITestCase):
+    """Per-view counters and histograms (core.metrics), scraped from /metrics."""
+
+    def setUp(self):
+        registry.reset()
+        self.client.force_authenticate(CustomUser.objects.create(username='admin', role='ADMINISTRADOR'))
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().splitlines()
+
+    def test_requests_are_recorded_per_view(self):
+        response = self.client.get('/api/students/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.client.get('/api/students/')
+        self.client.get('/no-such-page/')
+        lines = self.scrape()
+        self.assertIn('http_requests_total{view="StudentViewSet.list",method="GET",status="200"} 2', lines)
+        self.assertIn('http_requests_total{view="unmatched",method="GET",status="404"} 1', lines)
+        self.assertIn('http_request_duration_seconds_count{view="StudentViewSet.list",method="GET"} 2', lines)
+        self.assertIn('http_request_db_queries_bucket{view="StudentViewSet.list",method="GET",le="+Inf"} 2', lines)
+
+    def test_only_allowed_addresses_can_scrape(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.8').status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=None):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.8').status_code, 200)
+
+
+class AsyncRouteTests(APITestCase):
+    """ASGI requests resolve against ASYNC_ROOT_URLCONF and get the same bodies as the viewsets."""
+
+    def setUp(self):
+        cache.clear()
+        admin = CustomUser.objects.create(username='admin', role='ADMINISTRADOR')
+        self.student = Student.objects.create(representative=admin, first_name='Juan', last_name='Pérez',
+                                              id_number='V-3.000.000', birth_date=date(2012, 1, 1),
+                                              current_grade='1er Año', section='A')
+        self.headers = {'Authorization': f'Token {Token.objects.create(user=admin).key}'}
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers['Authorization'])
+
+    async def test_reads_are_served_by_the_async_views(self):
+        for url in ('/api/students/', '/api/grades/', '/api/payments/',
+                    f'/api/students/{self.student.pk}/timetable/'):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url, headers=self.headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(iscoroutinefunction(response.resolver_match.func))
+                expected = await sync_to_async(self.client.get)(url)
+                self.assertEqual(response.json(), expected.json())
+
+    async def test_anonymous_is_401_and_unknown_students_404(self):
+        response = await self.async_client.get('/api/students/')
+        self.assertEqual((response.status_code, response['WWW-Authenticate']), (401, 'Token'))
+        response = await self.async_client.get('/api/students/0/timetable/', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_other_methods_fall_back_to_the_viewset(self):
+        response = await self.async_client.post('/api/students/', {}, content_type='application/json',
+                                                headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id_number', response.json())
+
+
+class FamilyDashboardTests(APITestCase):
+    """me/family/: every child's outstanding concepts, payments, lapso and classes in a fixed number of queries."""
+
+    def setUp(self):
+        self.representative = CustomUser.objects.create(username='V-2.000.000', role='REPRESENTANTE')
+        self.client.force_authenticate(self.representative)
+        self.october = PaymentConcept.objects.create(name='Mensualidad Octubre', amount_usd=Decimal('50'))
+        self.november = PaymentConcept.objects.create(name='Mensualidad Noviembre', amount_usd=Decimal('50'))
+        last_year = PaymentConcept.objects.create(name='Mensualidad Julio', amount_usd=Decimal('50'))
+        PaymentConcept.objects.filter(pk=last_year.pk).update(created_at=timezone.now() - timedelta(days=400))
+        self.subject = Subject.objects.create(name='Matemáticas', grade_level='1er Año', section='A')
+        Schedule.objects.create(subject=self.subject, day='Lunes', start_time=time(7), end_time=time(8))
+        self.evaluation = Evaluation.objects.create(subject=self.subject, name='Parcial', percentage=Decimal('20'),
+                                                    lapso=1, date=date(2000, 1, 1))
+
+    def child(self, number, section='A'):
+        return Student.objects.create(representative=self.representative, first_name=f'Hijo {number}',
+                                      last_name=f'Apellido {number}', id_number=f'V-3.000.00{number}',
+                                      birth_date=date(2012, 1, 1), current_grade='1er Año', section=section)
+
+    def dashboard(self):
+        response = self.client.get('/api/me/family/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['children']
+
+    def test_each_childs_sections(self):
+        first, second = self.child(1), self.child(2, section='B')
+        Payment.objects.create(student=first, payment_concept=self.october, concept=self.october.name,
+                               amount_usd=Decimal('50'), amount_bs=Decimal('2275'), rate_applied=Decimal('45.50'),
+                               reference_number='123456')
+        # Older payments only carry the concept's name
+        Payment.objects.create(student=second, concept=self.november.name, amount_usd=Decimal('50'),
+                               amount_bs=Decimal('2275'), rate_applied=Decimal('45.50'), reference_number='654321')
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(student=first, evaluation=self.evaluation, score=Decimal('15'))
+
+        first_data, second_data = self.dashboard()
+        self.assertEqual([concept['name'] for concept in first_data['outstanding_concepts']], ['Mensualidad Noviembre'])
+        self.assertEqual([concept['name'] for concept in second_data['outstanding_concepts']], ['Mensualidad Octubre'])
+        self.assertEqual(first_data['outstanding_usd'], '50.00')
+        self.assertEqual([payment['concept'] for payment in first_data['recent_payments']], ['Mensualidad Octubre'])
+        self.assertEqual(first_data['lapso']['number'], 1)
+        self.assertEqual(first_data['lapso']['subjects'][0]['average'], '15.00')
+        self.assertEqual([item['subject'] for item in first_data['next_classes']], ['Matemáticas'])
+        self.assertEqual(second_data['next_classes'], [])
+
+    def test_query_count_does_not_grow_with_children(self):
+        self.child(1)
+        with self.assertNumQueries(7) as first:
+            self.dashboard()
+        self.child(2)
+        self.child(3, section='B')
+        with self.assertNumQueries(len(first.captured_queries)):
+            self.assertEqual(len(self.dashboard()), 3)
+
+    def test_representatives_only(self):
+        self.client.force_authenticate(CustomUser.objects.create(username='admin', role='ADMINISTRADOR'))
+        self.assertEqual(self.client.get('/api/me/family/').status_code, 403)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """DATABASES as core/settings.py builds it from the environment (pool, prepared statements, replicas)."""
+
+    def load(self, pool_available, **env):
+        spec = importlib.util.spec_from_file_location('settings_under_test', settings_module.__file__)
+        module = importlib.util.module_from_spec(spec)
+        names = {'DB_POOL_MAX_SIZE', 'DB_PREPARED_STATEMENTS', 'DB_CONN_MAX_AGE', 'DATABASE_REPLICA_HOSTS'}
+        clean = {name: value for name, value in os.environ.items() if name not in names}
+        with mock.patch.dict(os.environ, {**clean, **env}, clear=True), \
+                mock.patch('importlib.util.find_spec', return_value=object() if pool_available else None):
+            spec.loader.exec_module(module)
+        return module.DATABASES
+
+    def test_pool_with_prepared_statements(self):
+        default = self.load(True)['default']
+        self.assertEqual((default['OPTIONS']['pool']['max_size'], default['OPTIONS']['prepare_threshold']), (10, 5))
+        self.assertNotIn('CONN_MAX_AGE', default)
+        options = self.load(True, DB_PREPARED_STATEMENTS='0')['default']['OPTIONS']
+        self.assertIn('pool', options)
+        self.assertNotIn('server_side_binding', options)
+
+    def test_persistent_connections_without_the_pool(self):
+        default = self.load(False)['default']
+        self.assertEqual((default['CONN_MAX_AGE'], default['CONN_HEALTH_CHECKS']), (60, True))
+        self.assertNotIn('pool', default['OPTIONS'])
+
+    def test_pool_size_zero_turns_reuse_off(self):
+        for pool_available in (True, False):
+            default = self.load(pool_available, DB_POOL_MAX_SIZE='0')['default']
+            self.assertNotIn('pool', default['OPTIONS'])
+            self.assertEqual(default['CONN_MAX_AGE'], 0)
+
+    def test_replica_hosts_mirror_default_in_tests(self):
+        databases = self.load(False, DATABASE_REPLICA_HOSTS='localhost, db-replica')
+        self.assertEqual([databases[alias]['HOST'] for alias in ('replica1', 'replica2')], ['localhost', 'db-replica'])
+        self.assertEqual(databases['replica1']['TEST'], {'MIRROR': 'default'})
@@ -2,14 +2,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
 from rest_framework.routers import DefaultRouter
+from .metrics import metrics_view
 from .views import (
-    AuthViewSet, StudentViewSet, TeacherViewSet, 
+    AuthViewSet, FamilyViewSet, StudentViewSet, TeacherViewSet, 
     SubjectViewSet, GradeViewSet, PaymentViewSet, ExchangeRateViewSet,
-    EvaluationViewSet, UserViewSet, PaymentConceptViewSet, ScheduleViewSet
+    EvaluationViewSet, UserViewSet, PaymentConceptViewSet, ScheduleViewSet, ProofUploadViewSet
 )
 
 router = DefaultRouter()
 router.register(r'auth', AuthViewSet, basename='auth')
+router.register(r'me', FamilyViewSet, basename='me')
 router.register(r'students', StudentViewSet, basename='student')
 router.register(r'teachers', TeacherViewSet, basename='teacher')
 router.register(r'subjects', SubjectViewSet, basename='subject')
@@ -20,10 +22,12 @@ router.register(r'rates', ExchangeRateViewSet, basename='exchangerate')
 router.register(r'payment-concepts', PaymentConceptViewSet, basename='paymentconcept')
 router.register(r'schedules', ScheduleViewSet, basename='schedule')
 router.register(r'users', UserViewSet, basename='user')
+router.register(r'uploads', ProofUploadViewSet, basename='upload')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('metrics', metrics_view, name='metrics'),
     path('', lambda request: JsonResponse({"message": "Backend is running. Go to http://localhost:3000 for the Frontend."})),
 ]
 
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+# ASGI only (core.async_views.AsyncRoutesMiddleware): the async read views
+# first, then every regular route.
+urlpatterns = [
+    path('api/students/', async_views.student_list),
+    path('api/students/<int:pk>/timetable/', async_views.student_timetable),
+    path('api/grades/', async_views.grade_list),
+    path('api/payments/', async_views.payment_list),
+    path('api/rates/current/', async_views.current_rate),
+    *sync_urlpatterns,
+]
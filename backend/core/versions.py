@@ -0,0 +1,47 @@
+"""
+Per-model version tokens for reference data that changes a few times per
+term (payment concepts, subjects and schedules, teachers). Every write
+replaces the model's token (see the apps' signals); list views derive their
+ETag/Last-Modified from the tokens and cache their rendered body under them
+(core.mixins.VersionedListMixin).
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'model:version:{}'
+
+
+def _key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def _new_version():
+    return {'token': uuid.uuid4().hex, 'modified': time.time()}
+
+
+def get_versions(models):
+    """
+    {model label: {token, modified}}, one cache round trip. A missing token
+    is re-created (with the current time as modified), so a cache flush
+    only costs one re-render per list.
+    """
+    keys = {_key(model): model for model in models}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_version(), None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]._meta.label_lower: version for key, version in versions.items()}
+
+
+def bump_version(*models):
+    cache.set_many({_key(model): _new_version() for model in models}, None)
+
+
+def bump_on_commit(*models):
+    # After commit, so a concurrent request can't cache the old rows under the new token
+    transaction.on_commit(lambda: bump_version(*models))
@@ -1,21 +1,29 @@
+import io
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django.contrib.auth import authenticate, login, logout
 from rest_framework.authtoken.models import Token
-from rest_framework.authentication import TokenAuthentication, SessionAuthentication
+from rest_framework.authentication import SessionAuthentication
+from django.db.models import Exists, F, FilteredRelation, OuterRef, Q
 from .serializers import (
     UserSerializer, StudentSerializer, TeacherSerializer, 
     SubjectSerializer, EvaluationSerializer, GradeSerializer, 
-    PaymentSerializer, ExchangeRateSerializer, PaymentConceptSerializer, ScheduleSerializer
+    PaymentSerializer, ExchangeRateSerializer, PaymentConceptSerializer, ScheduleSerializer,
+    BulkGradeSerializer, BulkScheduleSerializer, ProofUploadSerializer, ReconcileSerializer
 )
+from .mixins import RelatedLoadingMixin, VersionedListMixin
+from .filters import ChoiceFilter, DateFilter, Filter, NumberFilter
+from users.authentication import CachedTokenAuthentication
 from users.models import CustomUser
 from academic.models import Student, Teacher, Subject, Evaluation, Grade, Schedule
-from administrative.models import Payment, ExchangeRate, PaymentConcept
+from administrative.models import Payment, ExchangeRate, PaymentConcept, ProofUpload
 
 class AuthViewSet(viewsets.ViewSet):
     permission_classes = [permissions.AllowAny]
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
 
     @action(detail=False, methods=['post'])
     def login(self, request):
@@ -45,133 +53,136 @@ class AuthViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def me(self, request):
         if request.user.is_authenticated:
-            return Response(UserSerializer(request.user).data)
+            # Token auth only loads id/role/is_active; read the full profile once
+            user = CustomUser.objects.get(pk=request.user.pk)
+            return Response(UserSerializer(user).data)
         return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
 
-class StudentViewSet(viewsets.ModelViewSet):
+class FamilyViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+
+    @action(detail=False, methods=['get'])
+    def family(self, request):
+        # Representative's home screen for all children in one response,
+        # from a fixed number of queries (core.family)
+        from .family import family_dashboard
+
+        if request.user.role != 'REPRESENTANTE':
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(family_dashboard(request.user))
+
+class StudentViewSet(RelatedLoadingMixin, viewsets.ModelViewSet):
     serializer_class = StudentSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('last_name', 'id')
+    query_filters = {
+        'grade': Filter('current_grade'),
+        'section': Filter('section'),
+        'representative': NumberFilter('representative_id'),
+    }
 
     def get_queryset(self):
         user = self.request.user
         if user.role == 'REPRESENTANTE':
             return Student.objects.filter(representative=user)
         elif user.role == 'DOCENTE':
-             return Student.objects.filter(subject__teacher__user=user).distinct() 
+            # Students in any grade/section where this teacher has a subject
+            teaches = Subject.objects.filter(
+                teacher__user=user,
+                grade_level=OuterRef('current_grade'),
+                section=OuterRef('section'),
+            )
+            return Student.objects.filter(Exists(teaches))
         return Student.objects.all()
 
     @action(detail=True, methods=['get'])
     def report_card(self, request, pk=None):
-        import io
-        from datetime import datetime
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from django.http import FileResponse
-        from django.db.models import Sum, F
-        
+        from django.http import HttpResponse
+        from django.utils.cache import get_conditional_response
+        from academic.report_cards import get_cached_pdf, get_digest
+
+        student = self.get_object()
+
+        # The boletín only changes when the student's grades/evaluations do,
+        # so repeat downloads are answered from cache or with a 304.
+        digest = get_digest(student.id)
+        etag = f'"{digest}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        response = HttpResponse(get_cached_pdf(student, digest), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="boletin_{student.id_number}.pdf"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def timetable(self, request, pk=None):
+        # Weekly grid of the student's grade/section, cached per section and
+        # invalidated on any Schedule/Subject/Teacher change or teacher rename.
+        from academic.timetable import get_section_timetable
+
         student = self.get_object()
-        
-        # Fetch all grades for this student
-        grades = Grade.objects.filter(student=student).select_related('evaluation', 'evaluation__subject')
-        
-        # Organize data: Subject -> Lapso -> Final Score
-        # Final Score = Sum(Grade * Percentage / 100) or just Sum(Grade) if weighted?
-        # Assuming Grade is 0-20 and Percentage is weight. 
-        # Actually, usually Grade is 0-20. If Eval is 20%, and Grade is 20, contribution is 4 pts.
-        # Let's calculate: score * (percentage / 100)
-        
-        report_data = {}
-        subjects = set()
-        
-        for grade in grades:
-            subj_name = grade.evaluation.subject.name
-            lapso = grade.evaluation.lapso
-            percentage = grade.evaluation.percentage
-            score = grade.score
-            
-            if subj_name not in report_data:
-                report_data[subj_name] = {1: 0, 2: 0, 3: 0}
-            
-            subjects.add(subj_name)
-            
-            # Calculate weighted contribution
-            contribution = (score * percentage) / 100
-            report_data[subj_name][lapso] += contribution
-
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-        
-        # Header
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(50, height - 50, "Boletín Informativo")
-        
-        p.setFont("Helvetica", 12)
-        p.drawString(50, height - 80, f"Estudiante: {student.first_name} {student.last_name}")
-        p.drawString(50, height - 100, f"Cédula: {student.id_number}")
-        p.drawString(50, height - 120, f"Grado: {student.current_grade} - Sección: {student.section}")
-        
-        # Emission Date
-        now = datetime.now().strftime("%d/%m/%Y %I:%M %p")
-        p.setFont("Helvetica-Oblique", 10)
-        p.drawString(50, height - 140, f"Fecha de emisión: {now}")
-        
-        # Table Header
-        y = height - 180
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(50, y, "Asignatura")
-        p.drawString(250, y, "1er Lapso")
-        p.drawString(330, y, "2do Lapso")
-        p.drawString(410, y, "3er Lapso")
-        p.drawString(490, y, "Definitiva")
-        
-        p.line(50, y - 5, 550, y - 5)
-        y -= 25
-        
-        # Table Content
-        p.setFont("Helvetica", 10)
-        for subject in sorted(list(subjects)):
-            p.drawString(50, y, subject[:35])
-            
-            # 1er Lapso
-            l1 = report_data[subject].get(1, 0)
-            p.drawString(250, y, f"{l1:.2f}")
-            
-            # 2do Lapso
-            l2 = report_data[subject].get(2, 0)
-            p.drawString(330, y, f"{l2:.2f}")
-            
-            # 3er Lapso
-            l3 = report_data[subject].get(3, 0)
-            p.drawString(410, y, f"{l3:.2f}")
-            
-            # Definitiva (Average)
-            definitiva = (l1 + l2 + l3) / 3
-            p.setFont("Helvetica-Bold", 10)
-            p.drawString(490, y, f"{definitiva:.2f}")
-            p.setFont("Helvetica", 10)
-            
-            y -= 20
-            
-            if y < 50:
-                p.showPage()
-                y = height - 50
-                
-        p.showPage()
-        p.save()
-        
-        buffer.seek(0)
-        return FileResponse(buffer, as_attachment=True, filename=f'boletin_{student.id_number}.pdf')
-
-class TeacherViewSet(viewsets.ModelViewSet):
+        return Response({'student': student.id, **get_section_timetable(student.current_grade, student.section)})
+
+    @action(detail=False, methods=['get'])
+    def report_cards(self, request):
+        # ZIP with the boletines of every listed student (?grade=&section=),
+        # rendered in a process pool and streamed as it is produced.
+        from django.http import StreamingHttpResponse
+        from academic.report_cards import stream_zip
+
+        # Renders the whole school on the shared pool; administrators only
+        if request.user.role != 'ADMINISTRADOR':
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        students = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(stream_zip(students), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="boletines.zip"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_enrollments(self, request):
+        # Spreadsheet of students + representatives (CSV/XLSX, field "file");
+        # valid rows are created in bulk, the rest come back as row errors.
+        from academic.enrollment import EnrollmentFileError, import_enrollments
+
+        if request.user.role not in ('ADMINISTRADOR', 'OFICINISTA'):
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['Adjunte un archivo CSV o XLSX']}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            report = import_enrollments(upload, upload.name, dry_run=dry_run)
+        except EnrollmentFileError as exc:
+            return Response({'file': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        created = report['students_created'] and not dry_run
+        return Response(report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+class TeacherViewSet(VersionedListMixin, RelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('id',)
+    select_related_fields = ('user',)
+    versioned_models = (Teacher, CustomUser)
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(VersionedListMixin, RelatedLoadingMixin, viewsets.ModelViewSet):
     serializer_class = SubjectSerializer
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('id',)
+    prefetch_related_fields = ('schedules',)
+    versioned_models = (Subject, Schedule, Teacher)
+
+    def list_cache_scope(self):
+        # Teachers only see their own subjects
+        user = self.request.user
+        return f'teacher:{user.pk}' if user.role == 'DOCENTE' else 'all'
 
     def get_queryset(self):
         user = self.request.user
@@ -184,116 +195,286 @@ class SubjectViewSet(viewsets.ModelViewSet):
                 pass # If no teacher profile, return empty or all? Better empty.
         return queryset
 
-class EvaluationViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        # Lapso scores of the subject's section, read in one query from the
+        # precomputed StudentSubjectScore rows (LEFT JOIN, so students
+        # without grades are listed too).
+        subject = self.get_object()
+        if request.user.role not in ('ADMINISTRADOR', 'OFICINISTA') and not Subject.objects.filter(
+                pk=subject.pk, teacher__user=request.user).exists():
+            # Every student's scores: staff and the subject's teacher only
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        lapso = request.query_params.get('lapso', '1')
+        if lapso not in ('1', '2', '3'):
+            return Response({'lapso': 'Debe ser 1, 2 o 3.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            Student.objects.filter(current_grade=subject.grade_level, section=subject.section)
+            .annotate(score_row=FilteredRelation('subject_scores', condition=Q(subject_scores__subject=subject)))
+            .values('id', 'id_number', 'first_name', 'last_name',
+                    score=F(f'score_row__lapso_{lapso}'), covered=F(f'score_row__covered_{lapso}'))
+            .order_by('last_name', 'id')
+        )
+        students = []
+        for row in rows:
+            graded = bool(row['covered'])
+            students.append({
+                'id': row['id'],
+                'id_number': row['id_number'],
+                'first_name': row['first_name'],
+                'last_name': row['last_name'],
+                # Same formula as the boletín: Sum(score * percentage / 100)
+                'score': f"{row['score']:.2f}" if graded else None,
+                'covered_percentage': f"{row['covered']:.2f}" if graded else '0.00',
+            })
+
+        return Response({
+            'subject': {'id': subject.id, 'name': subject.name,
+                        'grade_level': subject.grade_level, 'section': subject.section},
+            'lapso': int(lapso),
+            'students': students,
+        })
+
+class EvaluationViewSet(RelatedLoadingMixin, viewsets.ModelViewSet):
+    queryset = Evaluation.objects.all()
     serializer_class = EvaluationSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('id',)
+    query_filters = {
+        'subject_id': NumberFilter('subject_id'),
+        'lapso': ChoiceFilter('lapso', [(str(k), v) for k, v in Evaluation.LAPSO_CHOICES]),
+    }
 
-    def get_queryset(self):
-        queryset = Evaluation.objects.all()
-        subject_id = self.request.query_params.get('subject_id')
-        if subject_id:
-            queryset = queryset.filter(subject_id=subject_id)
-        return queryset
+    @action(detail=True, methods=['post'], url_path='grades/bulk')
+    def bulk_grades(self, request, pk=None):
+        # Whole class in one request: {"grades": [{"student": 1, "score": "18.50"}, ...]}
+        evaluation = self.get_object()
+        if request.user.role != 'ADMINISTRADOR' and not Subject.objects.filter(
+                pk=evaluation.subject_id, teacher__user=request.user).exists():
+            # Only the subject's teacher grades it
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = BulkGradeSerializer(data=request.data, context={'evaluation': evaluation})
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response({'evaluation': evaluation.id, 'results': results})
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(RelatedLoadingMixin, viewsets.ModelViewSet):
     serializer_class = GradeSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('id',)
+    select_related_fields = ('evaluation__subject',)
+    query_filters = {
+        'student_id': NumberFilter('student_id'),
+        'subject_id': NumberFilter('evaluation__subject_id'),
+        'evaluation_id': NumberFilter('evaluation_id'),
+        'lapso': ChoiceFilter('evaluation__lapso', [(str(k), v) for k, v in Evaluation.LAPSO_CHOICES]),
+    }
 
     def get_queryset(self):
         user = self.request.user
         queryset = Grade.objects.all()
         if user.role == 'REPRESENTANTE':
             queryset = queryset.filter(student__representative=user)
-        
-        student_id = self.request.query_params.get('student_id')
-        if student_id:
-            queryset = queryset.filter(student_id=student_id)
-
-        subject_id = self.request.query_params.get('subject_id')
-        if subject_id:
-            queryset = queryset.filter(evaluation__subject_id=subject_id)
-
-        evaluation_id = self.request.query_params.get('evaluation_id')
-        if evaluation_id:
-            queryset = queryset.filter(evaluation_id=evaluation_id)
-            
         return queryset
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(RelatedLoadingMixin, viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('-date_reported', '-id')
+    select_related_fields = ('student__representative', 'payment_concept')
+    query_filters = {
+        'status': ChoiceFilter('status', Payment.STATUS_CHOICES),
+        'student_id': NumberFilter('student_id'),
+        'representative': NumberFilter('student__representative_id'),
+        'concept': NumberFilter('payment_concept_id'),
+        'grade': Filter('student__current_grade'),
+        'section': Filter('student__section'),
+        'date_from': DateFilter('date_reported', 'from', datetime=True),
+        'date_to': DateFilter('date_reported', 'to', datetime=True),
+    }
 
     def get_queryset(self):
         user = self.request.user
         queryset = Payment.objects.all()
         if user.role == 'REPRESENTANTE':
             queryset = queryset.filter(student__representative=user)
-            
-        student_id = self.request.query_params.get('student_id')
-        if student_id:
-            queryset = queryset.filter(student_id=student_id)
-            
         return queryset
 
-class ExchangeRateViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        # Dashboard numbers grouped in the database, cached for a short TTL
+        # and invalidated on any payment write (see administrative.signals).
+        from administrative.stats import get_stats
+
+        payments = self.filter_queryset(self.get_queryset())
+        scope = request.user.id if request.user.role == 'REPRESENTANTE' else 'all'
+        return Response(get_stats(payments, f'{scope}?{request.query_params.urlencode()}'))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # ?type=csv|xlsx plus the list filters; streamed, so it is never built
+        # in memory ("format" is taken by DRF's content negotiation)
+        from django.http import StreamingHttpResponse
+        from django.utils import timezone
+        from administrative.exports import CONTENT_TYPES, stream_export
+
+        fmt = request.query_params.get('type', 'csv')
+        if fmt not in CONTENT_TYPES:
+            return Response({'type': ['Use csv o xlsx']}, status=status.HTTP_400_BAD_REQUEST)
+        payments = self.filter_queryset(self.get_queryset()).order_by(*self.ordering)
+        response = StreamingHttpResponse(stream_export(payments, fmt), content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="pagos-{timezone.localdate():%Y%m%d}.{fmt}"'
+        return response
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def reconcile(self, request):
+        # Bank CSV ("file") against the PENDING payments; proposes, changes nothing
+        from administrative.reconciliation import StatementError, reconcile
+
+        if request.user.role != 'ADMINISTRADOR':
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = ReconcileSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        try:
+            report = reconcile(params['file'], params.get('amount_tolerance'), params.get('days'))
+        except StatementError as exc:
+            return Response({'file': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+    @action(detail=False, methods=['post'], url_path='reconcile/approve')
+    def reconcile_approve(self, request):
+        # {"payment_ids": [...]}: all verified in one transaction, or none
+        from administrative.reconciliation import approve
+
+        if request.user.role != 'ADMINISTRADOR':
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        payment_ids = request.data.get('payment_ids')
+        if not isinstance(payment_ids, list) or not all(isinstance(pk, int) for pk in payment_ids):
+            return Response({'payment_ids': ['Lista de ids requerida']}, status=status.HTTP_400_BAD_REQUEST)
+        approved, not_pending = approve(payment_ids)
+        if not_pending:
+            return Response({'error': 'Algunos pagos ya no están pendientes', 'not_pending': not_pending},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({'approved': approved})
+
+class ProofUploadViewSet(viewsets.ViewSet):
+    """
+    Resumable upload of a payment proof:
+
+        POST uploads/                {filename, size, checksum (sha256)}
+        PUT  uploads/{id}/           raw bytes, Content-Range: bytes 0-262143/1048576
+        GET  uploads/{id}/           current offset, to resume after a dropped connection
+        POST uploads/{id}/commit/    verifies size and checksum
+
+    then POST payments/ with "upload": id instead of proof_image.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    # Django's <uuid:> pattern: any other id is a 404 from the router, not a query
+    lookup_value_regex = '[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+
+    def upload_response(self, upload, status_code=status.HTTP_200_OK, **extra):
+        data = {**ProofUploadSerializer(upload).data, **extra}
+        return Response(data, status=status_code, headers={'Upload-Offset': str(upload.offset)})
+
+    def error_response(self, exc):
+        if exc.upload is None:
+            return Response({'error': str(exc)}, status=exc.status)
+        return self.upload_response(exc.upload, exc.status, error=str(exc))
+
+    def create(self, request):
+        from administrative.uploads import UploadError, start_upload
+
+        serializer = ProofUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = start_upload(request.user, **serializer.validated_data)
+        except UploadError as exc:
+            return self.error_response(exc)
+        return self.upload_response(upload, status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        upload = ProofUpload.objects.filter(pk=pk, owner=request.user).first()
+        if upload is None:
+            return Response({'error': 'Carga no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        return self.upload_response(upload)
+
+    def update(self, request, pk=None):
+        # The body is streamed to disk as it is read; request.data is never parsed
+        from administrative.uploads import UploadError, append_chunk
+
+        try:
+            upload = append_chunk(pk, request.user, request.stream or io.BytesIO(),
+                                  request.headers.get('Content-Range'))
+        except UploadError as exc:
+            return self.error_response(exc)
+        return self.upload_response(upload)
+
+    @action(detail=True, methods=['post'])
+    def commit(self, request, pk=None):
+        from administrative.uploads import UploadError, commit_upload
+
+        try:
+            upload = commit_upload(pk, request.user)
+        except UploadError as exc:
+            return self.error_response(exc)
+        return self.upload_response(upload)
+
+class ExchangeRateViewSet(RelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = ExchangeRate.objects.all()
     serializer_class = ExchangeRateSerializer
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('-id',)
 
     @action(detail=False, methods=['get'])
     def current(self, request):
-        from administrative.utils import get_bcv_rate
-        from django.utils import timezone
-        
-        # Try to get live rate
-        rate_value = get_bcv_rate()
-        
-        if rate_value:
-            # Save to DB if it's a new rate or update today's
-            # For simplicity, let's just create a new record if the latest is not from today or different
-            latest = ExchangeRate.objects.order_by('-date', '-id').first()
-            if not latest or latest.rate != rate_value:
-                ExchangeRate.objects.create(rate=rate_value)
-            
-            return Response({'rate': str(rate_value)})
-            
-        # Fallback to latest stored
-        latest = ExchangeRate.objects.order_by('-date', '-id').first()
-        if latest:
-            return Response({'rate': str(latest.rate)})
-            
-        return Response({'rate': '36.50'}) # Ultimate fallback
-
-class PaymentConceptViewSet(viewsets.ModelViewSet):
+        # Served from the cached rate; BCV is only contacted by the refresh
+        # thread, or once (shared by all callers) when nothing is cached yet.
+        from administrative.rates import rate_service
+
+        rate = rate_service.current()
+        return Response({'rate': rate or '36.50'}) # Ultimate fallback
+
+class PaymentConceptViewSet(VersionedListMixin, RelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = PaymentConcept.objects.all()
     serializer_class = PaymentConceptSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('id',)
+    versioned_models = (PaymentConcept,)
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(RelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('last_name', 'id')
+    query_filters = {
+        'role': ChoiceFilter('role', CustomUser.ROLE_CHOICES),
+    }
 
-    def get_queryset(self):
-        queryset = CustomUser.objects.all()
-        role = self.request.query_params.get('role')
-        if role:
-            queryset = queryset.filter(role=role)
-        return queryset
-
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(RelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
-    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication]
+    ordering = ('id',)
+    query_filters = {
+        'subject_id': NumberFilter('subject_id'),
+        'day': Filter('day'),
+    }
 
-    def get_queryset(self):
-        queryset = Schedule.objects.all()
-        subject_id = self.request.query_params.get('subject_id')
-        if subject_id:
-            queryset = queryset.filter(subject_id=subject_id)
-        return queryset
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        # {"schedules": [{subject, day, start_time, end_time, room}, ...], "dry_run": false}
+        if request.user.role not in ('ADMINISTRADOR', 'OFICINISTA'):
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = BulkScheduleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = serializer.save()
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
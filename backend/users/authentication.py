@@ -0,0 +1,74 @@
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+from .models import CustomUser
+from .tokens import token_cache
+
+# All the views read from request.user (permissions, querysets, ownership)
+CACHED_USER_FIELDS = ('id', 'role', 'is_active')
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication without the Token -> CustomUser join on the hot path.
+
+    Resolved tokens are kept in users.tokens.token_cache, and request.user is
+    a CustomUser with only CACHED_USER_FIELDS loaded. Any other field is
+    deferred: reading it costs one query per field, so code that needs the
+    profile (names, email, ...) loads it once with
+    CustomUser.objects.get(pk=request.user.pk), as the ``me`` action does,
+    or the field is added to CACHED_USER_FIELDS. Entries are dropped on
+    logout, user changes and deletes (users.signals).
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            model = self.get_model()
+            tokens = model.objects.select_related('user')
+            token = tokens.filter(key=key).first()
+            if token is None and router.db_for_read(model) != router.db_for_write(model):
+                # Issued moments ago at login; may not be on the read replica yet
+                token = tokens.using(router.db_for_write(model)).filter(key=key).first()
+            if token is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            entry = tuple(getattr(token.user, name) for name in CACHED_USER_FIELDS)
+            token_cache.set(key, entry)
+
+        return (self.cached_user(entry), key)
+
+    async def aauthenticate(self, request):
+        """authenticate() for plain async views (core.async_views), using the async ORM."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain invalid characters.'))
+
+        entry = token_cache.get(key)
+        if entry is None:
+            model = self.get_model()
+            tokens = model.objects.select_related('user')
+            token = await tokens.filter(key=key).afirst()
+            if token is None and router.db_for_read(model) != router.db_for_write(model):
+                token = await tokens.using(router.db_for_write(model)).filter(key=key).afirst()
+            if token is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            entry = tuple(getattr(token.user, name) for name in CACHED_USER_FIELDS)
+            token_cache.set(key, entry)
+        return (self.cached_user(entry), key)
+
+    @staticmethod
+    def cached_user(entry):
+        values = dict(zip(CACHED_USER_FIELDS, entry))
+        if not values['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # from_db() takes the loaded values in concrete field order
+        fields = [field.attname for field in CustomUser._meta.concrete_fields if field.attname in values]
+        return CustomUser.from_db(router.db_for_read(CustomUser), fields, [values[name] for name in fields])
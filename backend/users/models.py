@@ -15,5 +15,11 @@ class CustomUser(AbstractUser):
     address = models.TextField(blank=True, null=True)
     visible_password = models.CharField(max_length=128, blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # users/?role=... listed in keyset order
+            models.Index(fields=['role', 'last_name', 'id'], name='user_role_lastname_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
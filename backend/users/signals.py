@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.versions import bump_on_commit
+
+from .models import CustomUser
+from .tokens import invalidate_user_tokens, token_cache
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Logout, and tokens cascading from a deleted user
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, **kwargs):
+    # Password, role or is_active changes (UserSerializer.update, admin, ...)
+    if not created:
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def user_changed(sender, update_fields=None, **kwargs):
+    # Teacher list embeds the users; login only touches last_login
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_on_commit(CustomUser)
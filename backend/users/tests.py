@@ -1,3 +1,71 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import CustomUser
+from .tokens import token_cache
+
+
+@override_settings(STRICT_RELATED_LOADING=True)
+class ListQueryTests(APITestCase):
+    """users/ renders from its own rows (core.serializers.StrictLoadingMixin), one query per page."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create(username='admin', role='ADMINISTRADOR')
+        for number in range(3):
+            CustomUser.objects.create(username=f'V-2.000.00{number}', role='REPRESENTANTE')
+        self.client.force_authenticate(self.admin)
+
+    def test_users(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 4)
+
+    def test_users_filtered_by_role(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/', {'role': 'REPRESENTANTE'})
+        self.assertEqual([user['role'] for user in response.json()['results']], ['REPRESENTANTE'] * 3)
+
+
+class TokenCacheTests(APITestCase):
+    """CachedTokenAuthentication: one token lookup, then none until a user/token change drops it."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = CustomUser.objects.create(username='admin', role='ADMINISTRADOR')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def me(self):
+        return self.client.get('/api/auth/me/')
+
+    def test_token_is_resolved_once(self):
+        with self.assertNumQueries(2):  # token + profile
+            self.assertEqual(self.me().status_code, 200)
+        with self.assertNumQueries(1):  # profile only
+            self.assertEqual(self.me().json()['role'], 'ADMINISTRADOR')
+
+    def test_role_change_applies_on_the_next_request(self):
+        self.me()
+        self.user.role = 'OFICINISTA'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/students/report_cards/').status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        self.me()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_logout_drops_the_token(self):
+        self.me()
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.me()
+        self.user.delete()
+        self.assertEqual(self.me().status_code, 401)
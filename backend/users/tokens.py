@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+SHARED_KEY = 'auth:token:{}'
+
+
+class TokenCache:
+    """
+    Resolved API tokens -> (user_id, role, is_active).
+
+    An in-process LRU with TTL sits in front of an optional shared Django
+    cache (settings.AUTH_TOKEN_SHARED_CACHE). Invalidation clears both; other
+    processes' LRUs catch up within AUTH_TOKEN_CACHE_TTL seconds.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize or getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000)
+        self.ttl = ttl or getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = getattr(settings, 'AUTH_TOKEN_SHARED_CACHE', None)
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                expires, entry = item
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+
+        if self.shared is not None:
+            entry = self.shared.get(SHARED_KEY.format(key))
+            if entry is not None:
+                self._store(key, tuple(entry))
+                return tuple(entry)
+        return None
+
+    def set(self, key, entry):
+        self._store(key, entry)
+        if self.shared is not None:
+            self.shared.set(SHARED_KEY.format(key), entry, self.ttl)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared is not None and keys:
+            self.shared.delete_many([SHARED_KEY.format(key) for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache()
+
+
+def invalidate_user_tokens(user_id):
+    from rest_framework.authtoken.models import Token
+
+    token_cache.delete(*Token.objects.filter(user_id=user_id).values_list('key', flat=True))
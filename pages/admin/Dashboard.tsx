@@ -2,17 +2,21 @@ import React, { useEffect, useState } from 'react';
 import { CheckCircle, AlertTriangle } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import client from '../../api/client';
-import { Payment } from '../../types';
 
 export const AdminDashboard = () => {
-  const [payments, setPayments] = useState<Payment[]>([]);
+  const [pendingCount, setPendingCount] = useState(0);
+  const [verifiedCount, setVerifiedCount] = useState(0);
   const [isLoading, setIsLoading] = useState(true);
 
   useEffect(() => {
     const fetchPayments = async () => {
       try {
-        const response = await client.get('payments/');
-        setPayments(response.data);
+        // Counts grouped on the server instead of downloading every payment
+        const response = await client.get('payments/stats/');
+        const countOf = (status: string) =>
+          response.data.by_status.find((row: any) => row.status === status)?.count ?? 0;
+        setPendingCount(countOf('PENDING'));
+        setVerifiedCount(countOf('VERIFIED'));
       } catch (error) {
         console.error("Error fetching payments", error);
       } finally {
@@ -22,9 +26,6 @@ export const AdminDashboard = () => {
     fetchPayments();
   }, []);
 
-  const pendingCount = payments.filter(p => p.status === 'PENDING').length;
-  const verifiedCount = payments.filter(p => p.status === 'VERIFIED').length;
-
   if (isLoading) return <div>Cargando...</div>;
 
   return (
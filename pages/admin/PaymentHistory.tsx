@@ -1,13 +1,15 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
+import client, { fetchPage } from '../../api/client';
 import { Payment } from '../../types';
 import { Search, Filter, X, Download, User, FileText, CreditCard, Calendar, Plus, Save } from 'lucide-react';
 
 export const AdminPaymentHistory = () => {
   const [payments, setPayments] = useState<Payment[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [filteredPayments, setFilteredPayments] = useState<Payment[]>([]);
   const [selectedPayment, setSelectedPayment] = useState<Payment | null>(null);
   const [loading, setLoading] = useState(true);
+  const [exporting, setExporting] = useState(false);
 
   // Concept Creation State
   const [isCreatingConcept, setIsCreatingConcept] = useState(false);
@@ -21,16 +23,30 @@ export const AdminPaymentHistory = () => {
 
   useEffect(() => {
     fetchPayments();
-  }, []);
+  }, [statusFilter, dateFilter]);
 
   useEffect(() => {
     filterPayments();
-  }, [payments, searchTerm, statusFilter, dateFilter]);
+  }, [payments, searchTerm]);
+
+  // Status and date are filtered by the server (same params as the export);
+  // ALL means the processed payments, the pending ones are in verification
+  const filterParams = () => {
+    const params: Record<string, string> = {
+      status: statusFilter === 'ALL' ? 'VERIFIED,REJECTED' : statusFilter,
+    };
+    if (dateFilter) {
+      params.date_from = dateFilter;
+      params.date_to = dateFilter;
+    }
+    return params;
+  };
 
   const fetchPayments = async () => {
     try {
-      const response = await client.get('payments/');
-      setPayments(response.data);
+      const page = await fetchPage<Payment>('payments/', filterParams());
+      setPayments(page.results);
+      setNextPage(page.next);
     } catch (error) {
       console.error("Error fetching payments", error);
     } finally {
@@ -38,6 +54,17 @@ export const AdminPaymentHistory = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextPage) return;
+    try {
+      const page = await fetchPage<Payment>(nextPage);
+      setPayments(prev => [...prev, ...page.results]);
+      setNextPage(page.next);
+    } catch (error) {
+      console.error("Error fetching payments", error);
+    }
+  };
+
   const filterPayments = () => {
     let result = payments;
 
@@ -53,20 +80,31 @@ export const AdminPaymentHistory = () => {
       );
     }
 
-    // Status
-    if (statusFilter !== 'ALL') {
-      result = result.filter(p => p.status === statusFilter);
-    } else {
-      // If ALL, show only VERIFIED and REJECTED (exclude PENDING)
-      result = result.filter(p => p.status === 'VERIFIED' || p.status === 'REJECTED');
-    }
+    setFilteredPayments(result);
+  };
 
-    // Date
-    if (dateFilter) {
-      result = result.filter(p => p.date_reported.startsWith(dateFilter));
-    }
+  // Generated and streamed by the server with the status/date filters;
+  // the search box only narrows the table.
+  const handleExport = async (type: 'csv' | 'xlsx') => {
+    setExporting(true);
+    try {
+      const params = { type, ...filterParams() };
+      const response = await client.get('payments/export/', { params, responseType: 'blob' });
 
-    setFilteredPayments(result);
+      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const link = document.createElement('a');
+      link.href = url;
+      link.setAttribute('download', `pagos${dateFilter ? `_${dateFilter}` : ''}.${type}`);
+      document.body.appendChild(link);
+      link.click();
+      link.parentNode?.removeChild(link);
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error("Error exporting payments", error);
+      alert("Error al exportar el historial de pagos");
+    } finally {
+      setExporting(false);
+    }
   };
 
   const handleCreateConcept = async () => {
@@ -132,6 +170,21 @@ export const AdminPaymentHistory = () => {
             onChange={(e) => setDateFilter(e.target.value)}
             className="p-2.5 border border-gray-300 rounded-lg focus:ring-primary focus:border-primary"
           />
+
+          <button
+            onClick={() => handleExport('csv')}
+            disabled={exporting}
+            className="px-4 py-2.5 border border-gray-300 rounded-lg bg-white text-gray-700 font-bold flex items-center gap-2 hover:bg-gray-100 disabled:opacity-50"
+          >
+            <Download size={18} /> CSV
+          </button>
+          <button
+            onClick={() => handleExport('xlsx')}
+            disabled={exporting}
+            className="px-4 py-2.5 border border-gray-300 rounded-lg bg-white text-gray-700 font-bold flex items-center gap-2 hover:bg-gray-100 disabled:opacity-50"
+          >
+            <Download size={18} /> Excel
+          </button>
         </div>
       </div>
 
@@ -177,6 +230,11 @@ export const AdminPaymentHistory = () => {
             )}
           </tbody>
         </table>
+        {nextPage && (
+          <button onClick={loadMore} className="w-full p-3 text-sm font-medium text-primary hover:bg-gray-50 border-t border-gray-200">
+            Cargar más
+          </button>
+        )}
       </div>
 
       {/* Payment Detail Modal */}
@@ -286,7 +344,9 @@ export const AdminPaymentHistory = () => {
                     <label className="text-xs text-gray-500 uppercase font-bold mb-2 block">Comprobante de Pago</label>
                     <div className="border border-gray-200 rounded-lg p-2 bg-gray-50 flex flex-col items-center justify-center min-h-[150px]">
                       {selectedPayment.proof_image ? (
-                        <img src={selectedPayment.proof_image} alt="Comprobante" className="max-h-64 object-contain" />
+                        <a href={selectedPayment.proof_image} target="_blank" rel="noopener noreferrer" title="Ver original">
+                          <img src={selectedPayment.proof_preview_url || selectedPayment.proof_image} alt="Comprobante" className="max-h-64 object-contain cursor-zoom-in" />
+                        </a>
                       ) : (
                         <div className="text-center p-4">
                           <Download className="mx-auto mb-2 text-gray-300" size={32} />
@@ -1,13 +1,16 @@
 import React, { useState, useEffect } from 'react';
-import { Check, X, Download, MessageSquare } from 'lucide-react';
-import client from '../../api/client';
+import { Check, X, Download, MessageSquare, FileSpreadsheet } from 'lucide-react';
+import client, { fetchPage } from '../../api/client';
 import { Payment } from '../../types';
 
 export const AdminPaymentVerification = () => {
   const [payments, setPayments] = useState<Payment[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [selectedPaymentId, setSelectedPaymentId] = useState<number | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [adminNote, setAdminNote] = useState('');
+  const [reconciliation, setReconciliation] = useState<any | null>(null);
+  const [confirmedIds, setConfirmedIds] = useState<number[]>([]);
 
   useEffect(() => {
     fetchPayments();
@@ -15,11 +18,11 @@ export const AdminPaymentVerification = () => {
 
   const fetchPayments = async () => {
     try {
-      const response = await client.get('payments/?status=PENDING');
-      const pending = response.data.filter((p: Payment) => p.status === 'PENDING');
-      setPayments(pending);
-      if (pending.length > 0 && !selectedPaymentId) {
-        setSelectedPaymentId(pending[0].id);
+      const page = await fetchPage<Payment>('payments/', { status: 'PENDING' });
+      setPayments(page.results);
+      setNextPage(page.next);
+      if (page.results.length > 0 && !selectedPaymentId) {
+        setSelectedPaymentId(page.results[0].id);
       }
     } catch (error) {
       console.error("Error fetching payments", error);
@@ -28,6 +31,17 @@ export const AdminPaymentVerification = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextPage) return;
+    try {
+      const page = await fetchPage<Payment>(nextPage);
+      setPayments(prev => [...prev, ...page.results]);
+      setNextPage(page.next);
+    } catch (error) {
+      console.error("Error fetching payments", error);
+    }
+  };
+
   const handleProcessPayment = async (status: 'VERIFIED' | 'REJECTED') => {
     if (!selectedPaymentId) return;
 
@@ -53,6 +67,39 @@ export const AdminPaymentVerification = () => {
     }
   };
 
+  // Bank statement CSV matched against the pending payments on the server
+  const handleStatement = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0];
+    e.target.value = '';
+    if (!file) return;
+    const data = new FormData();
+    data.append('file', file);
+    try {
+      const res = await client.post('payments/reconcile/', data, {
+        headers: {
+          'Content-Type': 'multipart/form-data'
+        }
+      });
+      setReconciliation(res.data);
+      setConfirmedIds(res.data.matches.map((m: any) => m.payment));
+    } catch (error: any) {
+      alert(error.response?.data?.file?.[0] || 'Error al procesar el estado de cuenta');
+    }
+  };
+
+  const handleApproveMatches = async () => {
+    if (confirmedIds.length === 0) return;
+    try {
+      const res = await client.post('payments/reconcile/approve/', { payment_ids: confirmedIds });
+      alert(`${res.data.approved} pagos aprobados`);
+      setReconciliation(null);
+      setConfirmedIds([]);
+      fetchPayments();
+    } catch (error: any) {
+      alert(error.response?.data?.error || 'Error al aprobar los pagos');
+    }
+  };
+
   const selectedPayment = payments.find(p => p.id === selectedPaymentId);
 
   if (isLoading) return <div>Cargando...</div>;
@@ -61,9 +108,46 @@ export const AdminPaymentVerification = () => {
     <div className="h-[calc(100vh-100px)] flex gap-6">
       {/* List */}
       <div className="w-1/3 bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden flex flex-col">
-        <div className="p-4 border-b border-gray-200 bg-gray-50">
-          <h2 className="font-bold text-gray-700">Pagos por Revisar ({payments.length})</h2>
+        <div className="p-4 border-b border-gray-200 bg-gray-50 flex justify-between items-center">
+          <h2 className="font-bold text-gray-700">Pagos por Revisar ({payments.length}{nextPage ? '+' : ''})</h2>
+          <label className="text-xs font-bold text-primary flex items-center gap-1 cursor-pointer hover:underline">
+            <FileSpreadsheet size={16} /> Conciliar
+            <input type="file" accept=".csv" className="hidden" onChange={handleStatement} />
+          </label>
         </div>
+        {reconciliation && (
+          <div className="p-4 border-b border-gray-200 bg-blue-50 text-sm space-y-2">
+            <p className="font-bold text-gray-800">
+              {reconciliation.matches.length} coincidencias de {reconciliation.lines} líneas
+            </p>
+            {reconciliation.matches.map((m: any) => (
+              <label key={m.payment} className="flex items-center gap-2 text-xs text-gray-700">
+                <input
+                  type="checkbox"
+                  checked={confirmedIds.includes(m.payment)}
+                  onChange={(e) => setConfirmedIds(prev => e.target.checked ? [...prev, m.payment] : prev.filter(id => id !== m.payment))}
+                />
+                Ref {m.reference} · Bs {m.amount_bs} · {m.student}
+              </label>
+            ))}
+            {reconciliation.ambiguous.length > 0 && (
+              <p className="text-xs text-amber-700">{reconciliation.ambiguous.length} casos ambiguos para revisar manualmente</p>
+            )}
+            {reconciliation.duplicates.length > 0 && (
+              <p className="text-xs text-red-600">
+                Referencias duplicadas: {reconciliation.duplicates.map((d: any) => d.reference).join(', ')}
+              </p>
+            )}
+            <div className="flex gap-2 pt-1">
+              <button onClick={handleApproveMatches} disabled={confirmedIds.length === 0} className="flex-1 py-1.5 bg-green-600 text-white text-xs font-bold rounded disabled:opacity-50">
+                Aprobar {confirmedIds.length}
+              </button>
+              <button onClick={() => setReconciliation(null)} className="px-3 py-1.5 bg-white border border-gray-300 text-xs rounded">
+                Cerrar
+              </button>
+            </div>
+          </div>
+        )}
         <div className="overflow-y-auto flex-1">
           {payments.map(payment => (
             <div
@@ -71,17 +155,29 @@ export const AdminPaymentVerification = () => {
               onClick={() => setSelectedPaymentId(payment.id)}
               className={`p-4 border-b border-gray-100 cursor-pointer hover:bg-blue-50 transition-colors ${selectedPaymentId === payment.id ? 'bg-blue-50 border-l-4 border-l-primary' : ''}`}
             >
-              <div className="flex justify-between mb-1">
-                <span className="font-bold text-gray-900">${payment.amount_usd}</span>
-                <span className="text-xs text-gray-500">{new Date(payment.date_reported).toLocaleDateString()}</span>
+              <div className="flex gap-3">
+                {payment.proof_thumbnail_url && (
+                  <img src={payment.proof_thumbnail_url} alt="" loading="lazy" className="w-12 h-12 rounded object-cover border border-gray-200 flex-shrink-0" />
+                )}
+                <div className="flex-1 min-w-0">
+                  <div className="flex justify-between mb-1">
+                    <span className="font-bold text-gray-900">${payment.amount_usd}</span>
+                    <span className="text-xs text-gray-500">{new Date(payment.date_reported).toLocaleDateString()}</span>
+                  </div>
+                  <p className="text-sm text-gray-600">{payment.concept}</p>
+                  <p className="text-xs text-gray-400 mt-1">Ref: {payment.reference_number || 'N/A'}</p>
+                </div>
               </div>
-              <p className="text-sm text-gray-600">{payment.concept}</p>
-              <p className="text-xs text-gray-400 mt-1">Ref: {payment.reference_number || 'N/A'}</p>
             </div>
           ))}
           {payments.length === 0 && (
             <div className="p-8 text-center text-gray-500">No hay pagos pendientes.</div>
           )}
+          {nextPage && (
+            <button onClick={loadMore} className="w-full p-3 text-sm font-medium text-primary hover:bg-gray-50">
+              Cargar más
+            </button>
+          )}
         </div>
       </div>
 
@@ -143,7 +239,9 @@ export const AdminPaymentVerification = () => {
                 <label className="text-xs text-gray-500 uppercase font-bold mb-2 block">Comprobante de Pago</label>
                 <div className="border border-gray-200 rounded-lg p-2 bg-gray-50 flex flex-col items-center justify-center min-h-[300px]">
                   {selectedPayment.proof_image ? (
-                    <img src={selectedPayment.proof_image} alt="Comprobante" className="max-h-96 object-contain" />
+                    <a href={selectedPayment.proof_image} target="_blank" rel="noopener noreferrer" title="Ver original">
+                      <img src={selectedPayment.proof_preview_url || selectedPayment.proof_image} alt="Comprobante" className="max-h-96 object-contain cursor-zoom-in" />
+                    </a>
                   ) : (
                     <div className="text-center p-8 text-gray-400">
                       <Download size={48} className="mx-auto mb-2 opacity-50" />
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
+import { fetchAll } from '../../api/client';
 import { Subject } from '../../types';
 import { BookOpen, Users, ArrowRight } from 'lucide-react';
 import { Link } from 'react-router-dom';
@@ -16,8 +16,8 @@ export const TeacherDashboard = () => {
         // Fetch all subjects. In a real app, the backend should filter by the logged-in teacher.
         // Currently, our SubjectViewSet returns all subjects. 
         // We can filter client-side if needed, or rely on backend improvements later.
-        const res = await client.get('subjects/');
-        const fetchedSubjects = res.data.map((s: any) => ({
+        const res = await fetchAll('subjects/');
+        const fetchedSubjects = res.map((s: any) => ({
           id: s.id.toString(),
           name: s.name,
           grade: s.grade_level,
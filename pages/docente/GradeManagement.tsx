@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import client from '../../api/client';
+import client, { fetchAll } from '../../api/client';
 import { Subject, Student, Evaluation, Grade } from '../../types';
 import { Save, Plus, Calendar, Edit, Trash2 } from 'lucide-react';
 import { isValidText } from '../../utils/validation';
@@ -30,8 +30,8 @@ export const TeacherGradeManagement = () => {
   useEffect(() => {
     const fetchSubjects = async () => {
       try {
-        const res = await client.get('subjects/');
-        const fetchedSubjects = res.data.map((s: any) => ({
+        const res = await fetchAll('subjects/');
+        const fetchedSubjects = res.map((s: any) => ({
           id: s.id.toString(),
           name: s.name,
           grade: s.grade_level,
@@ -58,8 +58,8 @@ export const TeacherGradeManagement = () => {
     const fetchData = async () => {
       try {
         // Fetch Evaluations
-        const evalRes = await client.get(`evaluations/?subject_id=${selectedSubjectId}`);
-        const fetchedEvals = evalRes.data.map((e: any) => ({
+        const evalRes = await fetchAll(`evaluations/?subject_id=${selectedSubjectId}`);
+        const fetchedEvals = evalRes.map((e: any) => ({
           id: e.id.toString(),
           subjectId: e.subject.toString(),
           name: e.name,
@@ -77,8 +77,8 @@ export const TeacherGradeManagement = () => {
         // Fetch Students for this subject (by grade/section)
         const subject = subjects.find(s => s.id === selectedSubjectId);
         if (subject) {
-          const studentRes = await client.get(`students/?grade=${subject.grade}&section=${subject.section}`);
-          const fetchedStudents = studentRes.data.map((s: any) => ({
+          const studentRes = await fetchAll(`students/?grade=${subject.grade}&section=${subject.section}`);
+          const fetchedStudents = studentRes.map((s: any) => ({
             id: s.id.toString(),
             name: `${s.first_name} ${s.last_name}`,
             cedula: s.id_number,
@@ -107,8 +107,8 @@ export const TeacherGradeManagement = () => {
 
     const fetchGrades = async () => {
       try {
-        const res = await client.get(`grades/?evaluation_id=${selectedEvaluationId}`);
-        const fetchedGrades = res.data.map((g: any) => ({
+        const res = await fetchAll(`grades/?evaluation_id=${selectedEvaluationId}`);
+        const fetchedGrades = res.map((g: any) => ({
           id: g.id.toString(),
           studentId: g.student.toString(),
           subjectId: g.subject_id?.toString() || '',
@@ -163,8 +163,8 @@ export const TeacherGradeManagement = () => {
       setNewEvalPercentage('');
 
       // Refresh evaluations
-      const evalRes = await client.get(`evaluations/?subject_id=${selectedSubjectId}`);
-      const fetchedEvals = evalRes.data.map((e: any) => ({
+      const evalRes = await fetchAll(`evaluations/?subject_id=${selectedSubjectId}`);
+      const fetchedEvals = evalRes.map((e: any) => ({
         id: e.id.toString(),
         subjectId: e.subject.toString(),
         name: e.name,
@@ -188,38 +188,19 @@ export const TeacherGradeManagement = () => {
     if (!selectedEvaluationId) return;
 
     try {
-      // Process each student's grade
-      const promises = students.map(async (student) => {
-        const score = gradeInputs[student.id];
-        if (score === undefined || score === null) return; // Skip if no input
-
-        const existingGrade = grades.find(g => g.studentId === student.id);
-
-        if (existingGrade) {
-          // Update
-          if (existingGrade.score !== score) {
-            await client.put(`grades/${existingGrade.id}/`, {
-              student: student.id,
-              evaluation: selectedEvaluationId,
-              score: score
-            });
-          }
-        } else {
-          // Create
-          await client.post('grades/', {
-            student: student.id,
-            evaluation: selectedEvaluationId,
-            score: score
-          });
-        }
-      });
+      // Send the whole class in a single request
+      const rows = students
+        .filter(student => gradeInputs[student.id] !== undefined && gradeInputs[student.id] !== null)
+        .map(student => ({ student: student.id, score: gradeInputs[student.id] }));
 
-      await Promise.all(promises);
+      if (rows.length > 0) {
+        await client.post(`evaluations/${selectedEvaluationId}/grades/bulk/`, { grades: rows });
+      }
       alert("Calificaciones guardadas exitosamente");
 
       // Refresh grades
-      const res = await client.get(`grades/?evaluation_id=${selectedEvaluationId}`);
-      const fetchedGrades = res.data.map((g: any) => ({
+      const res = await fetchAll(`grades/?evaluation_id=${selectedEvaluationId}`);
+      const fetchedGrades = res.map((g: any) => ({
         id: g.id.toString(),
         studentId: g.student.toString(),
         subjectId: g.subject_id?.toString() || '',
@@ -254,8 +235,8 @@ export const TeacherGradeManagement = () => {
       setNewEvalPercentage('');
 
       // Refresh
-      const evalRes = await client.get(`evaluations/?subject_id=${selectedSubjectId}`);
-      const fetchedEvals = evalRes.data.map((e: any) => ({
+      const evalRes = await fetchAll(`evaluations/?subject_id=${selectedSubjectId}`);
+      const fetchedEvals = evalRes.map((e: any) => ({
         id: e.id.toString(),
         subjectId: e.subject.toString(),
         name: e.name,
@@ -280,8 +261,8 @@ export const TeacherGradeManagement = () => {
       setSelectedEvaluationId('');
 
       // Refresh
-      const evalRes = await client.get(`evaluations/?subject_id=${selectedSubjectId}`);
-      const fetchedEvals = evalRes.data.map((e: any) => ({
+      const evalRes = await fetchAll(`evaluations/?subject_id=${selectedSubjectId}`);
+      const fetchedEvals = evalRes.map((e: any) => ({
         id: e.id.toString(),
         subjectId: e.subject.toString(),
         name: e.name,
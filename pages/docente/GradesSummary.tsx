@@ -1,22 +1,21 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import client from '../../api/client';
-import { Subject, Student, Grade } from '../../types';
+import client, { fetchAll } from '../../api/client';
+import { Subject } from '../../types';
 import { ArrowLeft, Edit } from 'lucide-react';
 
 export const TeacherGradesSummary = () => {
   const [subjects, setSubjects] = useState<Subject[]>([]);
   const [selectedSubjectId, setSelectedSubjectId] = useState('');
-  const [students, setStudents] = useState<Student[]>([]);
-  const [grades, setGrades] = useState<Grade[]>([]);
+  const [studentAverages, setStudentAverages] = useState<{ id: string; name: string; cedula: string; average: string }[]>([]);
   const [loading, setLoading] = useState(true);
   const [selectedLapso, setSelectedLapso] = useState(1);
 
   useEffect(() => {
     const fetchSubjects = async () => {
       try {
-        const res = await client.get('subjects/');
-        const fetchedSubjects = res.data.map((s: any) => ({
+        const res = await fetchAll('subjects/');
+        const fetchedSubjects = res.map((s: any) => ({
           id: s.id.toString(),
           name: s.name,
           grade: s.grade_level,
@@ -40,64 +39,27 @@ export const TeacherGradesSummary = () => {
   useEffect(() => {
     if (!selectedSubjectId) return;
 
-    const fetchData = async () => {
+    const fetchSummary = async () => {
       try {
-        // Fetch Grades for the subject
-        const gradesRes = await client.get(`grades/?subject_id=${selectedSubjectId}`);
-        const fetchedGrades = gradesRes.data.map((g: any) => ({
-          studentId: g.student.toString(),
-          subjectId: g.subject_id?.toString() || '',
-          evaluationName: g.evaluation_name || 'Evaluación',
-          score: parseFloat(g.score),
-          date: g.evaluation_date || new Date().toISOString(),
-          evaluationLapso: g.evaluation_lapso // Ensure backend sends this
-        }));
-        setGrades(fetchedGrades);
-
-        // Fetch Students and filter by Subject's Grade and Section
-        const studentsRes = await client.get('students/');
-        const currentSubject = subjects.find(s => s.id === selectedSubjectId);
-
-        const fetchedStudents = studentsRes.data
-          .filter((s: any) => {
-            if (!currentSubject) return false;
-            // Match Grade and Section
-            return s.current_grade === currentSubject.grade && s.section === currentSubject.section;
-          })
-          .map((s: any) => ({
-            id: s.id.toString(),
-            name: `${s.first_name} ${s.last_name}`,
-            cedula: s.id_number,
-            grade: s.current_grade,
-            section: s.section,
-            parentId: s.representative.toString()
-          }));
-        setStudents(fetchedStudents);
-
+        // Section roster with lapso scores, computed on the server
+        const res = await client.get(`subjects/${selectedSubjectId}/summary/`, {
+          params: { lapso: selectedLapso }
+        });
+        setStudentAverages(res.data.students.map((s: any) => ({
+          id: s.id.toString(),
+          name: `${s.first_name} ${s.last_name}`,
+          cedula: s.id_number,
+          average: s.score ?? '-'
+        })));
       } catch (error) {
         console.error("Error fetching data", error);
       }
     };
-    fetchData();
-  }, [selectedSubjectId]);
+    fetchSummary();
+  }, [selectedSubjectId, selectedLapso]);
 
   const selectedSubject = subjects.find(s => s.id === selectedSubjectId);
 
-  // Calculate averages based on selected Lapso
-  const studentAverages = students.map(student => {
-    // Filter grades by student AND selected lapso
-    const studentGrades = grades.filter(g =>
-      g.studentId === student.id &&
-      (g.evaluationLapso === selectedLapso || (!g.evaluationLapso && selectedLapso === 1)) // Fallback for old data
-    );
-
-    if (studentGrades.length === 0) return { ...student, average: '-' };
-
-    const sum = studentGrades.reduce((acc, curr) => acc + curr.score, 0);
-    const avg = sum / studentGrades.length;
-    return { ...student, average: avg.toFixed(2) };
-  });
-
   if (loading) return <div className="p-8 text-center">Cargando...</div>;
 
   return (
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { UserPlus, UserCog, Book } from 'lucide-react';
-import client from '../../api/client';
+import { fetchAll } from '../../api/client';
 
 export const ClerkDashboard = () => {
   const [stats, setStats] = useState({
@@ -13,16 +13,16 @@ export const ClerkDashboard = () => {
   useEffect(() => {
     const fetchStats = async () => {
       try {
-        const [repsRes, teachersRes, subjectsRes] = await Promise.all([
-          client.get('users/?role=REPRESENTANTE'),
-          client.get('teachers/'),
-          client.get('subjects/')
+        const [reps, teachers, subjects] = await Promise.all([
+          fetchAll('users/', { role: 'REPRESENTANTE' }),
+          fetchAll('teachers/'),
+          fetchAll('subjects/')
         ]);
 
         setStats({
-          representatives: repsRes.data.length,
-          teachers: teachersRes.data.length,
-          subjects: subjectsRes.data.length
+          representatives: reps.length,
+          teachers: teachers.length,
+          subjects: subjects.length
         });
       } catch (error) {
         console.error("Error fetching dashboard stats", error);
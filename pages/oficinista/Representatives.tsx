@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
+import client, { fetchAll } from '../../api/client';
 import { Search, Edit, UserMinus, Plus, Lock, X, Save, Eye, EyeOff, ExternalLink, Trash2 } from 'lucide-react';
 import { Link, useNavigate } from 'react-router-dom';
 import { CedulaInput } from '../../components/CedulaInput';
@@ -49,8 +49,8 @@ export const ClerkRepresentatives = () => {
 
   const fetchRepresentatives = async () => {
     try {
-      const res = await client.get('users/?role=REPRESENTANTE');
-      setRepresentatives(res.data);
+      const res = await fetchAll('users/?role=REPRESENTANTE');
+      setRepresentatives(res);
     } catch (error) {
       console.error("Error fetching representatives", error);
     } finally {
@@ -60,8 +60,7 @@ export const ClerkRepresentatives = () => {
 
   const fetchAssignedStudents = async (repId: number) => {
     try {
-      const res = await client.get('students/');
-      const students = res.data.filter((s: any) => s.representative === repId);
+      const students = await fetchAll('students/', { representative: repId });
       setAssignedStudents(students);
     } catch (error) {
       console.error("Error fetching assigned students", error);
@@ -70,8 +69,8 @@ export const ClerkRepresentatives = () => {
 
   const fetchAllStudents = async () => {
     try {
-      const res = await client.get('students/');
-      setAllStudents(res.data);
+      const res = await fetchAll('students/');
+      setAllStudents(res);
     } catch (error) {
       console.error("Error fetching all students", error);
     }
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
-import { Plus, Edit, Save, X, Calendar, Book, Clock, Search } from 'lucide-react';
+import client, { fetchAll } from '../../api/client';
+import { Plus, Edit, Save, X, Calendar, Book, Clock, Search, Upload } from 'lucide-react';
 import { useLocation } from 'react-router-dom';
 import { CedulaInput } from '../../components/CedulaInput';
 import { isValidName } from '../../utils/validation';
@@ -16,6 +16,8 @@ export const ClerkStudents = () => {
   const [activeTab, setActiveTab] = useState<'personal' | 'academic'>('personal');
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const [importing, setImporting] = useState(false);
+  const [importReport, setImportReport] = useState<any | null>(null);
 
   // Form State
   const [formData, setFormData] = useState({
@@ -52,12 +54,12 @@ export const ClerkStudents = () => {
 
   const fetchData = async () => {
     try {
-      const [studentsRes, repsRes] = await Promise.all([
-        client.get('students/'),
-        client.get('users/?role=REPRESENTANTE')
+      const [allStudents, reps] = await Promise.all([
+        fetchAll('students/'),
+        fetchAll('users/', { role: 'REPRESENTANTE' })
       ]);
-      setStudents(studentsRes.data);
-      setRepresentatives(repsRes.data);
+      setStudents(allStudents);
+      setRepresentatives(reps);
     } catch (error) {
       console.error("Error fetching data", error);
     } finally {
@@ -69,8 +71,8 @@ export const ClerkStudents = () => {
     try {
       // Fetch all subjects and filter client side (or backend if supported)
       // Ideally backend: /api/subjects/?grade=X&section=Y
-      const res = await client.get('subjects/');
-      const filtered = res.data.filter((s: any) => s.grade_level === grade && s.section === section);
+      const res = await fetchAll('subjects/');
+      const filtered = res.filter((s: any) => s.grade_level === grade && s.section === section);
       setSubjects(filtered);
     } catch (error) {
       console.error("Error fetching subjects", error);
@@ -139,11 +141,39 @@ export const ClerkStudents = () => {
 
   if (loading) return <div>Cargando...</div>;
 
+  // Spreadsheet enrollment: one row per student with the representative's data
+  const handleImport = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0];
+    e.target.value = '';
+    if (!file) return;
+    const data = new FormData();
+    data.append('file', file);
+    setImporting(true);
+    try {
+      const res = await client.post('students/import/', data, {
+        headers: {
+          'Content-Type': 'multipart/form-data'
+        }
+      });
+      setImportReport(res.data);
+      fetchData();
+    } catch (error: any) {
+      alert(error.response?.data?.file?.[0] || 'Error al importar el archivo');
+    } finally {
+      setImporting(false);
+    }
+  };
+
   return (
     <div className="space-y-6">
       <div className="flex justify-between items-center">
         <h1 className="text-2xl font-bold text-gray-900">Gestión de Estudiantes</h1>
         {!isCreating && (
+          <div className="flex gap-3">
+          <label className={`bg-white border border-gray-300 text-gray-700 px-4 py-2 rounded-lg font-bold flex items-center gap-2 hover:bg-gray-50 transition-colors cursor-pointer ${importing ? 'opacity-50 pointer-events-none' : ''}`}>
+            <Upload size={20} /> {importing ? 'Importando...' : 'Importar CSV/XLSX'}
+            <input type="file" accept=".csv,.xlsx" className="hidden" onChange={handleImport} />
+          </label>
           <button
             onClick={() => {
               setIsCreating(true);
@@ -157,9 +187,40 @@ export const ClerkStudents = () => {
           >
             <Plus size={20} /> Agregar Nuevo Estudiante
           </button>
+          </div>
         )}
       </div>
 
+      {importReport && (
+        <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-4">
+          <div className="flex justify-between items-center">
+            <p className="text-sm font-medium text-gray-800">
+              Importación: {importReport.representatives_created} representantes y {importReport.students_created} estudiantes creados, {importReport.errors.length} filas con errores.
+            </p>
+            <button onClick={() => setImportReport(null)} className="text-gray-400 hover:text-gray-600">
+              <X size={18} />
+            </button>
+          </div>
+          {importReport.errors.length > 0 && (
+            <ul className="mt-3 max-h-48 overflow-y-auto text-xs text-red-600 space-y-1">
+              {importReport.errors.map((err: any, i: number) => (
+                <li key={i}>Fila {err.row} ({err.field}): {err.message}</li>
+              ))}
+            </ul>
+          )}
+          {importReport.credentials?.length > 0 && (
+            <div className="mt-3">
+              <p className="text-xs font-medium text-gray-700">Claves generadas (entréguelas a cada representante):</p>
+              <ul className="mt-1 max-h-48 overflow-y-auto text-xs text-gray-700 font-mono space-y-1">
+                {importReport.credentials.map((cred: any) => (
+                  <li key={cred.username}>{cred.username} · {cred.name} · {cred.password}</li>
+                ))}
+              </ul>
+            </div>
+          )}
+        </div>
+      )}
+
       {isCreating ? (
         <div className="bg-white rounded-xl shadow-lg border border-gray-200 p-8 max-w-4xl mx-auto animate-in fade-in slide-in-from-bottom-4 duration-300">
           <div className="flex justify-between items-center mb-6 border-b border-gray-100 pb-4">
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
+import client, { fetchAll } from '../../api/client';
 import { Subject, ScheduleItem } from '../../types';
 import { Plus, Save, Edit, Check, X, Trash2 } from 'lucide-react';
 import { isValidText } from '../../utils/validation';
@@ -41,10 +41,10 @@ export const ClerkSubjects = () => {
 
   const fetchSubjects = async () => {
     try {
-      const res = await client.get('subjects/');
-      setSubjects(res.data);
-      if (res.data.length > 0 && !selectedSubjectId) {
-        setSelectedSubjectId(res.data[0].id.toString());
+      const res = await fetchAll('subjects/');
+      setSubjects(res);
+      if (res.length > 0 && !selectedSubjectId) {
+        setSelectedSubjectId(res[0].id.toString());
       }
     } catch (error) {
       console.error("Error fetching subjects", error);
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
+import client, { fetchAll } from '../../api/client';
 import { Plus, Edit, Save, X, BookOpen, Trash2, Eye, EyeOff, Check, Search } from 'lucide-react';
 import { Subject } from '../../types';
 import { CedulaInput } from '../../components/CedulaInput';
@@ -38,8 +38,8 @@ export const ClerkTeachers = () => {
 
   const fetchTeachers = async () => {
     try {
-      const res = await client.get('teachers/');
-      setTeachers(res.data);
+      const res = await fetchAll('teachers/');
+      setTeachers(res);
     } catch (error) {
       console.error("Error fetching teachers", error);
     } finally {
@@ -49,8 +49,8 @@ export const ClerkTeachers = () => {
 
   const fetchSubjects = async () => {
     try {
-      const res = await client.get('subjects/');
-      setSubjects(res.data);
+      const res = await fetchAll('subjects/');
+      setSubjects(res);
     } catch (error) {
       console.error("Error fetching subjects", error);
     }
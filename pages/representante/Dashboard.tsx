@@ -1,81 +1,35 @@
 import React, { useState, useEffect } from 'react';
 import client from '../../api/client';
-import { Student, Grade, Payment } from '../../types';
-import { Users, AlertCircle, TrendingUp } from 'lucide-react';
+import { FamilyChild } from '../../types';
+import { Users, AlertCircle, TrendingUp, Clock } from 'lucide-react';
 import { useAuth } from '../../context/AuthContext';
 
 export const RepresentativeDashboard = () => {
   const { user } = useAuth();
-  const [students, setStudents] = useState<Student[]>([]);
+  const [children, setChildren] = useState<FamilyChild[]>([]);
   const [selectedStudentId, setSelectedStudentId] = useState<string>('');
-  const [pendingPayments, setPendingPayments] = useState<Payment[]>([]);
-  const [recentGrades, setRecentGrades] = useState<Grade[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    const fetchStudents = async () => {
+    // All children with their payments, averages and next classes in one request
+    const fetchFamily = async () => {
       try {
-        const response = await client.get('students/');
-        const fetchedStudents = response.data.map((s: any) => ({
-          id: s.id.toString(),
-          name: `${s.first_name} ${s.last_name}`,
-          cedula: s.id_number,
-          grade: s.current_grade,
-          section: s.section,
-          parentId: s.representative.toString()
-        }));
-        setStudents(fetchedStudents);
-        if (fetchedStudents.length > 0) {
-          setSelectedStudentId(fetchedStudents[0].id);
+        const response = await client.get('me/family/');
+        setChildren(response.data.children);
+        if (response.data.children.length > 0) {
+          setSelectedStudentId(response.data.children[0].id.toString());
         }
       } catch (error) {
-        console.error("Error fetching students", error);
+        console.error("Error fetching family dashboard", error);
       } finally {
         setLoading(false);
       }
     };
-    fetchStudents();
+    fetchFamily();
   }, []);
 
-  useEffect(() => {
-    if (!selectedStudentId) return;
-
-    const fetchData = async () => {
-      try {
-        // Fetch Payments
-        const paymentsRes = await client.get(`payments/?student_id=${selectedStudentId}`);
-        const payments = paymentsRes.data.map((p: any) => ({
-          id: p.id.toString(),
-          studentId: p.student.toString(),
-          concept: p.concept,
-          amountUsd: parseFloat(p.amount_usd),
-          amountBs: parseFloat(p.amount_bs),
-          status: p.status === 'PENDING' ? 'pending' : p.status === 'VERIFIED' ? 'verified' : 'rejected',
-          date: p.date_reported,
-          reference: p.reference_number,
-          adminNote: p.admin_note
-        })).filter((p: any) => p.status !== 'verified');
-        setPendingPayments(payments);
-
-        // Fetch Grades
-        const gradesRes = await client.get(`grades/?student_id=${selectedStudentId}`);
-        const grades = gradesRes.data.map((g: any) => ({
-          studentId: g.student.toString(),
-          subjectId: g.subject_id?.toString() || '',
-          evaluationName: g.evaluation_name || 'Evaluación',
-          score: parseFloat(g.score),
-          date: g.evaluation_date || new Date().toISOString()
-        }));
-        setRecentGrades(grades);
-
-      } catch (error) {
-        console.error("Error fetching student data", error);
-      }
-    };
-    fetchData();
-  }, [selectedStudentId]);
-
-  const selectedStudent = students.find(s => s.id === selectedStudentId);
+  const selectedChild = children.find(c => c.id.toString() === selectedStudentId);
+  const pendingPayments = selectedChild ? selectedChild.recent_payments.filter(p => p.status !== 'VERIFIED') : [];
 
   const formatDate = (dateString: string) => {
     if (!dateString) return '';
@@ -87,7 +41,7 @@ export const RepresentativeDashboard = () => {
     return <div className="p-8 text-center">Cargando información...</div>;
   }
 
-  if (!selectedStudent) {
+  if (!selectedChild) {
     return <div className="p-8 text-center">No se encontraron estudiantes asociados.</div>;
   }
 
@@ -97,7 +51,7 @@ export const RepresentativeDashboard = () => {
       <div className="flex flex-col md:flex-row md:items-center justify-between gap-4">
         <div>
           <h1 className="text-3xl font-bold text-gray-900">Hola, {user?.name}</h1>
-          <p className="text-gray-500">Usted está viendo la información del estudiante: <span className="font-bold text-primary">{selectedStudent.name}</span></p>
+          <p className="text-gray-500">Usted está viendo la información del estudiante: <span className="font-bold text-primary">{selectedChild.first_name} {selectedChild.last_name}</span></p>
         </div>
         <div className="flex items-center gap-3 bg-white p-2 rounded-lg shadow-sm border border-gray-200">
           <span className="text-sm font-medium text-gray-600 pl-2">Seleccionar Estudiante:</span>
@@ -106,22 +60,29 @@ export const RepresentativeDashboard = () => {
             onChange={(e) => setSelectedStudentId(e.target.value)}
             className="bg-transparent border-none text-gray-700 font-medium focus:ring-0 cursor-pointer"
           >
-            {students.map(student => (
-              <option key={student.id} value={student.id}>{student.name}</option>
+            {children.map(child => (
+              <option key={child.id} value={child.id.toString()}>{child.first_name} {child.last_name}</option>
             ))}
           </select>
         </div>
       </div>
 
       {/* Alert Section */}
-      {pendingPayments.length > 0 && (
+      {(pendingPayments.length > 0 || selectedChild.outstanding_concepts.length > 0) && (
         <div className="bg-red-50 border-l-4 border-red-500 p-4 rounded-r-lg flex items-start gap-4">
           <AlertCircle className="text-red-500 flex-shrink-0" />
           <div>
             <h3 className="font-bold text-red-800">Usted tiene pagos pendientes</h3>
-            <p className="text-red-700 text-sm mt-1">
-              Existen {pendingPayments.length} pagos que requieren su atención. Por favor verifique la sección de pagos.
-            </p>
+            {selectedChild.outstanding_concepts.length > 0 && (
+              <p className="text-red-700 text-sm mt-1">
+                {selectedChild.outstanding_concepts.length} conceptos por pagar (${selectedChild.outstanding_usd}): {selectedChild.outstanding_concepts.map(c => c.name).join(', ')}.
+              </p>
+            )}
+            {pendingPayments.length > 0 && (
+              <p className="text-red-700 text-sm mt-1">
+                Existen {pendingPayments.length} pagos que requieren su atención. Por favor verifique la sección de pagos.
+              </p>
+            )}
           </div>
         </div>
       )}
@@ -149,29 +110,63 @@ export const RepresentativeDashboard = () => {
         </a>
       </div>
 
-      {/* Quick Stats / Recent Grades */}
+      {/* Current lapso / Next classes */}
       <div className="grid md:grid-cols-2 gap-6 items-start">
+        <div className="bg-white p-6 rounded-xl shadow-sm border border-gray-100 flex flex-col">
+          <h3 className="font-bold text-lg mb-4 flex items-center justify-between gap-2">
+            <span className="flex items-center gap-2">
+              <TrendingUp size={20} className="text-primary" />
+              Lapso {selectedChild.lapso.number}
+            </span>
+            {selectedChild.lapso.average && (
+              <span className={parseFloat(selectedChild.lapso.average) >= 10 ? 'text-green-600' : 'text-red-600'}>
+                Promedio {selectedChild.lapso.average}/20
+              </span>
+            )}
+          </h3>
+          <div className="space-y-4 flex-1">
+            {selectedChild.lapso.subjects.some(s => s.average) ? (
+              selectedChild.lapso.subjects.filter(s => s.average).map(subject => (
+                <div key={subject.subject_id} className="flex justify-between items-center p-3 bg-gray-50 rounded-lg">
+                  <div>
+                    <p className="font-medium text-gray-900">{subject.subject}</p>
+                    <p className="text-xs text-gray-500">{subject.covered_percentage}% evaluado</p>
+                  </div>
+                  <div className={`font-bold text-lg ${parseFloat(subject.average!) >= 10 ? 'text-green-600' : 'text-red-600'}`}>
+                    {subject.average}/20
+                  </div>
+                </div>
+              ))
+            ) : (
+              <div className="h-full flex items-center justify-center min-h-[100px]">
+                <p className="text-gray-500 italic">No hay calificaciones en este lapso.</p>
+              </div>
+            )}
+          </div>
+        </div>
+
         <div className="bg-white p-6 rounded-xl shadow-sm border border-gray-100 flex flex-col">
           <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
-            <TrendingUp size={20} className="text-primary" />
-            Calificaciones Recientes
+            <Clock size={20} className="text-primary" />
+            Próximas Clases
           </h3>
           <div className="space-y-4 flex-1">
-            {recentGrades.length > 0 ? (
-              recentGrades.map((grade, idx) => (
+            {selectedChild.next_classes.length > 0 ? (
+              selectedChild.next_classes.map((item, idx) => (
                 <div key={idx} className="flex justify-between items-center p-3 bg-gray-50 rounded-lg">
                   <div>
-                    <p className="font-medium text-gray-900">Evaluación {grade.evaluationName}</p>
-                    <p className="text-xs text-gray-500">{formatDate(grade.date)}</p>
+                    <p className="font-medium text-gray-900">{item.subject}</p>
+                    <p className="text-xs text-gray-500">{item.teacher || 'Sin docente'}{item.room ? ` · Aula ${item.room}` : ''}</p>
                   </div>
-                  <div className={`font-bold text-lg ${grade.score >= 10 ? 'text-green-600' : 'text-red-600'}`}>
-                    {grade.score}/20
+                  <div className="text-right text-sm">
+                    <p className="font-medium text-gray-900">{item.day} {formatDate(item.date + 'T00:00:00')}</p>
+                    <p className="text-gray-500">{item.start} - {item.end}</p>
                   </div>
                 </div>
               ))
             ) : (
               <div className="h-full flex items-center justify-center min-h-[100px]">
-                <p className="text-gray-500 italic">No hay calificaciones recientes.</p>
+                <p className="text-gray-500 italic">No hay clases programadas.</p>
               </div>
             )}
           </div>
@@ -182,15 +177,15 @@ export const RepresentativeDashboard = () => {
           <div className="space-y-4 mt-4">
             <div className="flex justify-between border-b border-blue-800 pb-2">
               <span className="text-blue-200">Grado/Año:</span>
-              <span className="font-medium">{selectedStudent.grade}</span>
+              <span className="font-medium">{selectedChild.current_grade}</span>
             </div>
             <div className="flex justify-between border-b border-blue-800 pb-2">
               <span className="text-blue-200">Sección:</span>
-              <span className="font-medium">{selectedStudent.section}</span>
+              <span className="font-medium">{selectedChild.section}</span>
             </div>
             <div className="flex justify-between border-b border-blue-800 pb-2">
               <span className="text-blue-200">Cédula:</span>
-              <span className="font-medium">{selectedStudent.cedula}</span>
+              <span className="font-medium">{selectedChild.id_number}</span>
             </div>
           </div>
         </div>
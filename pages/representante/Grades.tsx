@@ -1,11 +1,10 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
-import { Student, Subject, Grade } from '../../types';
+import client, { fetchAll } from '../../api/client';
+import { Student, Grade } from '../../types';
 import { Download } from 'lucide-react';
 
 export const RepresentativeGrades = () => {
   const [students, setStudents] = useState<Student[]>([]);
-  const [subjects, setSubjects] = useState<Subject[]>([]);
   const [grades, setGrades] = useState<Grade[]>([]);
 
   const [selectedStudentId, setSelectedStudentId] = useState('');
@@ -16,8 +15,8 @@ export const RepresentativeGrades = () => {
   useEffect(() => {
     const fetchStudents = async () => {
       try {
-        const response = await client.get('students/');
-        const fetchedStudents = response.data.map((s: any) => ({
+        const response = await fetchAll('students/');
+        const fetchedStudents = response.map((s: any) => ({
           id: s.id.toString(),
           name: `${s.first_name} ${s.last_name}`,
           cedula: s.id_number,
@@ -38,34 +37,15 @@ export const RepresentativeGrades = () => {
     fetchStudents();
   }, []);
 
-  useEffect(() => {
-    const fetchSubjects = async () => {
-      try {
-        const res = await client.get('subjects/');
-        const fetchedSubjects = res.data.map((s: any) => ({
-          id: s.id.toString(),
-          name: s.name,
-          grade: s.grade_level,
-          section: 'A', // Default or fetch if available
-          teacherId: s.teacher?.toString(),
-          schedule: [] // Schedule not yet implemented in backend
-        }));
-        setSubjects(fetchedSubjects);
-      } catch (error) {
-        console.error("Error fetching subjects", error);
-      }
-    };
-    fetchSubjects();
-  }, []);
-
   useEffect(() => {
     if (!selectedStudentId) return;
     const fetchGrades = async () => {
       try {
-        const res = await client.get(`grades/?student_id=${selectedStudentId}`);
-        const fetchedGrades = res.data.map((g: any) => ({
+        const res = await fetchAll(`grades/?student_id=${selectedStudentId}`);
+        const fetchedGrades = res.map((g: any) => ({
           studentId: g.student.toString(),
           subjectId: g.subject_id?.toString() || '',
+          subjectName: g.subject_name,
           evaluationName: g.evaluation_name || 'Evaluación',
           score: parseFloat(g.score),
           date: g.evaluation_date || new Date().toISOString(),
@@ -164,7 +144,7 @@ export const RepresentativeGrades = () => {
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
               {filteredGrades.map((grade, idx) => {
-                const subjectName = subjects.find(s => s.id === grade.subjectId)?.name || 'Desconocida';
+                const subjectName = grade.subjectName || 'Desconocida';
                 return (
                   <tr key={idx}>
                     <td className="px-6 py-4 whitespace-nowrap text-sm font-bold text-gray-900">{subjectName}</td>
@@ -1,5 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
-import client from '../../api/client';
+import client, { fetchAll } from '../../api/client';
+import { uploadProof } from '../../api/uploads';
 import { Student, Payment } from '../../types';
 import { DollarSign, Upload, AlertTriangle, CheckCircle, Clock, X, FileText } from 'lucide-react';
 import { isValidText } from '../../utils/validation';
@@ -35,14 +36,15 @@ export const RepresentativePayments = () => {
     email: ''
   });
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
+  const [uploadProgress, setUploadProgress] = useState<number | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
 
   useEffect(() => {
     const fetchData = async () => {
       try {
         // Fetch Students
-        const studentsRes = await client.get('students/');
-        const fetchedStudents = studentsRes.data.map((s: any) => ({
+        const studentsRes = await fetchAll('students/');
+        const fetchedStudents = studentsRes.map((s: any) => ({
           id: s.id.toString(),
           name: `${s.first_name} ${s.last_name}`,
           cedula: s.id_number,
@@ -70,8 +72,8 @@ export const RepresentativePayments = () => {
         }
 
         // Fetch Payment Concepts
-        const conceptsRes = await client.get('payment-concepts/');
-        setPaymentConcepts(conceptsRes.data);
+        const conceptsRes = await fetchAll('payment-concepts/');
+        setPaymentConcepts(conceptsRes);
 
       } catch (error) {
         console.error("Error fetching initial data", error);
@@ -86,8 +88,8 @@ export const RepresentativePayments = () => {
     if (!selectedStudentId) return;
     const fetchPayments = async () => {
       try {
-        const res = await client.get(`payments/?student_id=${selectedStudentId}`);
-        setPayments(res.data);
+        const res = await fetchAll(`payments/?student_id=${selectedStudentId}`);
+        setPayments(res);
       } catch (error) {
         console.error("Error fetching payments", error);
       }
@@ -146,17 +148,18 @@ export const RepresentativePayments = () => {
   const handleSubmit = async () => {
     if (!selectedFile || !selectedStudentId || !selectedConceptId) return;
 
-    const data = new FormData();
-    data.append('student', selectedStudentId);
-    data.append('amount_usd', amountUsd);
-    data.append('amount_bs', (parseFloat(amountUsd) * exchangeRate).toFixed(2));
-    data.append('rate_applied', exchangeRate.toString());
+    const data: Record<string, string> = {
+      student: selectedStudentId,
+      amount_usd: amountUsd,
+      amount_bs: (parseFloat(amountUsd) * exchangeRate).toFixed(2),
+      rate_applied: exchangeRate.toString(),
+    };
 
     // Determine concept logic
     let conceptText = '';
     if (selectedConceptId.startsWith('concept_')) {
       const conceptId = selectedConceptId.split('_')[1];
-      data.append('payment_concept', conceptId);
+      data.payment_concept = conceptId;
       const concept = paymentConcepts.find(c => c.id === parseInt(conceptId));
       conceptText = concept ? concept.name : 'Pago';
     } else if (selectedConceptId.startsWith('retry_')) {
@@ -165,25 +168,23 @@ export const RepresentativePayments = () => {
       conceptText = payment ? `Reintento: ${payment.concept}` : 'Reintento Pago';
       // Ideally we might want to update the existing payment, but creating a new one is safer for history
     }
-    data.append('concept', conceptText);
+    data.concept = conceptText;
 
-    data.append('reference_number', formData.reference);
-    data.append('proof_image', selectedFile);
-    data.append('billing_name', formData.billingName);
-    data.append('billing_id', formData.rif);
-    data.append('billing_address', formData.billingAddress);
+    data.reference_number = formData.reference;
+    data.billing_name = formData.billingName;
+    data.billing_id = formData.rif;
+    data.billing_address = formData.billingAddress;
 
     try {
-      await client.post('payments/', data, {
-        headers: {
-          'Content-Type': 'multipart/form-data'
-        }
-      });
+      // Proof goes up in resumable chunks first; the payment references it
+      setUploadProgress(0);
+      data.upload = await uploadProof(selectedFile, setUploadProgress);
+      await client.post('payments/', data);
       alert("Pago reportado exitosamente");
       setView('list');
       // Refresh payments
-      const res = await client.get(`payments/?student_id=${selectedStudentId}`);
-      setPayments(res.data);
+      const res = await fetchAll(`payments/?student_id=${selectedStudentId}`);
+      setPayments(res);
 
       // Reset form
       setFormData({ billingName: '', reference: '', rif: '', billingAddress: '', phone: '', email: '' });
@@ -194,6 +195,8 @@ export const RepresentativePayments = () => {
     } catch (error) {
       console.error("Error reporting payment", error);
       alert("Error al reportar el pago");
+    } finally {
+      setUploadProgress(null);
     }
   };
 
@@ -440,13 +443,13 @@ export const RepresentativePayments = () => {
             </button>
             <button
               onClick={handleSubmit}
-              disabled={!isFormValid}
-              className={`flex-1 py-3 font-bold rounded-lg shadow-md transition-all ${isFormValid
+              disabled={!isFormValid || uploadProgress !== null}
+              className={`flex-1 py-3 font-bold rounded-lg shadow-md transition-all ${isFormValid && uploadProgress === null
                 ? 'bg-primary text-white hover:bg-blue-800'
                 : 'bg-gray-300 text-gray-500 cursor-not-allowed'
                 }`}
             >
-              Reportar Pago
+              {uploadProgress !== null ? `Subiendo comprobante... ${Math.round(uploadProgress * 100)}%` : 'Reportar Pago'}
             </button>
           </div>
         </div>
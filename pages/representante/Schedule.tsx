@@ -1,33 +1,33 @@
 import React, { useState, useEffect } from 'react';
-import client from '../../api/client';
-import { Student, Subject } from '../../types';
+import client, { fetchAll } from '../../api/client';
+import { Student } from '../../types';
 
-// Standardized academic blocks + breaks
-const TIME_BLOCKS = [
-  { id: 1, label: '07:00 - 07:45', start: '07:00 AM', end: '07:45 AM', type: 'class' },
-  { id: 2, label: '07:45 - 08:30', start: '07:45 AM', end: '08:30 AM', type: 'class' },
-  { id: 3, label: '08:30 - 09:15', start: '08:30 AM', end: '09:15 AM', type: 'class' },
-  { id: 4, label: '09:15 - 09:45', start: '09:15 AM', end: '09:45 AM', type: 'class' },
-  { id: 5, label: '09:45 - 10:30', start: '09:45 AM', end: '10:30 AM', type: 'break', name: 'Receso' },
-  { id: 6, label: '10:30 - 11:15', start: '10:30 AM', end: '11:15 AM', type: 'class' },
-  { id: 7, label: '11:15 - 12:00', start: '11:15 AM', end: '12:00 PM', type: 'class' },
-  { id: 8, label: '12:00 - 12:45', start: '12:00 PM', end: '12:45 PM', type: 'class' },
-  { id: 9, label: '12:45 - 01:30', start: '12:45 PM', end: '01:30 PM', type: 'class' },
-];
+interface TimetableCell {
+  subject: string;
+  subject_id: number;
+  teacher: string | null;
+  room: string;
+}
+
+interface Timetable {
+  days: string[];
+  slots: { start: string; end: string }[];
+  grid: (TimetableCell | null)[][];
+}
 
 const DAYS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes'];
 
 export const RepresentativeSchedule = () => {
   const [students, setStudents] = useState<Student[]>([]);
-  const [subjects, setSubjects] = useState<Subject[]>([]);
+  const [timetable, setTimetable] = useState<Timetable | null>(null);
   const [selectedStudentId, setSelectedStudentId] = useState('');
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchStudents = async () => {
       try {
-        const response = await client.get('students/');
-        const fetchedStudents = response.data.map((s: any) => ({
+        const response = await fetchAll('students/');
+        const fetchedStudents = response.map((s: any) => ({
           id: s.id.toString(),
           name: `${s.first_name} ${s.last_name}`,
           cedula: s.id_number,
@@ -49,43 +49,26 @@ export const RepresentativeSchedule = () => {
   }, []);
 
   useEffect(() => {
-    // In a real app, we would fetch the schedule for the specific student/section
-    // For now, we fetch subjects and will display them in a mock schedule or list
-    const fetchSubjects = async () => {
+    if (!selectedStudentId) return;
+    // Precomputed day x slot grid of the student's grade/section
+    const fetchTimetable = async () => {
       try {
-        const res = await client.get('subjects/');
-        const fetchedSubjects = res.data.map((s: any) => ({
-          id: s.id.toString(),
-          name: s.name,
-          grade: s.grade_level,
-          section: 'A',
-          teacherId: s.teacher?.toString(),
-          schedule: [] // Backend doesn't support schedule blocks yet
-        }));
-        setSubjects(fetchedSubjects);
+        const res = await client.get(`students/${selectedStudentId}/timetable/`);
+        setTimetable(res.data);
       } catch (error) {
-        console.error("Error fetching subjects", error);
+        console.error("Error fetching timetable", error);
+        setTimetable(null);
       }
     };
-    fetchSubjects();
-  }, []);
+    fetchTimetable();
+  }, [selectedStudentId]);
 
   const student = students.find(s => s.id === selectedStudentId);
 
-  // Filter subjects for the student's grade
-  const studentSubjects = student
-    ? subjects.filter(sub => sub.grade === student.grade)
-    : [];
-
-  // Mock schedule distribution for demo purposes since backend lacks schedule model
-  const getSubjectForSlot = (day: string, startTime: string) => {
-    // Simple deterministic assignment based on day/time hash for demo
-    if (!studentSubjects.length) return null;
-    const index = (day.length + startTime.length) % (studentSubjects.length + 2);
-    if (index < studentSubjects.length) {
-      return studentSubjects[index].name;
-    }
-    return null;
+  const getCell = (slotIndex: number, day: string) => {
+    if (!timetable) return null;
+    const dayIndex = timetable.days.indexOf(day);
+    return dayIndex === -1 ? null : timetable.grid[slotIndex][dayIndex];
   };
 
   if (loading) return <div className="p-8 text-center">Cargando horario...</div>;
@@ -134,34 +117,37 @@ export const RepresentativeSchedule = () => {
                 </tr>
               </thead>
               <tbody className="divide-y divide-gray-200">
-                {TIME_BLOCKS.map((block) => (
-                  <tr key={block.id} className={block.type === 'break' ? 'bg-gray-50' : 'bg-white'}>
-                    <td className="px-4 py-3 text-sm font-medium text-gray-500 border-r border-gray-200 whitespace-nowrap">
-                      {block.label}
+                {!timetable || timetable.slots.length === 0 ? (
+                  <tr>
+                    <td colSpan={DAYS.length + 1} className="px-4 py-6 text-center text-sm text-gray-400">
+                      No hay horario cargado para esta sección.
                     </td>
-
-                    {block.type === 'break' ? (
-                      <td colSpan={5} className="px-4 py-3 text-center text-sm font-bold text-gray-400 tracking-widest uppercase bg-gray-100/50">
-                        {block.name}
+                  </tr>
+                ) : (
+                  timetable.slots.map((slot, slotIndex) => (
+                    <tr key={`${slot.start}-${slot.end}`} className="bg-white">
+                      <td className="px-4 py-3 text-sm font-medium text-gray-500 border-r border-gray-200 whitespace-nowrap">
+                        {slot.start} - {slot.end}
                       </td>
-                    ) : (
-                      DAYS.map(day => {
-                        const subjectName = getSubjectForSlot(day, block.start);
+                      {DAYS.map(day => {
+                        const cell = getCell(slotIndex, day);
                         return (
                           <td key={day} className="px-4 py-3 text-sm border-l border-gray-100">
-                            {subjectName ? (
-                              <span className="font-semibold text-gray-900 block">
-                                {subjectName}
-                              </span>
+                            {cell ? (
+                              <>
+                                <span className="font-semibold text-gray-900 block">{cell.subject}</span>
+                                {cell.teacher && <span className="text-xs text-gray-500 block">{cell.teacher}</span>}
+                                {cell.room && <span className="text-xs text-gray-400 block">Aula {cell.room}</span>}
+                              </>
                             ) : (
                               <span className="text-gray-300 text-xs">-</span>
                             )}
                           </td>
                         );
-                      })
-                    )}
-                  </tr>
-                ))}
+                      })}
+                    </tr>
+                  ))
+                )}
               </tbody>
             </table>
           </div>
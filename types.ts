@@ -48,6 +48,7 @@ export interface Grade {
   id: string;
   studentId: string;
   subjectId: string;
+  subjectName?: string;
   evaluationName: string;
   evaluationLapso?: number;
   score: number; // 0-20
@@ -63,7 +64,9 @@ export interface Payment {
   rate_applied: string;
   date_reported: string;
   reference_number: string;
-  proof_image: string | null;
+  proof_image: string | null; // original upload, only for zooming/downloading
+  proof_thumbnail_url?: string | null;
+  proof_preview_url?: string | null;
   status: 'PENDING' | 'VERIFIED' | 'REJECTED';
   admin_note?: string;
   // Read-only fields from serializer
@@ -93,4 +96,53 @@ export interface Teacher {
   id: string;
   name: string;
   cedula: string;
-}
\ No newline at end of file
+}
+
+// GET me/family/: a representative's home screen, all children at once
+export interface FamilyChild {
+  id: number;
+  first_name: string;
+  last_name: string;
+  id_number: string;
+  current_grade: string;
+  section: string;
+  outstanding_concepts: { id: number; name: string; amount_usd: string }[];
+  outstanding_usd: string;
+  recent_payments: {
+    id: number;
+    concept: string;
+    payment_concept_id: number | null;
+    amount_usd: string;
+    amount_bs: string;
+    status: 'PENDING' | 'VERIFIED' | 'REJECTED';
+    date_reported: string;
+    reference_number: string;
+    admin_note: string | null;
+  }[];
+  lapso: {
+    number: number;
+    average: string | null;
+    subjects: {
+      subject_id: number;
+      subject: string;
+      score: string | null;
+      covered_percentage: string;
+      average: string | null;
+    }[];
+  };
+  next_classes: {
+    day: string;
+    date: string;
+    start: string;
+    end: string;
+    subject: string;
+    subject_id: number;
+    teacher: string | null;
+    room: string;
+  }[];
+}
+
+export interface FamilyDashboard {
+  generated_at: string;
+  children: FamilyChild[];
+}